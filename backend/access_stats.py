@@ -0,0 +1,215 @@
+"""
+Access-frequency tracking for audio and romanization requests
+Counts are aggregated in memory and flushed periodically in batches (Supabase RPC,
+or a local JSON file when Supabase is not configured). A decayed per-key frequency
+is kept in memory to drive cache eviction.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process development only
+    fcntl = None
+
+# Half-life of the in-memory frequency score used for eviction
+DEFAULT_HALF_LIFE = 6 * 60 * 60
+MAX_TRACKED_KEYS = 50000
+
+
+def utc_iso(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+class SupabaseUsageSink:
+    """Flush a batch through the record_access() SQL function (see setup_supabase.py)"""
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def write(self, events):
+        self.supabase.rpc('record_access', {'events': events}).execute()
+
+
+class JSONFileUsageSink:
+    """
+    Merge batches into a local JSON file (development without Supabase)
+    The read-modify-write holds an exclusive lock on <path>.lock, so several
+    gunicorn workers flushing at once add up instead of overwriting each other
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, events):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._merge(events)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _merge(self, events):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {'counts': {}}
+
+        counts = data.setdefault('counts', {})
+        for event in events:
+            entry = counts.setdefault(event['kind'], {}).setdefault(event['key'], {'count': 0, 'last_accessed': None})
+            entry['count'] += event['count']
+            entry['last_accessed'] = max(entry['last_accessed'] or '', event['last_accessed'])
+        data['updated_at'] = utc_iso(time.time())
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+class AccessTracker:
+    """
+    record(kind, key) is cheap and non-blocking: it bumps an in-memory counter.
+    A daemon thread (started lazily) flushes the pending counts every
+    flush_interval seconds as one batch per sink.
+    """
+
+    def __init__(self, sinks, flush_interval=30.0, half_life=DEFAULT_HALF_LIFE):
+        self.sinks = sinks
+        self.flush_interval = flush_interval
+        self.decay_rate = math.log(2) / half_life
+
+        self._lock = threading.Lock()
+        self._pending = {}       # (kind, key) -> [count, last_accessed]
+        self._frequency = {}     # (kind, key) -> (decayed score, updated_at)
+        self._thread = None
+        self._stats = {'recorded': 0, 'flushes': 0, 'flushed_events': 0, 'flush_errors': 0}
+
+    def record(self, kind, key):
+        if not key:
+            return
+        now = time.time()
+        with self._lock:
+            pending = self._pending.setdefault((kind, key), [0, now])
+            pending[0] += 1
+            pending[1] = now
+
+            score, updated = self._frequency.get((kind, key), (0.0, now))
+            self._frequency[(kind, key)] = (score * math.exp(-self.decay_rate * (now - updated)) + 1.0, now)
+            if len(self._frequency) > MAX_TRACKED_KEYS:
+                self._prune_frequency(now)
+
+            self._stats['recorded'] += 1
+            if self._thread is None and self.sinks:
+                self._thread = threading.Thread(target=self._flush_loop, name='access-stats-flush', daemon=True)
+                self._thread.start()
+
+    def frequency(self, kind, key):
+        """Decayed access frequency (≈ recent hits, halving every half_life)"""
+        now = time.time()
+        with self._lock:
+            score, updated = self._frequency.get((kind, key), (0.0, now))
+        return score * math.exp(-self.decay_rate * (now - updated))
+
+    def _prune_frequency(self, now):
+        # Called with the lock held: drop the coldest 10% of keys
+        ranked = sorted(
+            self._frequency.items(),
+            key=lambda item: item[1][0] * math.exp(-self.decay_rate * (now - item[1][1]))
+        )
+        for key, _ in ranked[:len(ranked) // 10]:
+            del self._frequency[key]
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write pending counts to every sink; failed batches are merged back for the next flush"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        events = [
+            {'kind': kind, 'key': key, 'count': count, 'last_accessed': utc_iso(last_accessed)}
+            for (kind, key), (count, last_accessed) in pending.items()
+        ]
+
+        failed = False
+        for sink in self.sinks:
+            try:
+                sink.write(events)
+            except Exception as e:
+                failed = True
+                print(f"⚠️  Access stats flush to {type(sink).__name__} failed: {e}")
+
+        with self._lock:
+            self._stats['flushes'] += 1
+            if failed:
+                self._stats['flush_errors'] += 1
+                for key, (count, last_accessed) in pending.items():
+                    merged = self._pending.setdefault(key, [0, last_accessed])
+                    merged[0] += count
+                    merged[1] = max(merged[1], last_accessed)
+            else:
+                self._stats['flushed_events'] += len(events)
+        return len(events)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending), tracked_keys=len(self._frequency))
+
+
+def fetch_usage_counts(supabase, kind, page_size=1000):
+    """Read aggregated counts for one kind from the usage_stats table: {key: count}"""
+    counts = {}
+    start = 0
+    while True:
+        result = supabase.table('usage_stats').select('key, access_count').eq('kind', kind) \
+            .range(start, start + page_size - 1).execute()
+        for row in result.data:
+            counts[row['key']] = row['access_count']
+        if len(result.data) < page_size:
+            return counts
+        start += page_size
+
+
+def fetch_usage_records(supabase, kind, page_size=1000):
+    """Read counts with their last access for one kind from usage_stats: {key: (count, last_accessed ISO)}"""
+    records = {}
+    start = 0
+    while True:
+        result = supabase.table('usage_stats').select('key, access_count, last_accessed').eq('kind', kind) \
+            .range(start, start + page_size - 1).execute()
+        for row in result.data:
+            records[row['key']] = (row['access_count'], row['last_accessed'])
+        if len(result.data) < page_size:
+            return records
+        start += page_size
+
+
+def load_usage_records(path, kind):
+    """Read counts with their last access for one kind from a usage_stats.json file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {key: (entry['count'], entry['last_accessed'])
+            for key, entry in data.get('counts', {}).get(kind, {}).items()}
+
+
+def load_usage_counts(path, kind):
+    """Read aggregated counts for one kind from a usage_stats.json file: {key: count}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {key: entry['count'] for key, entry in data.get('counts', {}).get(kind, {}).items()}
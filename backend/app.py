@@ -5,7 +5,34 @@ from anthropic import Anthropic
 from dotenv import load_dotenv
 from pypinyin import pinyin, Style
 import os
+import sys
 import json
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Make sibling modules importable under both `python backend/app.py` and `gunicorn backend.app:app`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http_pool import http_pool, HTTPStatusError
+from audio_prefetch import AudioPrefetcher, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from audio_warmup import AudioWarmup, priority_entries_source
+from access_stats import AccessTracker, SupabaseUsageSink, JSONFileUsageSink
+from memory_cache import AudioMemoryCache
+from audio_keys import RECIPE_VERSION, canonical_tailo, audio_cache_key, audio_storage_path
+from audio_assembly import assemble_sentence, split_phrases, stitch_clips
+import hapsing
+import lesson_audio
+import metrics
+from audio_variants import (ORIGINAL, VARIANTS, VariantStats, choose_variant, transcode,
+                            variant_memory_key, variant_storage_path)
+from hedging import DeadlineExceeded, deadline_after, remaining
+from circuit_breaker import CircuitOpenError, NegativeCacheHit
+
+# Every Tau-Phah-Ji call is timed as its own stage on /metrics
+tàuphahjī = metrics.instrument('tauphahji', tàuphahjī)
 
 # Supabase for audio caching (optional)
 try:
@@ -29,9 +56,7 @@ else:
     app = Flask(__name__)
 
 CORS(app)
-
-# Simple in-memory cache for audio
-audio_cache = {}
+metrics.init_app(app)
 
 # Initialize Supabase client (optional - for audio caching)
 supabase_client = None
@@ -46,6 +71,21 @@ if SUPABASE_AVAILABLE:
             print(f"⚠️  Supabase initialization failed: {e}")
             print("   Audio will fall back to on-demand generation")
 
+# Access-frequency tracking: counts are batched in memory and flushed periodically
+# (to Supabase usage_stats when configured, otherwise to a local JSON file)
+usage_sinks = [SupabaseUsageSink(supabase_client)] if supabase_client else [
+    JSONFileUsageSink(os.getenv('USAGE_STATS_PATH', os.path.join(os.path.dirname(__file__), 'data', 'usage_stats.json')))
+]
+access_tracker = AccessTracker(usage_sinks, flush_interval=float(os.getenv('USAGE_STATS_FLUSH_INTERVAL', '30')))
+
+# In-memory audio cache keyed by canonical_tailo() (variants: '<key>|<variant>'),
+# bounded in size; the least frequently played clips are evicted first
+audio_cache = AudioMemoryCache(
+    max_bytes=int(float(os.getenv('AUDIO_MEMORY_CACHE_MB', '64')) * 1024 * 1024),
+    frequency=lambda key: access_tracker.frequency('audio', key.split('|', 1)[0])
+)
+variant_stats = VariantStats()
+
 # Character variant mapping (Mandarin → Taiwanese variants)
 CHAR_VARIANTS = {
     '腳': '跤',  # foot/leg
@@ -176,6 +216,7 @@ except Exception as e:
     moe_dict = {}
     moe_data = []
 
+@metrics.timed('definition_search')
 def search_in_definitions(search_text):
     """Search for a word in MOE dictionary definitions and return the entry's romanization"""
     for entry in moe_data:
@@ -198,7 +239,7 @@ def search_in_definitions(search_text):
 
     return None, None
 
-# Common phrases to pre-cache
+# Common phrases to warm first on startup
 COMMON_PHRASES = [
     'Lí hó',           # Hello
     'To-siā',          # Thank you
@@ -213,32 +254,10 @@ COMMON_PHRASES = [
     'Tsá-tǹg'          # Breakfast
 ]
 
-def pre_cache_audio():
-    """Pre-cache audio for common phrases on startup"""
-    import urllib.request
-    import urllib.parse
-
-    print("\n🎵 Pre-caching audio for common phrases...")
-    cached_count = 0
-
-    for phrase in COMMON_PHRASES:
-        try:
-            audio_url = f"https://hapsing.ithuan.tw/bangtsam?taibun={urllib.parse.quote(phrase)}"
-            print(f"  Caching: {phrase}...", end=' ')
-            response = urllib.request.urlopen(audio_url, timeout=20)
-            audio_data = response.read()
-            audio_cache[phrase] = audio_data
-            cached_count += 1
-            print(f"✓ ({len(audio_data)} bytes)")
-        except Exception as e:
-            print(f"✗ Failed: {e}")
-
-    print(f"✅ Pre-cached {cached_count}/{len(COMMON_PHRASES)} phrases\n")
-
 # Initialize Anthropic client
 anthropic_api_key = os.getenv('ANTHROPIC_API_KEY')
 if anthropic_api_key:
-    anthropic_client = Anthropic(api_key=anthropic_api_key)
+    anthropic_client = metrics.InstrumentedAnthropic(Anthropic(api_key=anthropic_api_key))
 else:
     anthropic_client = None
     print("WARNING: ANTHROPIC_API_KEY not set. English translation will not work.")
@@ -424,6 +443,15 @@ Options:
 
     return None
 
+@metrics.timed('dictionary_lookup')
+def lookup_heteronyms(title):
+    """Heteronyms of a dictionary title from the full MOE data (linear scan), or None"""
+    for entry in moe_data:
+        if entry.get('title') == title:
+            return entry.get('heteronyms', [])
+    return None
+
+@metrics.timed('word_romanization')
 def get_taiwanese_romanization(taiwanese_text, sentence_context=None):
     """
     Get Taiwanese Tâi-lô romanization using MOE dictionary first, then Tau-Phah-Ji as fallback
@@ -432,11 +460,7 @@ def get_taiwanese_romanization(taiwanese_text, sentence_context=None):
     # Try MOE dictionary first (exact match)
     if taiwanese_text in moe_dict:
         # Check if word has multiple heteronyms in full MOE data
-        heteronyms = None
-        for entry in moe_data:
-            if entry.get('title') == taiwanese_text:
-                heteronyms = entry.get('heteronyms', [])
-                break
+        heteronyms = lookup_heteronyms(taiwanese_text)
 
         # If multiple heteronyms and we have sentence context, disambiguate with Claude
         if heteronyms and len(heteronyms) > 1 and sentence_context:
@@ -476,6 +500,7 @@ def get_taiwanese_romanization(taiwanese_text, sentence_context=None):
         print(f"⚠️  Tau-Phah-Ji failed: {e}")
         return '', normalized_text
 
+@metrics.timed('segmentation')
 def romanize_sentence_with_word_lookup(sentence):
     """
     Romanize a sentence by trying to look up individual words in MOE dict first,
@@ -725,6 +750,11 @@ def romanize():
                 'kip': kip_romanization
             }
 
+        access_tracker.record('romanize', response_data['hanCharacters'])
+
+        # Warm the audio the learner will most likely play next
+        prefetch_audio(response_data['romanization'], priority=PRIORITY_HIGH)
+
         print(f"Returning response: {response_data}")
         return jsonify(response_data)
 
@@ -842,6 +872,8 @@ Output ONLY the three lines (MANDARIN, TAIWANESE, PINYIN)."""
                     'hanCharacters': han_characters,
                     'kip': kip_romanization
                 }
+                access_tracker.record('romanize', final_data['hanCharacters'])
+                prefetch_audio(final_data['romanization'], priority=PRIORITY_HIGH)
                 yield f"data: {json.dumps(final_data)}\n\n"
 
             elif source_language == 'mandarin':
@@ -871,6 +903,8 @@ Output ONLY the three lines (MANDARIN, TAIWANESE, PINYIN)."""
                     'hanCharacters': han_characters,
                     'kip': kip_romanization
                 }
+                access_tracker.record('romanize', final_data['hanCharacters'])
+                prefetch_audio(final_data['romanization'], priority=PRIORITY_HIGH)
                 yield f"data: {json.dumps(final_data)}\n\n"
 
             else:
@@ -911,6 +945,8 @@ Provide ONLY the English translation, with no explanations or additional text. J
                     'hanCharacters': han_characters,
                     'kip': kip_romanization
                 }
+                access_tracker.record('romanize', final_data['hanCharacters'])
+                prefetch_audio(final_data['romanization'], priority=PRIORITY_HIGH)
                 yield f"data: {json.dumps(final_data)}\n\n"
 
         except Exception as e:
@@ -958,11 +994,364 @@ def translate():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def supabase_audio_url(storage_path):
+    """Public Supabase Storage URL of a cached clip"""
+    return f"{os.getenv('SUPABASE_URL')}/storage/v1/object/public/taiwanese-audio/{storage_path}"
+
+@metrics.timed('supabase.fetch_audio')
+def fetch_audio_from_supabase(taibun):
+    """Look up taibun in the Supabase cache and download it; returns None if not cached"""
+    result = supabase_client.table('audio_cache').select('storage_path').eq('tailo_text', canonical_tailo(taibun)).execute()
+    if not result.data:
+        return None
+
+    return http_pool.get(supabase_audio_url(result.data[0]['storage_path']), read_timeout=10)
+
+@metrics.timed('supabase.store_audio')
+def store_audio_in_supabase(taibun, audio_data):
+    """Upload a complete clip to Supabase Storage and record it in audio_cache"""
+    storage_path = audio_storage_path(taibun)
+    try:
+        supabase_client.storage.from_('taiwanese-audio').upload(
+            storage_path,
+            audio_data,
+            file_options={'content-type': 'audio/mpeg', 'upsert': 'true'}
+        )
+        supabase_client.table('audio_cache').upsert({
+            'tailo_text': canonical_tailo(taibun),
+            'storage_path': storage_path,
+            'file_size': len(audio_data)
+        }, on_conflict='tailo_text').execute()
+        print(f"  ☁️  Stored in Supabase cache: {taibun}")
+    except Exception as e:
+        print(f"⚠️  Supabase write-back failed for {taibun}: {e}")
+
+def relay_audio_stream(taibun, upstream):
+    """
+    Yield Hapsing audio chunks to the client while buffering them for the cache.
+    Only a complete, valid body is cached: a client disconnect, an upstream error
+    or a short read leaves every cache tier untouched.
+    """
+    chunks = []
+    complete = False
+    try:
+        for chunk in upstream.iter_chunks():
+            chunks.append(chunk)
+            yield chunk
+        complete = True
+    finally:
+        if not complete:
+            upstream.close()
+            print(f"⚠️  Audio stream for {taibun} ended early, not caching partial download")
+
+    audio_data = b''.join(chunks)
+    expected_length = upstream.content_length
+    if expected_length is not None and len(audio_data) != expected_length:
+        print(f"⚠️  Short read for {taibun} ({len(audio_data)}/{expected_length} bytes), not caching")
+        return
+    if not hapsing.looks_like_mp3(audio_data):
+        print(f"⚠️  Hapsing returned non-MP3 data for {taibun}, not caching")
+        hapsing.record_bad_response(taibun, 'non-MP3 response')
+        return
+
+    print(f"✓ Streamed {len(audio_data)} bytes from Hapsing API")
+
+    # Cache in memory
+    audio_cache[canonical_tailo(taibun)] = audio_data
+    print(f"  Cached in memory ({len(audio_cache)} entries)")
+
+    # Write back to Supabase without holding up the response
+    if supabase_client:
+        threading.Thread(target=store_audio_in_supabase, args=(taibun, audio_data), daemon=True).start()
+
+def load_audio(taibun, interactive=False, deadline=None):
+    """
+    Get audio for taibun through the same tiers as /api/audio, without streaming:
+    memory → Supabase → Hapsing (written back to Supabase)
+    Interactive (user-facing) fetches are hedged and bounded by deadline
+    Returns (audio_data, tier)
+    """
+    key = canonical_tailo(taibun)
+    audio_data = audio_cache.get(key)
+    if audio_data is not None:
+        metrics.audio_load('memory')
+        return audio_data, 'memory'
+
+    if supabase_client:
+        try:
+            audio_data = fetch_audio_from_supabase(taibun)
+            if audio_data is not None:
+                audio_cache[key] = audio_data
+                metrics.audio_load('supabase')
+                return audio_data, 'supabase'
+        except Exception as e:
+            print(f"⚠️  Supabase lookup failed: {e}")
+
+    with metrics.timed('hapsing.fetch'):
+        if interactive:
+            audio_data = hapsing.fetch_audio_hedged(taibun, timeout=20, deadline=deadline)
+        else:
+            audio_data = hapsing.fetch_audio(taibun, timeout=20)
+    if not hapsing.looks_like_mp3(audio_data):
+        hapsing.record_bad_response(taibun, 'non-MP3 response')
+        raise ValueError(f"Hapsing returned non-MP3 data ({len(audio_data)} bytes)")
+
+    audio_cache[key] = audio_data
+    metrics.audio_load('hapsing')
+    # Write back to Supabase without holding up the caller (e.g. a streaming chunk)
+    if supabase_client:
+        threading.Thread(target=store_audio_in_supabase, args=(taibun, audio_data), daemon=True).start()
+    return audio_data, 'hapsing'
+
+def ensure_audio_cached(taibun):
+    """Make sure audio for taibun is in the in-memory cache (background prefetch/warmup); returns the tier"""
+    _, tier = load_audio(taibun)
+    return tier
+
+# Background audio prefetch: warm the cache for romanizations the learner is about to play
+AUDIO_PREFETCH_ENABLED = os.getenv('AUDIO_PREFETCH_ENABLED', 'true').lower() != 'false'
+audio_prefetcher = AudioPrefetcher(
+    fetch=ensure_audio_cached,
+    is_cached=lambda taibun: canonical_tailo(taibun) in audio_cache,
+    workers=int(os.getenv('AUDIO_PREFETCH_WORKERS', '2')),
+    max_queue=int(os.getenv('AUDIO_PREFETCH_QUEUE_SIZE', '200')),
+    rate=float(os.getenv('AUDIO_PREFETCH_RATE', '0.5')),  # Hapsing requests per second
+)
+
+def prefetch_audio(*tailo_texts, priority=PRIORITY_NORMAL):
+    """Queue Tâi-lô strings from a response for background audio prefetch"""
+    if not AUDIO_PREFETCH_ENABLED:
+        return
+    for tailo in tailo_texts:
+        if tailo and canonical_tailo(tailo) not in audio_cache:
+            audio_prefetcher.enqueue(tailo, priority)
+
+@metrics.timed('audio.lookup_cached_clips')
+def lookup_cached_clips(texts):
+    """
+    Cached audio for several Tâi-lô strings without calling Hapsing: {text: bytes}
+    Memory first, then one batched Supabase query for the rest
+    """
+    found = {}
+    missing = {}
+    for text in texts:
+        key = canonical_tailo(text)
+        audio_data = audio_cache.get(key)
+        if audio_data is not None:
+            found[text] = audio_data
+        else:
+            missing.setdefault(key, []).append(text)
+
+    if missing and supabase_client:
+        try:
+            result = supabase_client.table('audio_cache').select('tailo_text, storage_path') \
+                .in_('tailo_text', list(missing)).execute()
+            for row in result.data:
+                audio_data = http_pool.get(supabase_audio_url(row['storage_path']), read_timeout=10)
+                audio_cache[row['tailo_text']] = audio_data
+                for text in missing.get(row['tailo_text'], []):
+                    found[text] = audio_data
+        except Exception as e:
+            print(f"⚠️  Supabase batch lookup failed: {e}")
+
+    return found
+
+# Sentence assembly from cached word clips (instant, lower quality than full synthesis)
+AUDIO_ASSEMBLY_ENABLED = os.getenv('AUDIO_ASSEMBLY_ENABLED', 'false').lower() == 'true'
+AUDIO_ASSEMBLY_GAP_MS = int(os.getenv('AUDIO_ASSEMBLY_GAP_MS', '120'))
+
+def warm_audio(taibun):
+    """Warmup fetch: cache taibun and return the clip size in bytes"""
+    audio_data, _ = load_audio(taibun)
+    return len(audio_data)
+
+# End-to-end budget for /api/audio to start responding on a cache miss (seconds)
+AUDIO_DEADLINE = float(os.getenv('AUDIO_DEADLINE', '25'))
+
+# Long inputs are split into phrase chunks synthesized concurrently (0 disables)
+AUDIO_CHUNK_MAX_SYLLABLES = int(os.getenv('AUDIO_CHUNK_MAX_SYLLABLES', '12'))
+AUDIO_CHUNK_GAP_MS = int(os.getenv('AUDIO_CHUNK_GAP_MS', '150'))
+# Concurrency is also capped per host by the HTTP pool (HTTP_MAX_PER_HOST).
+# Interactive chunks get their own pool; lesson bundle builds use at most half
+# the host's connections, so a cold lesson cannot starve a learner's sentence
+synthesis_executor = ThreadPoolExecutor(max_workers=http_pool.max_per_host, thread_name_prefix='audio-chunk')
+lesson_audio_executor = ThreadPoolExecutor(max_workers=max(1, http_pool.max_per_host // 2),
+                                           thread_name_prefix='lesson-audio')
+
+def stream_chunked_audio(taibun, futures):
+    """
+    Yield chunk audio in order as each chunk's synthesis completes, joined at frame
+    boundaries; the whole sentence is cached in memory once every chunk has arrived
+    """
+    clips = []
+
+    def completed_clips():
+        for future in futures:
+            audio_data, _ = future.result()
+            clips.append(audio_data)
+            yield audio_data
+
+    try:
+        yield from stitch_clips(completed_clips(), gap_ms=AUDIO_CHUNK_GAP_MS)
+    except Exception as e:
+        # Headers are already sent; end the response and leave the sentence uncached
+        print(f"❌ Chunked synthesis failed for {taibun}: {e}")
+        for future in futures:
+            future.cancel()
+        return
+
+    audio_cache[canonical_tailo(taibun)] = b''.join(stitch_clips(clips, gap_ms=AUDIO_CHUNK_GAP_MS))
+    print(f"✓ Cached chunked audio: {taibun} ({len(clips)} chunks)")
+
+# Startup warmup: common phrases first, then priority_entries.json tiers, within a budget
+AUDIO_WARMUP_ENABLED = os.getenv('AUDIO_WARMUP_ENABLED', 'true').lower() != 'false'
+AUDIO_WARMUP_TIERS = tuple(int(t) for t in os.getenv('AUDIO_WARMUP_TIERS', '1').split(',') if t.strip())
+audio_warmup = AudioWarmup(
+    fetch=warm_audio,
+    sources=[
+        COMMON_PHRASES,
+        priority_entries_source(
+            os.path.join(os.path.dirname(__file__), 'data', 'priority_entries.json'),
+            tiers=AUDIO_WARMUP_TIERS
+        ),
+    ],
+    workers=int(os.getenv('AUDIO_WARMUP_WORKERS', '4')),
+    time_budget=float(os.getenv('AUDIO_WARMUP_TIME_BUDGET', '120')),
+    byte_budget=int(float(os.getenv('AUDIO_WARMUP_BYTE_BUDGET_MB', '20')) * 1024 * 1024),
+)
+
+def audio_etag(taibun, variant=ORIGINAL):
+    """ETag of a clip: canonical key and recipe version, so a rebuilt clip is refetched"""
+    suffix = '' if variant == ORIGINAL else f'.{variant}'
+    return f'"{audio_cache_key(taibun)}.r{RECIPE_VERSION}{suffix}"'
+
+@metrics.timed('supabase.store_variant')
+def store_variant_in_supabase(taibun, variant, audio_data):
+    """Upload a transcoded variant next to the original clip (no audio_cache row)"""
+    try:
+        supabase_client.storage.from_('taiwanese-audio').upload(
+            variant_storage_path(taibun, variant),
+            audio_data,
+            file_options={'content-type': VARIANTS[variant]['mimetype'], 'upsert': 'true'}
+        )
+    except Exception as e:
+        print(f"⚠️  Supabase variant write-back failed for {taibun} ({variant}): {e}")
+
+def load_audio_variant(taibun, variant, deadline=None):
+    """
+    Compact variant of taibun's audio: memory → Supabase → transcoded from the
+    original on first fetch (and stored back)
+    Returns (audio_data, original size if known)
+    """
+    key = canonical_tailo(taibun)
+    memory_key = variant_memory_key(key, variant)
+    original = audio_cache.get(key)
+
+    audio_data = audio_cache.get(memory_key)
+    if audio_data is not None:
+        return audio_data, len(original) if original else None
+
+    if supabase_client:
+        try:
+            audio_data = http_pool.get(supabase_audio_url(variant_storage_path(taibun, variant)), read_timeout=10)
+            audio_cache[memory_key] = audio_data
+            return audio_data, len(original) if original else None
+        except HTTPStatusError as e:
+            if e.status not in (400, 404):
+                print(f"⚠️  Supabase variant lookup failed: {e}")
+        except Exception as e:
+            print(f"⚠️  Supabase variant lookup failed: {e}")
+
+    if original is None:
+        original, _ = load_audio(taibun, interactive=True, deadline=deadline)
+    started = time.monotonic()
+    audio_data = transcode(original, variant)
+    variant_stats.record_transcode(variant, started)
+    print(f"🎚️  Transcoded {taibun} to {variant}: {len(original)} → {len(audio_data)} bytes")
+
+    audio_cache[memory_key] = audio_data
+    if supabase_client:
+        threading.Thread(target=store_variant_in_supabase, args=(taibun, variant, audio_data), daemon=True).start()
+    return audio_data, len(original)
+
+# Upper bound on texts per /api/audio/resolve request
+AUDIO_RESOLVE_MAX_TEXTS = 500
+
+@metrics.timed('audio.resolve')
+def resolve_audio(texts):
+    """
+    Where each Tâi-lô string's audio is cached, without downloading anything:
+    {canonical key: {'tier': 'memory' | 'supabase' | None, 'storage_path': ...}}
+    Memory first, then batched Supabase queries for the rest
+    """
+    resolved = {}
+    for text in texts:
+        key = canonical_tailo(text)
+        if key not in resolved:
+            resolved[key] = {'tier': 'memory' if key in audio_cache else None, 'storage_path': None}
+
+    if supabase_client:
+        # Supabase paths are reported for memory hits too, so clients get a direct URL
+        keys = list(resolved)
+        try:
+            for start in range(0, len(keys), 100):
+                result = supabase_client.table('audio_cache').select('tailo_text, storage_path') \
+                    .in_('tailo_text', keys[start:start + 100]).execute()
+                for row in result.data:
+                    entry = resolved.get(row['tailo_text'])
+                    if entry is not None:
+                        entry['storage_path'] = row['storage_path']
+                        entry['tier'] = entry['tier'] or 'supabase'
+        except Exception as e:
+            print(f"⚠️  Supabase batch lookup failed: {e}")
+    return resolved
+
+@app.route('/api/audio/resolve', methods=['POST'])
+def resolve_audio_batch():
+    """
+    Bulk cache lookup for many Tâi-lô strings in one round trip
+    Body: {"texts": [...]}; returns for each text its canonical key, whether it is
+    cached and in which tier, a URL to fetch it from and its ETag (same as /api/audio)
+    """
+    try:
+        data = request.json or {}
+        texts = data.get('texts')
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return jsonify({'error': 'texts must be a list of strings'}), 400
+        if len(texts) > AUDIO_RESOLVE_MAX_TEXTS:
+            return jsonify({'error': f'At most {AUDIO_RESOLVE_MAX_TEXTS} texts per request'}), 400
+
+        resolved = resolve_audio(texts)
+        results = []
+        for text in texts:
+            key = canonical_tailo(text)
+            entry = resolved[key]
+            results.append({
+                'text': text,
+                'key': key,
+                'cached': entry['tier'] is not None,
+                'tier': entry['tier'],
+                'url': supabase_audio_url(entry['storage_path']) if entry['storage_path']
+                else f"/api/audio?taibun={urllib.parse.quote(text)}",
+                'etag': audio_etag(text),
+            })
+
+        cached = sum(1 for r in results if r['cached'])
+        print(f"🔎 Resolved {len(results)} audio texts: {cached} cached, {len(results) - cached} missing")
+        return jsonify({'results': results, 'cached': cached, 'missing': len(results) - cached})
+
+    except Exception as e:
+        print(f"❌ Error resolving audio: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/audio', methods=['GET'])
 def get_audio():
     """
     Get audio for Taiwanese text
-    Priority: In-memory cache → Supabase cache → Hapsing API
+    Priority: In-memory cache → Supabase cache → (optional) assembled from cached
+    word clips → parallel phrase chunks (long input) → Hapsing API (streamed)
+    Query params: taibun (required), assemble=1/0 (overrides AUDIO_ASSEMBLY_ENABLED),
+    quality=low|opus|mp3-small|original (compact variant; also chosen when Accept lists audio/webm)
     """
     try:
         taibun = request.args.get('taibun', '')
@@ -970,54 +1359,226 @@ def get_audio():
         if not taibun:
             return jsonify({'error': 'No taibun parameter provided'}), 400
 
+        # Every tier is keyed by the canonical form, so spelling variants share one clip
+        key = canonical_tailo(taibun)
+        access_tracker.record('audio', key)
+        # Uncached audio must start within AUDIO_DEADLINE or the client gets a retriable 503
+        deadline = deadline_after(AUDIO_DEADLINE)
+
+        started = time.monotonic()
+
+        # Compact variant (Opus / small MP3) when asked for via quality or Accept
+        variant = choose_variant(request.args.get('quality'), request.headers.get('Accept'))
+        if variant != ORIGINAL:
+            etag = audio_etag(taibun, variant)
+            if request.headers.get('If-None-Match') == etag:
+                return Response(status=304, headers={'ETag': etag, 'Vary': 'Accept'})
+            try:
+                audio_data, original_size = load_audio_variant(taibun, variant, deadline)
+                variant_stats.record_served(variant, len(audio_data), started, original_size)
+                metrics.audio_tier(f'variant.{variant}')
+                return Response(audio_data, mimetype=VARIANTS[variant]['mimetype'], headers={
+                    'ETag': etag, 'Vary': 'Accept', 'X-Audio-Variant': variant
+                })
+            except RuntimeError as e:
+                print(f"⚠️  {variant} variant unavailable for {taibun}, serving original: {e}")
+
+        # A clip is identified by its canonical key (same ETag as /api/audio/resolve)
+        etag = audio_etag(taibun)
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=304, headers={'ETag': etag})
+
         # 1. Check in-memory cache first (fastest)
-        if taibun in audio_cache:
+        audio_data = audio_cache.get(key)
+        if audio_data is not None:
             print(f"✓ Returning in-memory cached audio for: {taibun}")
-            return Response(audio_cache[taibun], mimetype='audio/mpeg')
+            metrics.audio_tier('memory')
+            variant_stats.record_served(ORIGINAL, len(audio_data), started, len(audio_data))
+            return Response(audio_data, mimetype='audio/mpeg', headers={'ETag': etag, 'Vary': 'Accept'})
 
         # 2. Check Supabase cache (fast)
         if supabase_client:
             try:
-                result = supabase_client.table('audio_cache').select('storage_path').eq('tailo_text', taibun).execute()
-                if result.data and len(result.data) > 0:
-                    storage_path = result.data[0]['storage_path']
-                    supabase_url = os.getenv('SUPABASE_URL')
-                    audio_url = f"{supabase_url}/storage/v1/object/public/taiwanese-audio/{storage_path}"
+                audio_data = fetch_audio_from_supabase(taibun)
+                if audio_data is not None:
                     print(f"✓ Found in Supabase cache: {taibun}")
-                    print(f"  Redirecting to: {audio_url}")
+                    metrics.audio_tier('supabase')
 
-                    # Fetch and cache in memory for next time
-                    import urllib.request
-                    response = urllib.request.urlopen(audio_url, timeout=10)
-                    audio_data = response.read()
-                    audio_cache[taibun] = audio_data
+                    # Cache in memory for next time
+                    audio_cache[key] = audio_data
 
-                    return Response(audio_data, mimetype='audio/mpeg')
+                    variant_stats.record_served(ORIGINAL, len(audio_data), started, len(audio_data))
+                    return Response(audio_data, mimetype='audio/mpeg', headers={'ETag': etag, 'Vary': 'Accept'})
             except Exception as e:
                 print(f"⚠️  Supabase lookup failed: {e}")
                 # Continue to Hapsing API fallback
 
-        # 3. Fetch from Hapsing API (slow, 10-20s first time)
-        print(f"⏳ Fetching from Hapsing API: {taibun}")
-        import urllib.request
-        audio_url = f"https://hapsing.ithuan.tw/bangtsam?taibun={urllib.parse.quote(taibun)}"
+        # 3. Optionally assemble the sentence from cached word/syllable clips;
+        # full Hapsing synthesis replaces it in the background
+        assemble = request.args.get('assemble')
+        if assemble == '1' or (assemble is None and AUDIO_ASSEMBLY_ENABLED):
+            audio_data = assemble_sentence(taibun, lookup_cached_clips, gap_ms=AUDIO_ASSEMBLY_GAP_MS)
+            if audio_data is not None:
+                print(f"🧩 Assembled audio from cached word clips: {taibun} ({len(audio_data)} bytes)")
+                metrics.audio_tier('assembled')
+                prefetch_audio(taibun, priority=PRIORITY_LOW)
+                return Response(audio_data, mimetype='audio/mpeg', headers={
+                    'X-Audio-Source': 'assembled',
+                    'Cache-Control': 'no-store'
+                })
+
+        # 4. Long input: synthesize phrase chunks in parallel (each cached on its own)
+        # and stream them in order, so playback starts after the first chunk
+        chunks = split_phrases(taibun, AUDIO_CHUNK_MAX_SYLLABLES) if AUDIO_CHUNK_MAX_SYLLABLES > 0 else []
+        if len(chunks) > 1:
+            print(f"✂️  Synthesizing {len(chunks)} chunks in parallel: {taibun}")
+            # Only the first chunk is held to the deadline; later ones stream after the headers
+            futures = [synthesis_executor.submit(metrics.bind(load_audio), chunk, True,
+                                                 deadline if index == 0 else None)
+                       for index, chunk in enumerate(chunks)]
+            # Wait for the first chunk here so a failure still returns a proper error
+            try:
+                futures[0].result(timeout=remaining(deadline))
+            except FutureTimeoutError:
+                for future in futures:
+                    future.cancel()
+                raise DeadlineExceeded(f"first of {len(chunks)} chunks not ready before deadline")
+            metrics.audio_tier('chunked')
+            return Response(stream_chunked_audio(taibun, futures),
+                            mimetype='audio/mpeg', headers={'X-Audio-Source': 'chunked'})
+
+        # 5. Stream from Hapsing API (slow, 10-20s first time)
+        # Chunks are relayed to the client as they arrive and teed into the cache tiers
+        print(f"⏳ Streaming from Hapsing API: {taibun}")
+        # Timed until the response headers arrive; the body is relayed with the request
+        with metrics.timed('hapsing.open_stream'):
+            upstream = hapsing.open_audio_stream_hedged(taibun, timeout=20, deadline=deadline)
+        metrics.audio_tier('hapsing')
+
+        headers = {'ETag': etag}
+        if upstream.content_length is not None:
+            headers['Content-Length'] = str(upstream.content_length)
+
+        return Response(relay_audio_stream(taibun, upstream), mimetype='audio/mpeg', headers=headers)
+
+    except DeadlineExceeded as e:
+        print(f"⏱️  Audio deadline exceeded for {taibun}: {e}")
+        return jsonify({'error': 'Audio synthesis is taking too long, please retry', 'retriable': True}), 503, {
+            'Retry-After': str(e.retry_after)
+        }
+    except CircuitOpenError as e:
+        print(f"⚡ Hapsing unavailable, failing fast for {taibun}: {e}")
+        return jsonify({'error': 'Audio service is temporarily unavailable, please retry', 'retriable': True}), 503, {
+            'Retry-After': str(e.retry_after)
+        }
+    except NegativeCacheHit as e:
+        print(f"⚡ Skipping Hapsing for recently failed input {taibun}: {e}")
+        if e.rejected:
+            return jsonify({'error': 'Audio could not be generated for this text', 'retriable': False}), 422
+        return jsonify({'error': 'Audio generation failed recently, please retry', 'retriable': True}), 503, {
+            'Retry-After': str(e.retry_after)
+        }
+    except Exception as e:
+        print(f"❌ Error fetching audio: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
 
-        response = urllib.request.urlopen(audio_url, timeout=20)
-        audio_data = response.read()
-        print(f"✓ Fetched {len(audio_data)} bytes from Hapsing API")
+def load_lesson_clips(texts, deadline=None):
+    """
+    Audio for many phrases through the normal tiers, fetched concurrently: {text: bytes}
+    Phrases not loaded by the deadline are left out; their fetches keep running
+    and land in the audio cache for the next build
+    """
+    futures = {text: lesson_audio_executor.submit(metrics.bind(load_audio), text) for text in texts}
+    clips = {}
+    late = 0
+    for text, future in futures.items():
+        try:
+            clips[text], _ = future.result(timeout=remaining(deadline))
+        except FutureTimeoutError:
+            late += 1
+        except Exception as e:
+            print(f"⚠️  No audio for lesson phrase {text}: {e}")
+    if late:
+        print(f"⏱️  {late} lesson phrases not ready before the deadline, still fetching")
+    return clips
+
+# Lesson id -> (manifest of its current audio bundle, expiry or None). Incomplete
+# bundles (clips missing) are reused for LESSON_BUNDLE_RETRY_AFTER seconds, then rebuilt
+lesson_bundles = {}
+LESSON_BUNDLE_RETRY_AFTER = float(os.getenv('LESSON_BUNDLE_RETRY_AFTER', '120'))
+# A cold build answers within this many seconds (well inside the gunicorn worker
+# timeout) with the clips it has; the rest are listed as missing
+LESSON_BUNDLE_BUILD_SECONDS = float(os.getenv('LESSON_BUNDLE_BUILD_SECONDS', '20'))
+# One build at a time per lesson: a cold lesson only holds up requests for itself
+lesson_bundle_locks = {}
+lesson_bundle_locks_lock = threading.Lock()
+
+def lesson_bundle_lock(lesson_id):
+    with lesson_bundle_locks_lock:
+        return lesson_bundle_locks.setdefault(lesson_id, threading.Lock())
+
+def current_lesson_bundle(lesson_id, phrases):
+    """Memoized, precomputed or freshly built bundle manifest for a lesson"""
+    current_hash = lesson_audio.phrases_hash(phrases)
+    with lesson_bundle_lock(lesson_id):
+        manifest, expires_at = lesson_bundles.get(lesson_id, (None, None))
+        if manifest is not None and manifest['phrases_hash'] == current_hash and \
+                (expires_at is None or time.monotonic() < expires_at):
+            return manifest
+
+        manifest = lesson_audio.load_saved_bundle(lesson_id, phrases)
+        if manifest is None:
+            print(f"📦 Building audio bundle for lesson {lesson_id} ({len(phrases)} phrases)")
+            deadline = deadline_after(LESSON_BUNDLE_BUILD_SECONDS)
+            manifest, sprite = lesson_audio.build_bundle(
+                lesson_id, phrases, lambda texts: load_lesson_clips(texts, deadline))
+            lesson_audio.save_bundle(manifest, sprite)
+            print(f"✓ Audio bundle {manifest['hash']}: {len(manifest['clips'])} clips, "
+                  f"{manifest['size']} bytes, {len(manifest['missing'])} missing")
+        expires_at = time.monotonic() + LESSON_BUNDLE_RETRY_AFTER if manifest['missing'] else None
+        lesson_bundles[lesson_id] = (manifest, expires_at)
+        return manifest
+
+@app.route('/api/lessons/<lesson_id>/audio-bundle', methods=['GET'])
+def get_lesson_audio_bundle(lesson_id):
+    """
+    Manifest of a lesson's audio sprite: one MP3 with every audio line of the
+    lesson plus time/byte offsets per romanization (sprite_url is immutable)
+    Precomputed bundles (scripts/build_lesson_audio_bundles.py) are served as is;
+    otherwise the bundle is built from the audio cache tiers on first request
+    """
+    try:
+        lesson_data = lesson_audio.load_lesson(lesson_id)
+        if lesson_data is None:
+            return jsonify({'error': f'Lesson not found: {lesson_id}'}), 404
+        manifest = current_lesson_bundle(lesson_id, lesson_audio.lesson_phrases(lesson_data))
 
-        # Cache in memory
-        audio_cache[taibun] = audio_data
-        print(f"  Cached in memory ({len(audio_cache)} entries)")
+        etag = f'"{manifest["hash"]}"'
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=304, headers={'ETag': etag})
 
-        return Response(audio_data, mimetype='audio/mpeg')
+        response = jsonify(dict(manifest, sprite_url=f"/api/lessons/audio-bundles/{manifest['hash']}.mp3"))
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
 
     except Exception as e:
-        print(f"❌ Error fetching audio: {str(e)}")
+        print(f"❌ Error building lesson audio bundle: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/lessons/audio-bundles/<bundle_hash>.mp3', methods=['GET'])
+def get_lesson_audio_sprite(bundle_hash):
+    """Lesson audio sprite by content hash (never changes, cacheable forever)"""
+    if not re.fullmatch(r'[0-9a-f]{24}', bundle_hash) or not lesson_audio.sprite_path(bundle_hash).exists():
+        return jsonify({'error': 'Audio bundle not found'}), 404
+    response = send_from_directory(lesson_audio.BUNDLES_DIR, f'{bundle_hash}.mp3', mimetype='audio/mpeg')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 @app.route('/api/generate-vocab', methods=['POST'])
 def generate_vocab():
     """
@@ -1294,6 +1855,10 @@ Now generate a complete module for "{theme}". Make the dialogue realistic and na
             line['tailo'] = tailo
             print(f"    Romanization: {tailo}")
 
+        # Warm vocabulary and dialogue audio while the learner reads the module
+        prefetch_audio(*[word['tailo'] for word in module['vocabulary']])
+        prefetch_audio(*[line['tailo'] for line in module['dialogue']])
+
         return jsonify({
             'success': True,
             'module': module
@@ -1475,6 +2040,10 @@ Now generate a complete module for "{theme}". Make the dialogue realistic and na
                 # Send progress update
                 yield f"data: {json.dumps({'type': 'progress', 'vocab_current': vocab_total, 'vocab_total': vocab_total, 'dialogue_current': idx, 'dialogue_total': dialogue_total})}\n\n"
 
+            # Warm vocabulary and dialogue audio while the learner reads the module
+            prefetch_audio(*[word['tailo'] for word in module['vocabulary']])
+            prefetch_audio(*[line['tailo'] for line in module['dialogue']])
+
             # Send complete module
             yield f"data: {json.dumps({'type': 'complete', 'module': module})}\n\n"
 
@@ -1485,7 +2054,64 @@ Now generate a complete module for "{theme}". Make the dialogue realistic and na
 
 @app.route('/api/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'ok', 'message': 'Flask backend is running'})
+    return jsonify({
+        'status': 'ok',
+        'message': 'Flask backend is running',
+        'audio_warmup': audio_warmup.status()
+    })
+
+@app.route('/api/health/ready', methods=['GET'])
+def health_ready():
+    """Readiness probe: 200 once the audio warmup has finished (or is disabled), 503 before"""
+    ready = audio_warmup.ready or not AUDIO_WARMUP_ENABLED
+    status_code = 200 if ready else 503
+    return jsonify({'ready': ready, 'audio_warmup': audio_warmup.status()}), status_code
+
+@app.route('/api/stats', methods=['GET'])
+def stats():
+    """Runtime statistics: outbound connections, Hapsing hedging/circuit breaker, audio cache, prefetch queue and access tracking"""
+    return jsonify({
+        'http': http_pool.stats(),
+        'hapsing': hapsing.stats(),
+        'audio_variants': variant_stats.stats(),
+        'audio_cache': audio_cache.stats(),
+        'audio_prefetch': audio_prefetcher.stats(),
+        'access_stats': access_tracker.stats()
+    })
+
+@metrics.collector
+def hapsing_metrics():
+    """Hedging, deadline, circuit breaker and negative cache counters of the Hapsing client"""
+    stats = hapsing.stats()
+    hedging, circuit, negative = stats['hedging'], stats['circuit'], stats['negative_cache']
+    samples = [
+        ('taigi_hapsing_calls_total', 'counter', 'Hapsing calls made through the hedger', {}, hedging['calls']),
+        ('taigi_hapsing_hedged_total', 'counter', 'Hapsing calls that sent a hedge request', {}, hedging['hedged']),
+        ('taigi_hapsing_hedge_wins_total', 'counter', 'Hedged calls answered by the hedge request', {},
+         hedging['hedge_wins']),
+        ('taigi_hapsing_hedges_skipped_total', 'counter', 'Hedges not sent because of the hedge budget', {},
+         hedging['hedges_skipped']),
+        ('taigi_hapsing_deadline_exceeded_total', 'counter', 'Hapsing calls that ran past their deadline', {},
+         hedging['deadline_exceeded']),
+        ('taigi_hapsing_hedge_delay_seconds', 'gauge', 'Current adaptive hedge delay', {}, hedging['hedge_delay']),
+        ('taigi_hapsing_circuit_opened_total', 'counter', 'Times the Hapsing circuit opened', {}, circuit['opened']),
+        ('taigi_hapsing_circuit_rejected_total', 'counter', 'Calls failed fast by the open circuit', {},
+         circuit['rejected']),
+        ('taigi_hapsing_circuit_failures_total', 'counter', 'Hapsing calls recorded as failures', {},
+         circuit['failures']),
+        ('taigi_hapsing_negative_cache_hits_total', 'counter', 'Calls answered from the negative cache', {},
+         negative['hits']),
+        ('taigi_hapsing_negative_cache_entries', 'gauge', 'Inputs currently in the negative cache', {},
+         negative['entries']),
+    ]
+    samples += [('taigi_hapsing_circuit_state', 'gauge', 'Hapsing circuit state (1 for the current one)',
+                 {'state': state}, int(circuit['state'] == state)) for state in ('closed', 'half_open', 'open')]
+    return samples
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Per-stage latency histograms and counters in Prometheus text format (see metrics.py)"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # Serve React app in production
 if IS_PRODUCTION:
@@ -1497,10 +2123,17 @@ if IS_PRODUCTION:
         else:
             return send_from_directory(app.static_folder, 'index.html')
 
+@app.before_request
+def start_background_services():
+    """
+    Start background work on the first request of each serving process
+    Not at import time: scripts and tests that import app.py never warm, and
+    under gunicorn (with or without --preload) every worker starts its own
+    threads after the fork. The readiness probe's first call starts it too.
+    """
+    if AUDIO_WARMUP_ENABLED:
+        audio_warmup.start()  # no-op once started
+
 if __name__ == '__main__':
     print("Starting Flask server on http://127.0.0.1:5001")
-
-    # Pre-cache common phrases for instant audio playback
-    pre_cache_audio()
-
     app.run(debug=True, host='127.0.0.1', port=5001)
@@ -0,0 +1,257 @@
+"""
+MP3 frame-level audio assembly
+Joins cached word/syllable clips into sentence audio at frame boundaries (no
+re-encoding), with short generated silences between words
+"""
+
+import re
+
+# Bitrates (kbps) by [version_group][layer] for index 1..14 (0 = free, 15 = bad)
+BITRATES = {
+    ('1', 1): [32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    ('1', 2): [32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    ('1', 3): [32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    ('2', 1): [32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    ('2', 2): [8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    ('2', 3): [8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+SAMPLE_RATES = {
+    '1': [44100, 48000, 32000],
+    '2': [22050, 24000, 16000],
+    '2.5': [11025, 12000, 8000],
+}
+
+VERSIONS = {0b00: '2.5', 0b10: '2', 0b11: '1'}
+LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+
+# Words are separated by whitespace; punctuation marks phrase breaks
+WORD_PUNCTUATION = '，。！？；：、,.!?;:"“”‘’()（）'
+
+
+def parse_frame_header(data, offset=0):
+    """Decode the 4-byte MPEG audio frame header at offset; returns None if it is not one"""
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset:offset + 4]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = VERSIONS.get((b1 >> 3) & 0b11)
+    layer = LAYERS.get((b1 >> 1) & 0b11)
+    bitrate_index = (b2 >> 4) & 0x0F
+    sample_rate_index = (b2 >> 2) & 0b11
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    group = '1' if version == '1' else '2'
+    bitrate = BITRATES[(group, layer)][bitrate_index - 1] * 1000
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 1
+    channel_mode = (b3 >> 6) & 0b11
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version != '1':
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    else:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+
+    return {
+        'version': version,
+        'layer': layer,
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'channels': 1 if channel_mode == 0b11 else 2,
+        'samples': samples,
+        'length': length,
+        'bytes': bytes(data[offset:offset + 4]),
+    }
+
+
+def strip_tags(data):
+    """Drop a leading ID3v2 tag and a trailing ID3v1 tag"""
+    start = 0
+    if data[:3] == b'ID3' and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        start = 10 + size + footer
+    end = len(data)
+    if end - start >= 128 and data[end - 128:end - 125] == b'TAG':
+        end -= 128
+    return data[start:end]
+
+
+def iter_frames(data):
+    """Yield (frame_bytes, header) for every MPEG frame; skips junk between frames"""
+    data = strip_tags(data)
+    offset = 0
+    while offset + 4 <= len(data):
+        header = parse_frame_header(data, offset)
+        if header is None or offset + header['length'] > len(data):
+            offset += 1
+            continue
+        yield data[offset:offset + header['length']], header
+        offset += header['length']
+
+
+def is_info_frame(frame):
+    """Xing/Info/VBRI frames carry encoder metadata (duration, TOC) for a single file, not audio"""
+    head = frame[:64]
+    return b'Xing' in head or b'Info' in head or b'VBRI' in head
+
+
+def audio_frames(data):
+    """Audio frames of a clip, without tags and metadata frames"""
+    return [(frame, header) for frame, header in iter_frames(data) if not is_info_frame(frame)]
+
+
+def duration_ms(data):
+    """Playback duration of an MP3 clip in milliseconds"""
+    total = 0.0
+    for _, header in audio_frames(data):
+        total += header['samples'] * 1000.0 / header['sample_rate']
+    return round(total)
+
+
+def silence(header, ms):
+    """
+    Silent frames matching header's format: no CRC, no padding, zeroed side info and
+    main data (decodes as digital silence)
+    """
+    b0, b1, b2, b3 = header['bytes']
+    b1 |= 0x01          # protection bit set = no CRC
+    b2 &= ~0x02         # no padding
+    template = parse_frame_header(bytes([b0, b1, b2, b3]))
+    frame = bytes([b0, b1, b2, b3]) + b'\x00' * (template['length'] - 4)
+
+    frame_ms = template['samples'] * 1000.0 / template['sample_rate']
+    return frame * max(1, round(ms / frame_ms))
+
+
+def concat_clips(clips, gap_ms=120):
+    """
+    Join MP3 clips at frame boundaries with gap_ms of silence between them
+    All clips must share sample rate and channel count (raises ValueError otherwise)
+    """
+    parts = []
+    first_header = None
+    for index, clip in enumerate(clips):
+        frames = audio_frames(clip)
+        if not frames:
+            raise ValueError(f"Clip {index} contains no MPEG audio frames")
+
+        for _, header in frames:
+            if first_header is None:
+                first_header = header
+            elif (header['sample_rate'], header['channels'], header['version'], header['layer']) != \
+                    (first_header['sample_rate'], first_header['channels'], first_header['version'], first_header['layer']):
+                raise ValueError(f"Clip {index} has a different MPEG format; cannot join without re-encoding")
+
+        if parts and gap_ms:
+            parts.append(silence(first_header, gap_ms))
+        parts.append(b''.join(frame for frame, _ in frames))
+
+    return b''.join(parts)
+
+
+def segment_tailo(tailo):
+    """
+    Split a Tâi-lô sentence into words: whitespace-separated, punctuation dropped
+    (romanize_sentence_with_word_lookup joins its dictionary segmentation with spaces,
+    so its output splits back into the same words)
+    """
+    cleaned = re.sub(f"[{re.escape(WORD_PUNCTUATION)}]", ' ', tailo)
+    return [word for word in cleaned.split() if word.strip('-')]
+
+
+def syllables(word):
+    """Syllables of a hyphenated Tâi-lô word (ta̍h-tshia → ['ta̍h', 'tshia'])"""
+    return [s for s in word.split('-') if s]
+
+
+def assemble_sentence(tailo, lookup, gap_ms=120, syllable_gap_ms=30):
+    """
+    Build sentence audio from cached clips.
+    lookup(texts) returns {text: bytes} for whichever of texts are cached.
+    Each word is taken whole if cached, otherwise from its syllables.
+    Returns None if any word cannot be covered (caller falls back to full synthesis).
+    """
+    words = segment_tailo(tailo)
+    if len(words) < 2:
+        return None
+
+    wanted = set(words)
+    for word in words:
+        wanted.update(syllables(word))
+    clips = lookup(sorted(wanted))
+
+    try:
+        word_audio = []
+        for word in words:
+            if word in clips:
+                word_audio.append(clips[word])
+                continue
+            parts = syllables(word)
+            if len(parts) < 2 or not all(part in clips for part in parts):
+                return None
+            word_audio.append(concat_clips([clips[part] for part in parts], gap_ms=syllable_gap_ms))
+
+        return concat_clips(word_audio, gap_ms=gap_ms)
+    except ValueError as e:
+        print(f"⚠️  Cannot assemble '{tailo}': {e}")
+        return None
+
+
+def split_phrases(tailo, max_syllables=12):
+    """
+    Split long Tâi-lô input into synthesis chunks: first at punctuation, then any
+    phrase longer than max_syllables at word boundaries into near-equal parts.
+    Punctuation is dropped so the same phrase maps to the same cached chunk in
+    every sentence it appears in. Input of at most max_syllables syllables in
+    total is one chunk, punctuation or not (one synthesis, one cache entry).
+    """
+    phrases = [p.split() for p in re.split(f"[{re.escape(WORD_PUNCTUATION)}]+", tailo)]
+    if sum(max(1, len(syllables(word))) for words in phrases for word in words) <= max_syllables:
+        return [tailo]
+    chunks = []
+    for words in phrases:
+        if not words:
+            continue
+        counts = [max(1, len(syllables(word))) for word in words]
+        total = sum(counts)
+        if total <= max_syllables:
+            chunks.append(' '.join(words))
+            continue
+
+        parts = -(-total // max_syllables)  # ceil
+        target = total / parts
+        next_cut = target
+        current, seen = [], 0
+        for word, count in zip(words, counts):
+            current.append(word)
+            seen += count
+            if seen >= next_cut - 0.5 and seen < total:
+                chunks.append(' '.join(current))
+                current = []
+                next_cut += target
+        if current:
+            chunks.append(' '.join(current))
+    return chunks
+
+
+def stitch_clips(clips, gap_ms=0):
+    """Yield each clip's audio frames (tags/metadata stripped) with optional silence between"""
+    first_header = None
+    for index, clip in enumerate(clips):
+        frames = audio_frames(clip)
+        if not frames:
+            continue
+        if first_header is None:
+            first_header = frames[0][1]
+        elif gap_ms:
+            yield silence(first_header, gap_ms)
+        yield b''.join(frame for frame, _ in frames)
@@ -0,0 +1,150 @@
+"""
+Budget-aware pre-generation planning
+Chooses which missing clips to generate within a storage budget (bytes) and a
+time budget (seconds of generation at the Hapsing rate limit) so that the
+generated set covers as much expected traffic as possible:
+  - size and synthesis time are estimated from the syllable count; the size model
+    is fitted to the clips already in audio_cache when there are enough of them
+  - expected demand is the recorded access count plus a prior from the entry's
+    score (lesson and drill phrases without a score get the maximum prior)
+  - entries are picked greedily by demand per unit of the scarcer budget
+"""
+
+import re
+
+from audio_assembly import syllables
+from audio_keys import canonical_tailo
+
+# Defaults for Hapsing MP3 output until there is data to fit
+DEFAULT_BASE_BYTES = 6000
+DEFAULT_BYTES_PER_SYLLABLE = 5000
+DEFAULT_BASE_SECONDS = 1.0
+DEFAULT_SECONDS_PER_SYLLABLE = 0.3
+MIN_FIT_SAMPLES = 20
+
+# Demand of an entry never requested = PRIOR_WEIGHT * score / 100
+PRIOR_WEIGHT = 1.0
+UNSCORED_PRIOR_SCORE = 100
+
+SIZE_UNITS = {'': 1, 'b': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3}
+TIME_UNITS = {'': 1, 's': 1, 'm': 60, 'min': 60, 'h': 3600}
+
+
+def parse_size(value):
+    """'500MB' / '1.5gb' / '20000' → bytes"""
+    match = re.fullmatch(r'\s*([\d.]+)\s*([a-zA-Z]*)\s*', str(value))
+    if not match or match.group(2).lower() not in SIZE_UNITS:
+        raise ValueError(f"invalid size: {value!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def parse_duration(value):
+    """'2h' / '90m' / '3600' → seconds"""
+    match = re.fullmatch(r'\s*([\d.]+)\s*([a-zA-Z]*)\s*', str(value))
+    if not match or match.group(2).lower() not in TIME_UNITS:
+        raise ValueError(f"invalid duration: {value!r}")
+    return float(match.group(1)) * TIME_UNITS[match.group(2).lower()]
+
+
+def syllable_count(text):
+    return max(1, sum(len(syllables(word)) for word in canonical_tailo(text).split()))
+
+
+class ClipModel:
+    """Linear size and synthesis-time estimates from the syllable count"""
+
+    def __init__(self, base_bytes=DEFAULT_BASE_BYTES, bytes_per_syllable=DEFAULT_BYTES_PER_SYLLABLE,
+                 base_seconds=DEFAULT_BASE_SECONDS, seconds_per_syllable=DEFAULT_SECONDS_PER_SYLLABLE):
+        self.base_bytes = base_bytes
+        self.bytes_per_syllable = bytes_per_syllable
+        self.base_seconds = base_seconds
+        self.seconds_per_syllable = seconds_per_syllable
+        self.fitted_on = 0
+
+    def fit_sizes(self, rows):
+        """Least-squares fit of file_size against syllables over audio_cache rows"""
+        points = [(syllable_count(row['tailo_text']), row['file_size']) for row in rows if row.get('file_size')]
+        if len(points) < MIN_FIT_SAMPLES:
+            return self
+        n = len(points)
+        mean_x = sum(x for x, _ in points) / n
+        mean_y = sum(y for _, y in points) / n
+        var_x = sum((x - mean_x) ** 2 for x, _ in points)
+        if var_x:
+            slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+            self.bytes_per_syllable = max(0.0, slope)
+        self.base_bytes = max(0.0, mean_y - self.bytes_per_syllable * mean_x)
+        self.fitted_on = n
+        return self
+
+    def bytes(self, text):
+        return int(self.base_bytes + self.bytes_per_syllable * syllable_count(text))
+
+    def latency(self, text):
+        return self.base_seconds + self.seconds_per_syllable * syllable_count(text)
+
+    def seconds(self, text, hapsing_rate, workers):
+        """Generation time a clip takes out of the run: rate limit or latency spread over workers"""
+        return max(1.0 / hapsing_rate, self.latency(text) / workers)
+
+    def describe(self):
+        return {
+            'base_bytes': round(self.base_bytes),
+            'bytes_per_syllable': round(self.bytes_per_syllable),
+            'base_seconds': self.base_seconds,
+            'seconds_per_syllable': self.seconds_per_syllable,
+            'fitted_on': self.fitted_on,
+        }
+
+
+def demand(entry, usage_counts):
+    """Expected requests for an entry: recorded accesses plus a score prior"""
+    score = entry.get('score')
+    prior = PRIOR_WEIGHT * (UNSCORED_PRIOR_SCORE if score is None else score) / 100
+    return usage_counts.get(entry['key'], 0) + prior
+
+
+def plan_budget(candidates, model, usage_counts, byte_budget=None, time_budget=None, hapsing_rate=1.0, workers=4):
+    """
+    Pick candidates (manifest entries not yet cached) within the budgets
+    Returns (chosen, totals); each chosen entry gets est_bytes, est_seconds and demand
+    """
+    scored = []
+    for entry in candidates:
+        est_bytes = model.bytes(entry['romanization'])
+        est_seconds = model.seconds(entry['romanization'], hapsing_rate, workers)
+        # Cost is the share of the scarcer budget the clip uses
+        cost = max(est_bytes / byte_budget if byte_budget else 0.0,
+                   est_seconds / time_budget if time_budget else 0.0)
+        value = demand(entry, usage_counts)
+        scored.append((value / cost if cost else value, value, est_bytes, est_seconds, entry))
+    scored.sort(key=lambda item: -item[0])
+
+    chosen = []
+    used_bytes = 0
+    used_seconds = 0.0
+    for _, value, est_bytes, est_seconds, entry in scored:
+        if byte_budget is not None and used_bytes + est_bytes > byte_budget:
+            continue
+        if time_budget is not None and used_seconds + est_seconds > time_budget:
+            continue
+        used_bytes += est_bytes
+        used_seconds += est_seconds
+        chosen.append(dict(entry, est_bytes=est_bytes, est_seconds=round(est_seconds, 2), demand=round(value, 3)))
+
+    totals = {
+        'candidates': len(candidates),
+        'chosen': len(chosen),
+        'est_bytes': used_bytes,
+        'est_seconds': round(used_seconds, 1),
+        'demand_chosen': round(sum(e['demand'] for e in chosen), 3),
+        'demand_candidates': round(sum(item[1] for item in scored), 3),
+    }
+    return chosen, totals
+
+
+def hit_rate(entries, keys, usage_counts):
+    """Share of expected demand over entries that falls on the given keys"""
+    total = sum(demand(entry, usage_counts) for entry in entries)
+    covered = sum(demand(entry, usage_counts) for entry in entries if entry['key'] in keys)
+    return covered / total if total else 0.0
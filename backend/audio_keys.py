@@ -0,0 +1,59 @@
+"""
+Canonical audio cache keys
+Every producer (app, generation scripts) and every lookup uses the same key for a
+Tâi-lô string, so a clip generated once is found everywhere.
+
+- canonical_tailo(): Unicode NFC, lowercase, hyphen variants → '-', whitespace
+  collapsed and removed around hyphens. Tone diacritics are kept: ta̍h ≠ tah.
+- audio_cache_key(): SHA-256 of the canonical text (hex, 32 chars)
+- audio_storage_path(): '<key>.mp3' object name in the taiwanese-audio bucket
+- RECIPE_VERSION: version of the synthesis recipe; derived objects (variants,
+  ETags) carry it so a rebuilt clip never reuses what was made from the old one
+- priority_tier(): tier (1-3) of a ranked dictionary entry from its score
+"""
+
+import hashlib
+import re
+import unicodedata
+
+# Hyphen look-alikes that show up in copied Tâi-lô text
+HYPHEN_VARIANTS = '‐‑‒–—―−﹣－'
+_HYPHEN_TABLE = str.maketrans({ch: '-' for ch in HYPHEN_VARIANTS})
+
+KEY_LENGTH = 32
+
+# Bump when the synthesis recipe changes (voice, encoding) to rebuild every clip
+RECIPE_VERSION = 1
+
+# Minimum priority score of tier 1 and tier 2 entries (rank_dictionary_entries.py)
+TIER_1_MIN_SCORE = 60
+TIER_2_MIN_SCORE = 40
+
+
+def canonical_tailo(text):
+    """Canonical form of a Tâi-lô string for cache lookups (tone-preserving)"""
+    text = unicodedata.normalize('NFC', text or '')
+    text = text.translate(_HYPHEN_TABLE).lower()
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = re.sub(r'\s*-\s*', '-', text)
+    text = re.sub(r'-{2,}', '-', text)
+    return text
+
+
+def audio_cache_key(text):
+    """Stable hash key for a Tâi-lô string"""
+    return hashlib.sha256(canonical_tailo(text).encode('utf-8')).hexdigest()[:KEY_LENGTH]
+
+
+def audio_storage_path(text):
+    """Object name for the clip in Supabase Storage"""
+    return f"{audio_cache_key(text)}.mp3"
+
+
+def priority_tier(score):
+    """Tier of a ranked dictionary entry: 1 (score >= 60), 2 (>= 40) or 3"""
+    if score >= TIER_1_MIN_SCORE:
+        return 1
+    elif score >= TIER_2_MIN_SCORE:
+        return 2
+    return 3
@@ -0,0 +1,146 @@
+"""
+Audio build manifest
+Collects every clip the app needs from its sources into one deduplicated manifest:
+  - lessons:     src/data/lessons/*.json (phrases marked `audio: true`), tier 1
+  - tone-sandhi: src/data/toneSandhiExercises.json (compounds and syllables), tier 2
+  - priority:    backend/data/priority_entries.json (ranked dictionary entries), tier by score
+Entries are keyed by canonical Tâi-lô; one text used by several sources keeps the
+best tier and score. Each entry carries a content hash of its synthesis recipe, so
+a build can tell new clips, clips whose recipe changed and clips that are up to date.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from audio_keys import RECIPE_VERSION, canonical_tailo, priority_tier
+from lesson_audio import LESSONS_DIR, lesson_phrases
+
+TONE_SANDHI_FILE = Path(__file__).parent.parent / 'src' / 'data' / 'toneSandhiExercises.json'
+PRIORITY_FILE = Path(__file__).parent / 'data' / 'priority_entries.json'
+MANIFEST_FILE = Path(__file__).parent / 'data' / 'audio_manifest.json'
+BUILD_STATE_FILE = Path(__file__).parent / 'data' / 'audio_build_state.json'
+
+SOURCES = ('lessons', 'tone-sandhi', 'priority')
+
+
+def recipe_hash(text):
+    """Content hash of what produces a clip: the canonical text and the recipe version"""
+    return hashlib.sha256(f"{RECIPE_VERSION}|{canonical_tailo(text)}".encode('utf-8')).hexdigest()[:16]
+
+
+def lesson_items(lessons_dir=LESSONS_DIR):
+    for path in sorted(Path(lessons_dir).glob('*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            lesson = json.load(f)
+        for text in lesson_phrases(lesson):
+            yield {'text': text, 'word': text, 'tier': 1, 'score': None, 'source': f"lesson:{path.stem}"}
+
+
+def tone_sandhi_phrases(path=TONE_SANDHI_FILE):
+    """Compounds and their syllables from the Tone Sandhi Trainer exercises, in exercise order"""
+    with open(path, 'r', encoding='utf-8') as f:
+        exercises = json.load(f)
+    phrases = []
+    for level in exercises.values():
+        for exercise in level:
+            phrases.append(exercise['compound'])
+            phrases.extend(exercise['characters'])
+    return phrases
+
+
+def tone_sandhi_items(path=TONE_SANDHI_FILE):
+    for phrase in tone_sandhi_phrases(path):
+        yield {'text': phrase['tailo'], 'word': phrase.get('han', phrase['tailo']), 'tier': 2, 'score': None,
+               'source': 'tone-sandhi'}
+
+
+def priority_items(path=PRIORITY_FILE, tier=None):
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)['entries']
+    for entry in entries:
+        entry_tier = priority_tier(entry['score'])
+        if tier and entry_tier != tier:
+            continue
+        yield {'text': entry['romanization'], 'word': entry['word'], 'tier': entry_tier, 'score': entry['score'],
+               'source': 'priority'}
+
+
+def collect_items(sources=SOURCES, priority_tier_filter=None):
+    collectors = {
+        'lessons': lambda: lesson_items(),
+        'tone-sandhi': lambda: tone_sandhi_items(),
+        'priority': lambda: priority_items(tier=priority_tier_filter),
+    }
+    for source in sources:
+        yield from collectors[source]()
+
+
+def build_manifest(items):
+    """Merge items by canonical key into manifest entries (first spelling and word win)"""
+    entries = {}
+    for item in items:
+        key = canonical_tailo(item['text'])
+        if not key:
+            continue
+        entry = entries.get(key)
+        if entry is None:
+            entries[key] = {
+                'key': key,
+                'romanization': item['text'],
+                'word': item['word'],
+                'tier': item['tier'],
+                'score': item['score'],
+                'sources': [item['source']],
+                'hash': recipe_hash(key),
+            }
+            continue
+        entry['tier'] = min(entry['tier'], item['tier'])
+        if item['score'] is not None:
+            entry['score'] = max(entry['score'] or 0, item['score'])
+        if item['source'] not in entry['sources']:
+            entry['sources'].append(item['source'])
+    # Most important clips first: lessons/tier 1, then by score
+    return sorted(entries.values(), key=lambda e: (e['tier'], -(e['score'] or 0)))
+
+
+def diff_manifest(entries, cached, built):
+    """
+    Compare the manifest with what is stored
+    cached: canonical keys in audio_cache; built: {key: recipe hash} of earlier builds
+    Returns (new, changed, up_to_date, adopted); adopted are cached clips made before
+    build state was kept, assumed current.
+    """
+    new, changed, up_to_date, adopted = [], [], [], []
+    for entry in entries:
+        if entry['key'] not in cached:
+            new.append(entry)
+        elif entry['key'] not in built:
+            adopted.append(entry)
+        elif built[entry['key']] != entry['hash']:
+            changed.append(entry)
+        else:
+            up_to_date.append(entry)
+    return new, changed, up_to_date, adopted
+
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = str(path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_build_state(path=BUILD_STATE_FILE):
+    """{key: recipe hash} of clips built by earlier builds"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('built', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_build_state(built, path=BUILD_STATE_FILE):
+    save_json(path, {'recipe_version': RECIPE_VERSION, 'built': built})
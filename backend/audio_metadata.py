@@ -0,0 +1,125 @@
+"""
+audio_cache metadata helpers for the audio generation scripts
+- fetch_cached_texts(): every cached tailo_text in one paged scan (planning phase)
+- fetch_cached_rows(): every audio_cache row (selected columns), paged
+- list_storage_objects(): every object name in a bucket, paged
+- fetch_cached_subset(): which of a short list of texts are cached (batched IN queries)
+- plan_work(): diff a work list against the cached set by canonical key
+- MetadataWriter: buffers audio_cache rows and writes them as batched upserts
+"""
+
+import threading
+
+from audio_keys import canonical_tailo
+
+
+def fetch_cached_rows(supabase, columns='tailo_text, storage_path', page_size=1000):
+    """Every audio_cache row (the given columns), paging through the table"""
+    rows = []
+    start = 0
+    while True:
+        result = supabase.table('audio_cache').select(columns).order('id') \
+            .range(start, start + page_size - 1).execute()
+        rows.extend(result.data)
+        if len(result.data) < page_size:
+            return rows
+        start += page_size
+
+
+def fetch_cached_texts(supabase, page_size=1000):
+    """Set of every tailo_text in audio_cache (canonical keys), paging through the table"""
+    return {row['tailo_text'] for row in fetch_cached_rows(supabase, 'tailo_text', page_size)}
+
+
+def list_storage_objects(supabase, bucket, page_size=1000):
+    """Names of every object at the top level of a storage bucket"""
+    names = set()
+    offset = 0
+    while True:
+        page = supabase.storage.from_(bucket).list('', {'limit': page_size, 'offset': offset})
+        names.update(item['name'] for item in page)
+        if len(page) < page_size:
+            return names
+        offset += page_size
+
+
+def fetch_cached_subset(supabase, texts, chunk_size=100):
+    """Canonical keys of the given texts that are in audio_cache (one query per chunk_size texts)"""
+    keys = sorted({canonical_tailo(text) for text in texts})
+    cached = set()
+    for start in range(0, len(keys), chunk_size):
+        result = supabase.table('audio_cache').select('tailo_text') \
+            .in_('tailo_text', keys[start:start + chunk_size]).execute()
+        cached.update(row['tailo_text'] for row in result.data)
+    return cached
+
+
+def plan_work(items, cached, text=lambda item: item):
+    """
+    Split items into (todo, skipped): skipped are already cached; of several
+    items with the same canonical key only the first is kept
+    """
+    seen = set(cached)
+    todo = []
+    skipped = []
+    for item in items:
+        key = canonical_tailo(text(item))
+        if key in cached:
+            skipped.append(item)
+        elif key not in seen:
+            seen.add(key)
+            todo.append(item)
+    return todo, skipped
+
+
+class MetadataWriter:
+    """
+    Collects audio_cache rows and upserts them (on_conflict tailo_text) in batches
+    of batch_size; thread-safe. write(rows) performs one batch and may add rate
+    limiting / retries; rows of a batch that still fails are passed to on_failure.
+    """
+
+    def __init__(self, supabase, batch_size=100, write=None, on_failure=None):
+        self.supabase = supabase
+        self.batch_size = batch_size
+        self.write = write or self._upsert
+        self.on_failure = on_failure
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self.stats = {'rows_written': 0, 'batches': 0, 'rows_failed': 0}
+
+    def _upsert(self, rows):
+        self.supabase.table('audio_cache').upsert(rows, on_conflict='tailo_text').execute()
+
+    def add(self, tailo_text, storage_path, file_size, **fields):
+        row = dict(fields, tailo_text=canonical_tailo(tailo_text), storage_path=storage_path, file_size=file_size)
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, []
+        self._write_batch(batch)
+
+    def flush(self):
+        """Write whatever is buffered"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        # Within a batch the last row per key wins (upsert cannot touch a row twice)
+        rows = list({row['tailo_text']: row for row in batch}.values())
+        try:
+            self.write(rows)
+        except Exception as e:
+            print(f"⚠️  Metadata batch of {len(rows)} rows failed: {e}")
+            with self._lock:
+                self.stats['rows_failed'] += len(rows)
+            if self.on_failure:
+                self.on_failure(rows, e)
+            return
+        with self._lock:
+            self.stats['rows_written'] += len(rows)
+            self.stats['batches'] += 1
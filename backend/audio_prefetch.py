@@ -0,0 +1,143 @@
+"""
+Background audio prefetch queue
+Warms the audio cache for Tâi-lô strings the learner is likely to play next
+(e.g. right after a romanization or module generation response)
+"""
+
+import heapq
+import itertools
+import threading
+
+from rate_limit import TokenBucket
+from audio_keys import canonical_tailo
+
+# Lower number = fetched first
+PRIORITY_HIGH = 0     # Romanization the learner is looking at right now
+PRIORITY_NORMAL = 1   # Generated module vocabulary and dialogue
+PRIORITY_LOW = 2      # Speculative / background replacement
+
+
+class AudioPrefetcher:
+    """
+    Bounded priority queue drained by a few worker threads, deduplicated on the
+    canonical audio key (spellings of the same clip are fetched once)
+    - fetch(taibun) must load the audio into the cache (and may raise)
+    - is_cached(taibun) lets workers skip entries that were warmed meanwhile
+    - All workers share one token bucket, so upstream load stays under `rate` per second
+    Worker threads start lazily on the first enqueue (safe with gunicorn's fork model)
+    """
+
+    def __init__(self, fetch, is_cached=None, workers=2, max_queue=200, rate=0.5, burst=2):
+        self.fetch = fetch
+        self.is_cached = is_cached or (lambda taibun: False)
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rate_limiter = TokenBucket(rate, burst)
+
+        self._heap = []
+        self._pending = {}        # canonical key -> best queued priority
+        self._texts = {}          # canonical key -> text to fetch (first spelling queued)
+        self._in_flight = set()   # canonical keys
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopping = False
+
+        self._stats = {
+            'enqueued': 0,
+            'duplicates': 0,
+            'dropped': 0,
+            'already_cached': 0,
+            'fetched': 0,
+            'failed': 0,
+        }
+
+    def enqueue(self, taibun, priority=PRIORITY_NORMAL):
+        """Queue taibun for prefetch; returns False if it was a duplicate or the queue is full"""
+        taibun = (taibun or '').strip()
+        key = canonical_tailo(taibun)
+        if not key:
+            return False
+
+        with self._cond:
+            if key in self._in_flight or self._pending.get(key, priority + 1) <= priority:
+                self._stats['duplicates'] += 1
+                return False
+            if key not in self._pending and len(self._pending) >= self.max_queue:
+                self._stats['dropped'] += 1
+                return False
+
+            # A re-enqueue with better priority leaves a stale heap entry that workers skip
+            self._pending[key] = priority
+            self._texts.setdefault(key, taibun)
+            heapq.heappush(self._heap, (priority, next(self._counter), key))
+            self._stats['enqueued'] += 1
+            self._ensure_workers()
+            self._cond.notify()
+            return True
+
+    def enqueue_many(self, texts, priority=PRIORITY_NORMAL):
+        """Queue several strings; returns how many were newly queued"""
+        return sum(1 for taibun in texts if self.enqueue(taibun, priority))
+
+    def _ensure_workers(self):
+        # Called with self._cond held
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name=f'audio-prefetch-{len(self._threads)}', daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _next(self):
+        """Block until there is work; returns (key, taibun), or None when stopping"""
+        with self._cond:
+            while True:
+                if self._stopping:
+                    return None
+                while self._heap:
+                    priority, _, key = heapq.heappop(self._heap)
+                    if self._pending.get(key) == priority:
+                        del self._pending[key]
+                        self._in_flight.add(key)
+                        return key, self._texts.pop(key)
+                self._cond.wait()
+
+    def _worker(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            key, taibun = item
+            try:
+                if self.is_cached(taibun):
+                    self._count('already_cached')
+                    continue
+
+                self.rate_limiter.acquire()
+                self.fetch(taibun)
+                self._count('fetched')
+            except Exception as e:
+                self._count('failed')
+                print(f"⚠️  Audio prefetch failed for {taibun}: {e}")
+            finally:
+                with self._cond:
+                    self._in_flight.discard(key)
+
+    def _count(self, key):
+        with self._cond:
+            self._stats[key] += 1
+
+    def stop(self):
+        """Stop workers after their current item"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return dict(
+                self._stats,
+                queued=len(self._pending),
+                in_flight=len(self._in_flight),
+                workers=len([t for t in self._threads if t.is_alive()]),
+            )
@@ -0,0 +1,182 @@
+"""
+Compact audio variants
+Low-bitrate mono versions of the cached clips for bandwidth-constrained clients:
+  - opus:      Opus in WebM, 24 kbps mono (smallest; all modern browsers except old Safari)
+  - mp3-small: MP3, 32 kbps mono 22.05 kHz (plays everywhere)
+Variants are transcoded with ffmpeg (optional: without it only the original is
+served), stored next to the original as '<key>.r<recipe version>.<variant>.<ext>'
+(a rebuilt original gets fresh variants) and picked per request from the
+`quality` parameter or the Accept header.
+"""
+
+import shutil
+import subprocess
+import threading
+import time
+
+from audio_keys import RECIPE_VERSION, audio_cache_key
+
+ORIGINAL = 'original'
+
+VARIANTS = {
+    'opus': {
+        'mimetype': 'audio/webm',
+        'extension': 'webm',
+        'ffmpeg_args': ['-c:a', 'libopus', '-b:a', '24k', '-ac', '1', '-application', 'voip', '-f', 'webm'],
+    },
+    'mp3-small': {
+        'mimetype': 'audio/mpeg',
+        'extension': 'mp3',
+        'ffmpeg_args': ['-c:a', 'libmp3lame', '-b:a', '32k', '-ac', '1', '-ar', '22050', '-f', 'mp3'],
+    },
+}
+
+# quality parameter values -> variant preference (first one the client accepts wins)
+QUALITY_PREFERENCES = {
+    'original': [ORIGINAL],
+    'high': [ORIGINAL],
+    'low': ['opus', 'mp3-small'],
+    'small': ['opus', 'mp3-small'],
+    'opus': ['opus'],
+    'mp3-small': ['mp3-small'],
+}
+
+FFMPEG = shutil.which('ffmpeg')
+TRANSCODE_TIMEOUT = 30
+
+
+def ffmpeg_available():
+    return FFMPEG is not None
+
+
+def variant_storage_path(text, variant):
+    """Object name of a variant in Supabase Storage, tied to the recipe version of its original"""
+    return f"{audio_cache_key(text)}.r{RECIPE_VERSION}.{variant}.{VARIANTS[variant]['extension']}"
+
+
+def variant_memory_key(key, variant):
+    """In-memory cache key of a variant (the original uses the canonical key itself)"""
+    return key if variant == ORIGINAL else f"{key}|{variant}"
+
+
+def accepted_types(accept_header):
+    """Media types the client explicitly lists with q > 0 (wildcards ignored)"""
+    accepted = set()
+    for part in (accept_header or '').split(','):
+        fields = [f.strip() for f in part.split(';')]
+        media_type = fields[0].lower()
+        if not media_type or '*' in media_type:
+            continue
+        q = 1.0
+        for field in fields[1:]:
+            if field.startswith('q='):
+                try:
+                    q = float(field[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(media_type)
+    return accepted
+
+
+def choose_variant(quality=None, accept_header=None):
+    """
+    Pick the variant for a request
+    - quality=low/small/opus/mp3-small/original/high selects explicitly; Opus is only
+      chosen if the client did not exclude it (an Accept without audio/webm while
+      listing audio/mpeg means it cannot play WebM)
+    - no quality: Opus if the client explicitly accepts audio/webm, otherwise the original
+    Falls back to the original when ffmpeg is not available.
+    """
+    accepted = accepted_types(accept_header)
+    if quality:
+        preferences = QUALITY_PREFERENCES.get(quality.lower(), [ORIGINAL])
+    elif 'audio/webm' in accepted:
+        preferences = ['opus']
+    else:
+        preferences = [ORIGINAL]
+
+    for variant in preferences:
+        if variant == ORIGINAL:
+            return ORIGINAL
+        if not ffmpeg_available():
+            continue
+        if variant == 'opus' and 'audio/mpeg' in accepted and 'audio/webm' not in accepted:
+            continue
+        return variant
+    return ORIGINAL
+
+
+def transcode(audio_data, variant):
+    """Transcode original MP3 bytes to a variant with ffmpeg (stdin → stdout)"""
+    if not ffmpeg_available():
+        raise RuntimeError("ffmpeg is not installed")
+    command = [FFMPEG, '-hide_banner', '-loglevel', 'error', '-i', 'pipe:0', '-vn', '-map_metadata', '-1'] \
+        + VARIANTS[variant]['ffmpeg_args'] + ['pipe:1']
+    try:
+        result = subprocess.run(command, input=audio_data, capture_output=True, timeout=TRANSCODE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"ffmpeg timed out after {TRANSCODE_TIMEOUT}s")
+    if result.returncode != 0 or not result.stdout:
+        raise RuntimeError(f"ffmpeg failed ({result.returncode}): {result.stderr.decode('utf-8', 'replace')[:200]}")
+    return result.stdout
+
+
+class VariantStats:
+    """
+    Per-variant bytes served and response / transcode latency. The size ratio to
+    the original is measured on responses where the original's size is known
+    (it was in memory or just transcoded) and used to estimate the bytes saved.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _variant(self, variant):
+        if variant not in self._stats:
+            self._stats[variant] = {
+                'served': 0,
+                'bytes_served': 0,
+                'compared_bytes': 0,
+                'compared_original_bytes': 0,
+                'response_ms': 0.0,
+                'transcodes': 0,
+                'transcode_ms': 0.0,
+            }
+        return self._stats[variant]
+
+    def record_served(self, variant, size, started, original_size=None):
+        with self._lock:
+            stats = self._variant(variant)
+            stats['served'] += 1
+            stats['bytes_served'] += size
+            stats['response_ms'] += (time.monotonic() - started) * 1000
+            if original_size:
+                stats['compared_bytes'] += size
+                stats['compared_original_bytes'] += original_size
+
+    def record_transcode(self, variant, started):
+        with self._lock:
+            stats = self._variant(variant)
+            stats['transcodes'] += 1
+            stats['transcode_ms'] += (time.monotonic() - started) * 1000
+
+    def stats(self):
+        with self._lock:
+            report = {}
+            for variant, stats in self._stats.items():
+                served = stats['served']
+                ratio = stats['compared_bytes'] / stats['compared_original_bytes'] \
+                    if stats['compared_original_bytes'] else None
+                report[variant] = {
+                    'served': served,
+                    'bytes_served': stats['bytes_served'],
+                    'size_ratio': round(ratio, 3) if ratio else None,
+                    'bytes_saved_estimate': round(stats['bytes_served'] * (1 / ratio - 1)) if ratio else None,
+                    'avg_response_ms': round(stats['response_ms'] / served, 1) if served else None,
+                    'transcodes': stats['transcodes'],
+                    'avg_transcode_ms': round(stats['transcode_ms'] / stats['transcodes'], 1)
+                    if stats['transcodes'] else None,
+                }
+            return dict(report, ffmpeg=ffmpeg_available())
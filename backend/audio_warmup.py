@@ -0,0 +1,146 @@
+"""
+Startup audio warmup
+Fills the audio cache in the background from prioritized sources (common phrases,
+priority_entries.json tiers) in parallel, within a time and byte budget
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from audio_keys import canonical_tailo, priority_tier
+
+
+def priority_entries_source(priority_file, tiers=(1,)):
+    """Yield romanizations from priority_entries.json for the given tiers, highest score first"""
+    try:
+        with open(priority_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f).get('entries', [])
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Warmup: could not read {priority_file}: {e}")
+        return
+
+    for entry in entries:
+        romanization = entry.get('romanization', '').split('/')[0].strip()
+        if romanization and priority_tier(entry.get('score', 0)) in tiers:
+            yield romanization
+
+
+class AudioWarmup:
+    """
+    Runs once in a background thread and reports readiness
+    - fetch(taibun) loads one clip into the cache and returns its size in bytes
+    - sources are iterables of Tâi-lô strings, consumed in order (deduplicated by
+      canonical_tailo, the audio cache key)
+    - Stops submitting work once time_budget seconds or byte_budget bytes are spent
+    """
+
+    def __init__(self, fetch, sources, workers=4, time_budget=120.0, byte_budget=20 * 1024 * 1024):
+        self.fetch = fetch
+        self.sources = sources
+        self.workers = workers
+        self.time_budget = time_budget
+        self.byte_budget = byte_budget
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._status = {
+            'state': 'pending',   # pending → running → ready
+            'attempted': 0,
+            'cached': 0,
+            'failed': 0,
+            'bytes': 0,
+            'stopped_by': None,   # 'time_budget' / 'byte_budget' when a budget ran out
+            'started_at': None,
+            'elapsed': 0.0,
+        }
+
+    def start(self):
+        """Start warming in a daemon thread (no-op if already started)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='audio-warmup', daemon=True)
+            self._status['state'] = 'running'
+            self._status['started_at'] = time.time()
+        self._thread.start()
+
+    def _items(self):
+        seen = set()
+        for source in self.sources:
+            for taibun in source:
+                key = canonical_tailo(taibun)
+                if key not in seen:
+                    seen.add(key)
+                    yield taibun
+
+    def _fetch_one(self, taibun):
+        try:
+            size = self.fetch(taibun) or 0
+            with self._lock:
+                self._status['cached'] += 1
+                self._status['bytes'] += size
+        except Exception as e:
+            with self._lock:
+                self._status['failed'] += 1
+            print(f"  ✗ Warmup failed for {taibun}: {e}")
+
+    def _over_budget(self, started):
+        if time.monotonic() - started >= self.time_budget:
+            return 'time_budget'
+        with self._lock:
+            if self._status['bytes'] >= self.byte_budget:
+                return 'byte_budget'
+        return None
+
+    def _run(self):
+        print(f"\n🎵 Warming audio cache in background ({self.workers} workers, "
+              f"{self.time_budget:.0f}s / {self.byte_budget / (1024 * 1024):.0f} MB budget)...")
+        started = time.monotonic()
+        in_flight = set()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='audio-warmup') as executor:
+            for taibun in self._items():
+                stopped_by = self._over_budget(started)
+                if stopped_by:
+                    with self._lock:
+                        self._status['stopped_by'] = stopped_by
+                    break
+
+                # Keep at most `workers` fetches in flight so budgets are checked between items
+                if len(in_flight) >= self.workers:
+                    remaining = max(0.0, self.time_budget - (time.monotonic() - started))
+                    _, in_flight = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+                    if len(in_flight) >= self.workers:
+                        with self._lock:
+                            self._status['stopped_by'] = 'time_budget'
+                        break
+
+                with self._lock:
+                    self._status['attempted'] += 1
+                in_flight.add(executor.submit(self._fetch_one, taibun))
+
+            wait(in_flight)
+
+        with self._lock:
+            self._status['state'] = 'ready'
+            self._status['elapsed'] = round(time.monotonic() - started, 2)
+            status = dict(self._status)
+
+        print(f"✅ Audio warmup done: {status['cached']}/{status['attempted']} clips, "
+              f"{status['bytes'] / 1024:.0f} KB in {status['elapsed']}s"
+              + (f" (stopped by {status['stopped_by']})" if status['stopped_by'] else ""))
+
+    @property
+    def ready(self):
+        with self._lock:
+            return self._status['state'] == 'ready'
+
+    def status(self):
+        with self._lock:
+            status = dict(self._status)
+        if status['state'] == 'running':
+            status['elapsed'] = round(time.time() - status['started_at'], 2)
+        status['ready'] = status['state'] == 'ready'
+        return status
@@ -0,0 +1,167 @@
+"""
+Circuit breaker and negative cache for an unreliable upstream (Hapsing)
+- CircuitBreaker: after failure_threshold consecutive failures the circuit opens
+  and calls fail fast for reset_timeout seconds; then a limited number of probe
+  calls are let through (half-open) and the first success closes it again
+- NegativeCache: remembers inputs that just failed for a short TTL so repeated
+  requests for them do not each wait for the upstream timeout
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Upstream is considered down; retry after retry_after seconds"""
+
+    def __init__(self, message, retry_after=5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class NegativeCacheHit(Exception):
+    """The input failed recently; rejected=True if the upstream refused it (not transient)"""
+
+    def __init__(self, message, rejected=False, retry_after=5):
+        super().__init__(message)
+        self.rejected = rejected
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    before_call() raises CircuitOpenError when the call must not be made;
+    the caller reports the outcome with record_success() / record_failure()
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, half_open_max_calls=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._stats = {'opened': 0, 'rejected': 0, 'successes': 0, 'failures': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        # Called with the lock held: an open circuit turns half-open once reset_timeout has passed
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def _seconds_until_probe(self):
+        # Called with the lock held
+        return max(1, int(self.reset_timeout - (time.monotonic() - self._opened_at) + 0.999))
+
+    def before_call(self):
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return
+            self._stats['rejected'] += 1
+            retry_after = self._seconds_until_probe() if state == OPEN else 1
+        raise CircuitOpenError(f"{self.name} circuit is {state}, failing fast", retry_after)
+
+    def record_success(self):
+        with self._lock:
+            self._stats['successes'] += 1
+            self._failures = 0
+            if self._state != CLOSED:
+                print(f"✓ {self.name} circuit closed (upstream recovered)")
+            self._state = CLOSED
+
+    def record_abandoned(self):
+        """The call was never made (e.g. no local connection slot): give back a half-open probe"""
+        with self._lock:
+            if self._current_state() == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_failure(self):
+        with self._lock:
+            self._stats['failures'] += 1
+            self._failures += 1
+            state = self._current_state()
+            if state == HALF_OPEN or (state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._stats['opened'] += 1
+                print(f"⚠️  {self.name} circuit opened after {self._failures} failures "
+                      f"(failing fast for {self.reset_timeout:.0f}s)")
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, state=self._current_state(), consecutive_failures=self._failures)
+
+
+class NegativeCache:
+    """
+    key -> failure, each with its own TTL (rejected inputs are kept longer than
+    transient failures). A success clears the key and, for ttl seconds, stops
+    a late transient failure of the same key (e.g. a losing hedged request)
+    from being cached.
+    """
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()    # key -> (expires_at, rejected, reason)
+        self._succeeded = OrderedDict()  # key -> monotonic time of last success
+        self._stats = {'hits': 0, 'added': 0}
+
+    def check(self, key):
+        """Raise NegativeCacheHit if key failed recently"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            expires_at, rejected, reason = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return
+            self._stats['hits'] += 1
+        raise NegativeCacheHit(f"recently failed: {reason}", rejected, max(1, int(expires_at - now + 0.999)))
+
+    def add(self, key, reason, ttl, rejected=False):
+        now = time.monotonic()
+        with self._lock:
+            succeeded = self._succeeded.get(key)
+            if not rejected and succeeded is not None and now - succeeded < ttl:
+                return
+            self._entries[key] = (now + ttl, rejected, reason)
+            self._entries.move_to_end(key)
+            self._stats['added'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_success(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._succeeded[key] = time.monotonic()
+            self._succeeded.move_to_end(key)
+            while len(self._succeeded) > self.max_entries:
+                self._succeeded.popitem(last=False)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            active = sum(1 for expires_at, _, _ in self._entries.values() if expires_at > now)
+            return dict(self._stats, entries=active)
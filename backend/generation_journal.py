@@ -0,0 +1,116 @@
+"""
+Append-only journal of audio generation runs
+One JSON line per event, keyed by canonical Tâi-lô text:
+  - started:   synthesis begun
+  - uploaded:  object is in storage (storage_path, file_size), metadata row not yet written
+  - completed: audio_cache row written
+  - failed:    gave up (reason; permanent=True for input Hapsing rejects)
+Replaying the file gives the last state per key, so an interrupted run can resume:
+completed keys are skipped, uploaded ones only need their metadata row, and
+started ones are regenerated. A torn last line (crash mid-write) is ignored.
+"""
+
+import json
+import os
+import threading
+import time
+
+from audio_keys import canonical_tailo
+
+STARTED = 'started'
+UPLOADED = 'uploaded'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+# Rewrite the journal with one line per key once it has this many redundant lines
+COMPACT_MIN_REDUNDANT = 10000
+
+
+class GenerationJournal:
+    """Thread-safe append-only event log with replay (see module docstring)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = {}
+        self.lines = 0
+        self.corrupt_lines = 0
+        self._replay()
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if self.lines - len(self.state) >= COMPACT_MIN_REDUNDANT:
+            self.compact()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _replay(self):
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self.state[record['key']] = record
+                except (ValueError, KeyError, TypeError):
+                    self.corrupt_lines += 1
+                    continue
+                self.lines += 1
+
+    def compact(self):
+        """Rewrite the journal with only the last record per key"""
+        with self._lock:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in self.state.values():
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.lines = len(self.state)
+            if getattr(self, '_file', None):
+                self._file.close()
+                self._file = open(self.path, 'a', encoding='utf-8')
+
+    def record(self, event, text, **fields):
+        record = dict(fields, event=event, key=canonical_tailo(text), t=round(time.time(), 3))
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self.state[record['key']] = record
+            self._file.write(line)
+            self._file.flush()
+            self.lines += 1
+
+    def started(self, text):
+        self.record(STARTED, text)
+
+    def uploaded(self, text, storage_path, file_size, **fields):
+        self.record(UPLOADED, text, storage_path=storage_path, file_size=file_size, **fields)
+
+    def completed(self, text):
+        self.record(COMPLETED, text)
+
+    def failed(self, text, reason, permanent=False):
+        self.record(FAILED, text, reason=str(reason)[:200], permanent=permanent)
+
+    def status(self, text):
+        """Last record for a text, or None"""
+        return self.state.get(canonical_tailo(text))
+
+    def keys_in(self, *events):
+        with self._lock:
+            return {key for key, record in self.state.items() if record['event'] in events}
+
+    def summary(self):
+        counts = {STARTED: 0, UPLOADED: 0, COMPLETED: 0, FAILED: 0}
+        with self._lock:
+            for record in self.state.values():
+                counts[record['event']] = counts.get(record['event'], 0) + 1
+            permanent = sum(1 for r in self.state.values() if r['event'] == FAILED and r.get('permanent'))
+        return dict(counts, permanent_failures=permanent, lines=self.lines, corrupt_lines=self.corrupt_lines)
+
+    def close(self):
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
@@ -0,0 +1,137 @@
+"""
+Hapsing text-to-speech client (https://hapsing.ithuan.tw)
+Synthesizes Taiwanese audio (MP3) from Tâi-lô text over the shared HTTP pool
+Interactive callers use the hedged variants: a slow synthesis gets a second
+request after the adaptive p95 delay, bounded by the caller's deadline.
+Every request goes through a circuit breaker (fails fast while Hapsing is down)
+and a negative cache (inputs that just failed are not retried for a short TTL).
+"""
+
+import http.client
+import os
+import socket
+import urllib.parse
+
+from http_pool import http_pool, HTTPStatusError, PoolTimeoutError
+from hedging import Hedger
+from circuit_breaker import CircuitBreaker, NegativeCache
+from audio_keys import canonical_tailo
+
+HAPSING_URL = os.getenv('HAPSING_URL', 'https://hapsing.ithuan.tw/bangtsam')
+
+HEDGE_ENABLED = os.getenv('HAPSING_HEDGE_ENABLED', 'true').lower() != 'false'
+hedger = Hedger(
+    'hapsing',
+    percentile=float(os.getenv('HAPSING_HEDGE_PERCENTILE', '95')),
+    initial_delay=float(os.getenv('HAPSING_HEDGE_INITIAL_DELAY', '6')),
+    max_hedge_ratio=float(os.getenv('HAPSING_HEDGE_MAX_RATIO', '0.2')) if HEDGE_ENABLED else 0.0,
+)
+
+
+breaker = CircuitBreaker(
+    'hapsing',
+    failure_threshold=int(os.getenv('HAPSING_BREAKER_THRESHOLD', '5')),
+    reset_timeout=float(os.getenv('HAPSING_BREAKER_RESET_TIMEOUT', '30')),
+)
+negative_cache = NegativeCache()
+# How long a failing input is answered from the negative cache
+NEGATIVE_TTL_TRANSIENT = float(os.getenv('HAPSING_NEGATIVE_TTL', '30'))
+NEGATIVE_TTL_REJECTED = float(os.getenv('HAPSING_NEGATIVE_TTL_REJECTED', '600'))
+# Statuses that mean Hapsing refused the input itself; 429, 408, other 4xx and
+# anything with Retry-After are the upstream's state and worth retrying later
+REJECTED_STATUSES = (400, 404, 422)
+
+
+def hapsing_audio_url(taibun):
+    """Build the Hapsing synthesis URL for a Tâi-lô string"""
+    return f"{HAPSING_URL}?taibun={urllib.parse.quote(taibun)}"
+
+
+def is_rejection(error):
+    """True if an HTTPStatusError means Hapsing rejected the input (retrying cannot help)"""
+    return error.status in REJECTED_STATUSES and not error.headers.get('Retry-After')
+
+
+def guarded(taibun, request):
+    """
+    Run request() for taibun behind the negative cache and circuit breaker
+    400/404/422 mean Hapsing rejected the input: cached longer, not counted
+    against the upstream. Connection errors, timeouts, 429/408 and 5xx count
+    as failures and open the circuit. No free local connection slot
+    (PoolTimeoutError) says nothing about Hapsing: neither counted nor cached.
+    """
+    key = canonical_tailo(taibun)
+    negative_cache.check(key)
+    breaker.before_call()
+    try:
+        result = request()
+    except PoolTimeoutError:
+        breaker.record_abandoned()
+        raise
+    except HTTPStatusError as e:
+        if is_rejection(e):
+            breaker.record_success()
+            negative_cache.add(key, f"HTTP {e.status}", NEGATIVE_TTL_REJECTED, rejected=True)
+        else:
+            breaker.record_failure()
+            negative_cache.add(key, f"HTTP {e.status}", NEGATIVE_TTL_TRANSIENT)
+        raise
+    except (OSError, http.client.HTTPException, socket.timeout) as e:
+        breaker.record_failure()
+        negative_cache.add(key, type(e).__name__, NEGATIVE_TTL_TRANSIENT)
+        raise
+
+    breaker.record_success()
+    negative_cache.record_success(key)
+    return result
+
+
+def record_bad_response(taibun, reason):
+    """
+    Record that Hapsing answered taibun with unusable audio (e.g. an error page
+    behind a 200): a transient upstream failure, not a rejection of the input
+    """
+    breaker.record_failure()
+    negative_cache.add(canonical_tailo(taibun), reason, NEGATIVE_TTL_TRANSIENT)
+
+
+def fetch_audio(taibun, timeout=None, pool=http_pool):
+    """Synthesize audio for taibun and return the MP3 bytes"""
+    return guarded(taibun, lambda: pool.get(hapsing_audio_url(taibun), read_timeout=timeout))
+
+
+def open_audio_stream(taibun, timeout=None, pool=http_pool):
+    """
+    Start synthesis and return the PooledResponse as soon as headers arrive,
+    so the caller can relay the MP3 body chunk by chunk
+    """
+    return guarded(taibun, lambda: pool.open(hapsing_audio_url(taibun), read_timeout=timeout))
+
+
+def fetch_audio_hedged(taibun, timeout=None, deadline=None):
+    """fetch_audio() with hedging; raises hedging.DeadlineExceeded past deadline"""
+    return hedger.call(fetch_audio, taibun, timeout, deadline=deadline)
+
+
+def open_audio_stream_hedged(taibun, timeout=None, deadline=None):
+    """
+    open_audio_stream() with hedging: the first response whose headers arrive is
+    returned, the other one is closed when it completes
+    """
+    return hedger.call(open_audio_stream, taibun, timeout, deadline=deadline, discard=lambda r: r.close())
+
+
+def stats():
+    """Hedging, circuit breaker and negative cache counters"""
+    return {
+        'hedging': hedger.stats(),
+        'circuit': breaker.stats(),
+        'negative_cache': negative_cache.stats(),
+    }
+
+
+def looks_like_mp3(data):
+    """Cheap sanity check that a body is MP3 (ID3 tag or MPEG frame sync), not an error page"""
+    if len(data) < 4:
+        return False
+    return data[:3] == b'ID3' or (data[0] == 0xFF and (data[1] & 0xE0) == 0xE0)
@@ -0,0 +1,179 @@
+"""
+Hedged requests with end-to-end deadlines
+A slow call gets a second, identical attempt once it has taken longer than the
+recent p95 latency; whichever finishes first wins. Calls that cannot finish
+before the caller's deadline raise DeadlineExceeded instead of blocking.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class DeadlineExceeded(Exception):
+    """The call did not finish before its deadline (retriable)"""
+
+    def __init__(self, message, retry_after=5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def deadline_after(seconds):
+    """Absolute monotonic deadline `seconds` from now (None = no deadline)"""
+    return None if seconds is None else time.monotonic() + seconds
+
+
+def remaining(deadline):
+    """Seconds left until deadline (None if there is no deadline)"""
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+class LatencyWindow:
+    """Recent successful call latencies; percentile() over the last `size` samples"""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
+
+
+class Hedger:
+    """
+    call(fn, *args, deadline=..., discard=...) runs fn on a worker thread.
+    If it has not finished after the hedge delay (p95 of recent latencies,
+    clamped to [min_delay, max_delay]; initial_delay until min_samples are
+    recorded) an identical hedge is started. The first success is returned;
+    the other attempt runs to completion and its result is passed to discard()
+    (e.g. to close a response). At most max_hedge_ratio of calls are hedged so
+    a struggling upstream does not get twice the load.
+    """
+
+    def __init__(self, name, workers=8, percentile=95, initial_delay=6.0, min_delay=1.0,
+                 max_delay=15.0, min_samples=20, max_hedge_ratio=0.2, retry_after=5):
+        self.name = name
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self.retry_after = retry_after
+
+        self.latencies = LatencyWindow()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'{name}-hedge')
+        self._lock = threading.Lock()
+        self._stats = {
+            'calls': 0,
+            'hedged': 0,
+            'hedge_wins': 0,
+            'hedges_skipped': 0,
+            'deadline_exceeded': 0,
+            'errors': 0,
+        }
+
+    def hedge_delay(self):
+        """Current hedge delay in seconds"""
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay
+        return min(self.max_delay, max(self.min_delay, self.latencies.percentile(self.percentile)))
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _may_hedge(self):
+        with self._lock:
+            if self._stats['hedged'] < self.max_hedge_ratio * self._stats['calls']:
+                self._stats['hedged'] += 1
+                return True
+            self._stats['hedges_skipped'] += 1
+            return False
+
+    def _timed(self, fn, args):
+        started = time.monotonic()
+        result = fn(*args)
+        self.latencies.add(time.monotonic() - started)
+        return result
+
+    def call(self, fn, *args, deadline=None, discard=None):
+        self._count('calls')
+        attempts = [self._executor.submit(self._timed, fn, args)]
+        winner = None
+        try:
+            winner = self._wait(attempts, deadline, lambda: self._executor.submit(self._timed, fn, args))
+            return winner.result()
+        finally:
+            # Losing or abandoned attempts finish in the background; hand their result to discard()
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.add_done_callback(lambda f: self._discard(f, discard))
+
+    def _wait(self, attempts, deadline, submit_hedge):
+        """Return the first attempt that succeeds"""
+        hedge_at = time.monotonic() + self.hedge_delay()
+        pending = set(attempts)
+        last_error = None
+
+        while pending:
+            timeout = remaining(deadline)
+            if len(attempts) == 1 and hedge_at is not None:
+                until_hedge = max(0.0, hedge_at - time.monotonic())
+                timeout = until_hedge if timeout is None else min(timeout, until_hedge)
+
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not attempts[0]:
+                        self._count('hedge_wins')
+                    return future
+                last_error = future.exception()
+
+            if deadline is not None and time.monotonic() >= deadline and pending:
+                self._count('deadline_exceeded')
+                raise DeadlineExceeded(f"{self.name}: no response before deadline", self.retry_after)
+
+            # Only slow attempts are hedged; an attempt that failed is not retried here
+            if pending and len(attempts) == 1 and hedge_at is not None and time.monotonic() >= hedge_at:
+                hedge_at = None
+                if self._may_hedge():
+                    attempts.append(submit_hedge())
+                    pending.add(attempts[-1])
+
+        self._count('errors')
+        raise last_error
+
+    @staticmethod
+    def _discard(future, discard):
+        if discard is None or future.cancelled() or future.exception() is not None:
+            return
+        try:
+            discard(future.result())
+        except Exception:
+            pass
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        calls = stats['calls']
+        stats['hedge_rate'] = round(stats['hedged'] / calls, 3) if calls else 0.0
+        stats['timeout_rate'] = round(stats['deadline_exceeded'] / calls, 3) if calls else 0.0
+        stats['hedge_delay'] = round(self.hedge_delay(), 3)
+        p50 = self.latencies.percentile(50)
+        stats['latency_p50'] = round(p50, 3) if p50 is not None else None
+        return stats
@@ -0,0 +1,319 @@
+"""
+Shared outbound HTTP client with connection pooling and keep-alive
+Used by the Flask app and the audio scripts for Hapsing and Supabase Storage
+"""
+
+import http.client
+import os
+import socket
+import threading
+import time
+import urllib.parse
+import weakref
+
+
+# Errors that mean a pooled keep-alive connection went stale (server closed it)
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+MAX_REDIRECTS = 3
+
+
+class PoolTimeoutError(socket.timeout):
+    """Raised when no request slot for the host frees up within the connect timeout"""
+
+
+class HTTPStatusError(Exception):
+    """Raised when the upstream answers with a 4xx/5xx status"""
+
+    def __init__(self, url, status, reason, body=b'', headers=None):
+        super().__init__(f"HTTP Error {status}: {reason}")
+        self.url = url
+        self.status = status
+        self.code = status  # Same attribute name as urllib.error.HTTPError
+        self.reason = reason
+        self.body = body
+        self.headers = headers if headers is not None else {}
+
+
+def _drop_abandoned(pool, host_key, conn, released):
+    # Finalizer of a PooledResponse garbage-collected without read()/close()
+    if not released[0]:
+        released[0] = True
+        pool._release(host_key, conn, False)
+
+
+class PooledResponse:
+    """
+    Wraps an http.client response so the connection goes back to the pool
+    once the body has been fully read (or is closed if reading failed)
+    A response dropped without being read or closed frees its slot when collected
+    """
+
+    def __init__(self, pool, host_key, conn, response, url, reused):
+        self._pool = pool
+        self._host_key = host_key
+        self._conn = conn
+        self._response = response
+        self._state = [False]   # released; shared with the finalizer
+        self._finalizer = weakref.finalize(self, _drop_abandoned, pool, host_key, conn, self._state)
+        self.url = url
+        self.reused = reused
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    @property
+    def content_length(self):
+        value = self.headers.get('Content-Length')
+        return int(value) if value and value.isdigit() else None
+
+    def set_read_timeout(self, timeout):
+        """Tighten the socket timeout for the rest of the body (e.g. to honour a deadline)"""
+        if self._conn.sock is not None:
+            self._conn.sock.settimeout(timeout)
+
+    def read(self):
+        """Read the full body and release the connection"""
+        try:
+            data = self._response.read()
+        except BaseException:
+            self.close()
+            raise
+        self.release()
+        return data
+
+    def iter_chunks(self, chunk_size=16 * 1024):
+        """Yield the body in chunks as they arrive, releasing the connection at EOF"""
+        try:
+            while True:
+                chunk = self._response.read1(chunk_size) if hasattr(self._response, 'read1') else self._response.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            # read1() can report EOF without closing the response; read() marks it complete
+            self._response.read()
+        except BaseException:
+            self.close()
+            raise
+        self.release()
+
+    def release(self):
+        """Return the connection to the pool if it can be reused"""
+        if self._state[0]:
+            return
+        self._state[0] = True
+        self._finalizer.detach()
+        reusable = not self._response.will_close and self._response.isclosed()
+        self._pool._release(self._host_key, self._conn, reusable)
+
+    def close(self):
+        """Drop the connection (partial read, error or client disconnect)"""
+        if self._state[0]:
+            return
+        self._state[0] = True
+        self._finalizer.detach()
+        self._pool._release(self._host_key, self._conn, False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None and self._response.isclosed():
+            self.release()
+        else:
+            self.close()
+        return False
+
+
+class HTTPPool:
+    """
+    Keep-alive connection pool keyed by (scheme, host, port)
+    - At most max_per_host requests in flight per host (extra callers wait up to
+      the connect timeout for a slot, then get PoolTimeoutError)
+    - Idle connections are reused for up to idle_timeout seconds
+    - Separate connect and read timeouts
+    """
+
+    def __init__(self, max_per_host=4, connect_timeout=5.0, read_timeout=20.0, idle_timeout=60.0):
+        self.max_per_host = max_per_host
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._idle = {}        # host_key -> [(conn, last_used)]
+        self._limits = {}      # host_key -> BoundedSemaphore
+        self._stats = {}       # host_key -> counters
+
+    def _host_stats(self, host_key):
+        if host_key not in self._stats:
+            self._stats[host_key] = {
+                'requests': 0,
+                'connections_opened': 0,
+                'connections_reused': 0,
+                'stale_retries': 0,
+                'errors': 0,
+                'in_flight': 0,
+            }
+        return self._stats[host_key]
+
+    def _limit(self, host_key):
+        with self._lock:
+            if host_key not in self._limits:
+                self._limits[host_key] = threading.BoundedSemaphore(self.max_per_host)
+            return self._limits[host_key]
+
+    def _acquire(self, host_key, connect_timeout):
+        """Get an idle connection for host_key or open a new one"""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(host_key, [])
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used < self.idle_timeout and conn.sock is not None:
+                    self._host_stats(host_key)['connections_reused'] += 1
+                    return conn, True
+                conn.close()
+
+        scheme, host, port = host_key
+        conn_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        conn = conn_class(host, port, timeout=connect_timeout)
+        conn.connect()
+        with self._lock:
+            self._host_stats(host_key)['connections_opened'] += 1
+        return conn, False
+
+    def _release(self, host_key, conn, reusable):
+        with self._lock:
+            stats = self._host_stats(host_key)
+            stats['in_flight'] -= 1
+            if reusable and conn.sock is not None:
+                self._idle.setdefault(host_key, []).append((conn, time.monotonic()))
+            else:
+                conn.close()
+        self._limits[host_key].release()
+
+    def open(self, url, method='GET', body=None, headers=None, connect_timeout=None, read_timeout=None):
+        """
+        Send a request and return a PooledResponse once headers have arrived
+        Caller must read() / iter_chunks() / close() it to free the connection
+        Follows up to MAX_REDIRECTS redirects; raises HTTPStatusError on 4xx/5xx
+        """
+        connect_timeout = connect_timeout or self.connect_timeout
+        read_timeout = read_timeout or self.read_timeout
+
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._open_once(url, method, body, headers, connect_timeout, read_timeout)
+
+            if response.status in (301, 302, 303, 307, 308) and response.headers.get('Location'):
+                response.read()
+                url = urllib.parse.urljoin(url, response.headers['Location'])
+                if response.status == 303:
+                    method, body = 'GET', None
+                continue
+
+            if response.status >= 400:
+                error_body = response.read()
+                raise HTTPStatusError(url, response.status, response.reason, error_body, response.headers)
+
+            return response
+
+        raise HTTPStatusError(url, 310, 'Too many redirects')
+
+    def _open_once(self, url, method, body, headers, connect_timeout, read_timeout):
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme or 'http'
+        port = parsed.port or (443 if scheme == 'https' else 80)
+        host_key = (scheme, parsed.hostname, port)
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+
+        request_headers = {'Connection': 'keep-alive'}
+        if headers:
+            request_headers.update(headers)
+
+        limit = self._limit(host_key)
+        if not limit.acquire(timeout=connect_timeout):
+            raise PoolTimeoutError(f"No free connection slot for {parsed.hostname} within {connect_timeout}s "
+                                   f"({self.max_per_host} in flight)")
+        with self._lock:
+            stats = self._host_stats(host_key)
+            stats['requests'] += 1
+            stats['in_flight'] += 1
+
+        # One retry if a reused connection turns out to be stale
+        for attempt in range(2):
+            conn = None
+            reused = False
+            try:
+                conn, reused = self._acquire(host_key, connect_timeout)
+                conn.sock.settimeout(read_timeout)
+                conn.request(method, path, body=body, headers=request_headers)
+                response = conn.getresponse()
+                return PooledResponse(self, host_key, conn, response, url, reused)
+            except STALE_CONNECTION_ERRORS:
+                if conn is not None:
+                    conn.close()
+                if attempt == 0 and reused:
+                    with self._lock:
+                        self._host_stats(host_key)['stale_retries'] += 1
+                    continue
+                self._fail(host_key)
+                raise
+            except (OSError, http.client.HTTPException, socket.timeout):
+                if conn is not None:
+                    conn.close()
+                self._fail(host_key)
+                raise
+
+    def _fail(self, host_key):
+        with self._lock:
+            stats = self._host_stats(host_key)
+            stats['errors'] += 1
+            stats['in_flight'] -= 1
+        self._limits[host_key].release()
+
+    def get(self, url, headers=None, connect_timeout=None, read_timeout=None):
+        """GET url and return the full body as bytes"""
+        return self.open(url, headers=headers, connect_timeout=connect_timeout, read_timeout=read_timeout).read()
+
+    def stats(self):
+        """Connection reuse statistics, overall and per host"""
+        with self._lock:
+            hosts = {}
+            totals = {'requests': 0, 'connections_opened': 0, 'connections_reused': 0, 'stale_retries': 0, 'errors': 0}
+            for (scheme, host, port), counters in self._stats.items():
+                hosts[f"{scheme}://{host}:{port}"] = dict(
+                    counters,
+                    idle=len(self._idle.get((scheme, host, port), [])),
+                )
+                for key in totals:
+                    totals[key] += counters[key]
+
+        checkouts = totals['connections_opened'] + totals['connections_reused']
+        totals['reuse_ratio'] = round(totals['connections_reused'] / checkouts, 3) if checkouts else 0.0
+        return {'totals': totals, 'hosts': hosts}
+
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+# Process-wide pool shared by every caller
+http_pool = HTTPPool(
+    max_per_host=int(os.getenv('HTTP_MAX_PER_HOST', '4')),
+    connect_timeout=float(os.getenv('HTTP_CONNECT_TIMEOUT', '5')),
+    read_timeout=float(os.getenv('HTTP_READ_TIMEOUT', '20')),
+    idle_timeout=float(os.getenv('HTTP_IDLE_TIMEOUT', '60')),
+)
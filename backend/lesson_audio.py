@@ -0,0 +1,181 @@
+"""
+Lesson audio bundles
+All `audio: true` vocabulary and dialogue lines of a lesson joined into one MP3
+sprite (frame-aligned, silence between clips) plus an index of time and byte
+offsets. Each byte range is a valid MP3 on its own, so the frontend can slice
+the sprite into per-phrase clips after a single download.
+
+Bundles are addressed by a content hash (phrases + clip bytes), so the sprite
+URL is immutable and can be cached forever. Precompute them at build time with
+scripts/build_lesson_audio_bundles.py (opt-in on deploy, see render.yaml); the API
+builds missing ones on demand.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from audio_assembly import audio_frames, silence
+from audio_keys import canonical_tailo
+
+LESSONS_DIR = Path(__file__).parent.parent / 'src' / 'data' / 'lessons'
+BUNDLES_DIR = Path(os.getenv('LESSON_AUDIO_BUNDLES_DIR', Path(__file__).parent / 'data' / 'audio_bundles'))
+LESSON_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+BUNDLE_GAP_MS = 300
+
+
+def load_lesson(lesson_id):
+    """Lesson JSON by id, or None if there is no such lesson"""
+    if not LESSON_ID_PATTERN.match(lesson_id or ''):
+        return None
+    path = LESSONS_DIR / f'{lesson_id}.json'
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def lesson_phrases(lesson_data):
+    """Romanizations marked `audio: true`, in lesson order (vocabulary, then dialogue lines)"""
+    phrases = []
+    for vocab in lesson_data.get('vocabulary', []):
+        if vocab.get('audio', False) and vocab.get('romanization'):
+            phrases.append(vocab['romanization'])
+    for dialogue in lesson_data.get('dialogues', []):
+        for line in dialogue.get('lines', []):
+            if line.get('audio', False) and line.get('romanization'):
+                phrases.append(line['romanization'])
+    return phrases
+
+
+def phrases_hash(phrases):
+    """Hash of a lesson's phrase list (detects edited lessons with a stale bundle)"""
+    canonical = '\n'.join(canonical_tailo(p) for p in phrases)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def build_sprite(clips, gap_ms=BUNDLE_GAP_MS):
+    """
+    Join {canonical text: mp3 bytes} into one sprite, in the given order
+    Returns (sprite_bytes, {canonical text: index entry}, skipped texts); clips in
+    a different MPEG format than the first one are skipped (no re-encoding)
+    """
+    parts = []
+    entries = {}
+    skipped = []
+    first_header = None
+    offset_bytes = 0
+    offset_ms = 0.0
+
+    for text, clip in clips.items():
+        frames = audio_frames(clip)
+        if not frames:
+            skipped.append(text)
+            continue
+        header = frames[0][1]
+        if first_header is None:
+            first_header = header
+        elif (header['sample_rate'], header['channels'], header['version'], header['layer']) != \
+                (first_header['sample_rate'], first_header['channels'], first_header['version'], first_header['layer']):
+            skipped.append(text)
+            continue
+
+        if parts and gap_ms:
+            gap = silence(first_header, gap_ms)
+            parts.append(gap)
+            offset_bytes += len(gap)
+            offset_ms += len(audio_frames(gap)) * first_header['samples'] * 1000.0 / first_header['sample_rate']
+
+        audio = b''.join(frame for frame, _ in frames)
+        duration = sum(h['samples'] * 1000.0 / h['sample_rate'] for _, h in frames)
+        entries[text] = {
+            'offset_ms': round(offset_ms),
+            'duration_ms': round(duration),
+            'start_byte': offset_bytes,
+            'length': len(audio),
+        }
+        parts.append(audio)
+        offset_bytes += len(audio)
+        offset_ms += duration
+
+    return b''.join(parts), entries, skipped
+
+
+def build_bundle(lesson_id, phrases, load_clips, gap_ms=BUNDLE_GAP_MS):
+    """
+    Build the manifest and sprite for a lesson
+    load_clips(texts) returns {text: mp3 bytes} for the texts it could get.
+    Returns (manifest, sprite_bytes); manifest['missing'] lists phrases not in the sprite.
+    """
+    order = []
+    for phrase in phrases:
+        key = canonical_tailo(phrase)
+        if key not in order:
+            order.append(key)
+
+    loaded = load_clips(order)
+    clips = {key: loaded[key] for key in order if key in loaded}
+    sprite, entries, skipped = build_sprite(clips, gap_ms)
+
+    digest = hashlib.sha256()
+    for key in order:
+        if key in entries:
+            digest.update(key.encode('utf-8') + b'\0' + hashlib.sha256(clips[key]).digest())
+    bundle_hash = digest.hexdigest()[:24]
+
+    manifest = {
+        'lesson_id': lesson_id,
+        'hash': bundle_hash,
+        'phrases_hash': phrases_hash(phrases),
+        'gap_ms': gap_ms,
+        'size': len(sprite),
+        'clips': [
+            dict(entries[canonical_tailo(phrase)], romanization=phrase)
+            for phrase in phrases if canonical_tailo(phrase) in entries
+        ],
+        'missing': [phrase for phrase in phrases if canonical_tailo(phrase) not in entries],
+    }
+    if skipped:
+        print(f"⚠️  {lesson_id}: {len(skipped)} clips skipped (no frames or different MPEG format)")
+    return manifest, sprite
+
+
+def sprite_path(bundle_hash):
+    return BUNDLES_DIR / f'{bundle_hash}.mp3'
+
+
+def manifest_path(lesson_id):
+    return BUNDLES_DIR / f'{lesson_id}.json'
+
+
+def save_bundle(manifest, sprite):
+    """
+    Write the sprite (by hash) to BUNDLES_DIR, and the lesson's manifest if the
+    bundle is complete (an incomplete one is rebuilt later)
+    """
+    BUNDLES_DIR.mkdir(parents=True, exist_ok=True)
+    path = sprite_path(manifest['hash'])
+    if not path.exists():
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_bytes(sprite)
+        os.replace(tmp_path, path)
+    if manifest['missing']:
+        return
+    with open(manifest_path(manifest['lesson_id']), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+
+def load_saved_bundle(lesson_id, phrases):
+    """Precomputed manifest for a lesson if it is complete and still matches the lesson's phrases"""
+    try:
+        with open(manifest_path(lesson_id), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('phrases_hash') != phrases_hash(phrases) or manifest.get('missing'):
+        return None
+    if not sprite_path(manifest['hash']).exists():
+        return None
+    return manifest
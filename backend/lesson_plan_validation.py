@@ -0,0 +1,206 @@
+"""
+Shared helpers for the lesson plan validators (validate_lesson_plan.py, validate_and_fix_lesson_plan.py)
+- parse_vocab_line(): '- Taiwanese (romanization) → Mandarin (pinyin) - English'
+- romanize_in_process(): the /api/romanize Taiwanese pipeline (MOE dictionary + Tau-Phah-Ji)
+  imported from app.py, without a running server or translation calls
+- ResultCache: results keyed by hash of (text, dictionary version), so a re-run
+  after editing one unit only re-checks the changed lines
+- romanize_all(): cached, parallel (one app import per worker process)
+- load_golden_set(): curated lesson plan items with the approved fixes applied (benchmark_romanization.py)
+"""
+
+import ast
+import hashlib
+import inspect
+import json
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+CACHE_FILE = Path(__file__).parent / 'data' / 'lesson_validation_cache.json'
+LESSON_PLAN_FILE = Path(__file__).parent.parent / 'LESSON_PLAN.md'
+APPROVED_FIXES_FILE = Path(__file__).parent / 'scripts' / 'apply_fixes.py'
+VOCAB_LINE = re.compile(r'^-\s+([^\(]+)\s+\(([^\)]+)\)\s+→\s+([^\(]+)\s+\(([^\)]+)\)\s+-\s+(.+)$')
+
+_app = None
+
+
+def parse_vocab_line(line):
+    """
+    Parse a vocabulary line in format:
+    - Taiwanese (romanization) → Mandarin (pinyin) - English
+    """
+    match = VOCAB_LINE.match(line.strip())
+    if match:
+        return {
+            'taiwanese': match.group(1).strip(),
+            'romanization': match.group(2).strip(),
+            'mandarin': match.group(3).strip(),
+            'pinyin': match.group(4).strip(),
+            'english': match.group(5).strip(),
+            'original_line': line
+        }
+    return None
+
+
+def approved_fixes(path=APPROVED_FIXES_FILE):
+    """{line_number: (old_text, new_text)} of the manually reviewed corrections in apply_fixes.py"""
+    tree = ast.parse(Path(path).read_text(encoding='utf-8'))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'fixes' for t in node.targets):
+            return ast.literal_eval(node.value)
+    return {}
+
+
+def load_golden_set(path=LESSON_PLAN_FILE, fixes_path=APPROVED_FIXES_FILE):
+    """
+    Vocabulary items of LESSON_PLAN.md as benchmark cases, with the approved fixes
+    applied where the plan still has the old text
+    Each case: line, text (first Han variant), expected (accepted romanizations, NFC), fixed
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+
+    fixes = approved_fixes(fixes_path) if Path(fixes_path).exists() else {}
+    cases = []
+    for i, line in enumerate(lines, 1):
+        fixed = False
+        if i in fixes and fixes[i][0] in line:
+            line = line.replace(fixes[i][0], fixes[i][1])
+            fixed = True
+        vocab = parse_vocab_line(line)
+        if not vocab:
+            continue
+        # '二/兩 (nn̄g/jī)', '火車 (hué-tshia / hé-tshia)': any listed reading is accepted
+        expected = [unicodedata.normalize('NFC', r.strip()) for r in vocab['romanization'].split('/') if r.strip()]
+        cases.append({
+            'line': i,
+            'text': vocab['taiwanese'].split('/')[0].strip(),
+            'expected': expected,
+            'fixed': fixed,
+        })
+    return cases
+
+
+def load_pipeline():
+    """Import app.py once per process, with background audio prefetch switched off"""
+    global _app
+    if _app is None:
+        os.environ['AUDIO_PREFETCH_ENABLED'] = 'false'
+        import app
+        _app = app
+    return _app
+
+
+def dictionary_version():
+    """Hash of the loaded dictionary (incl. manual entries) and of the romanization code"""
+    app = load_pipeline()
+    digest = hashlib.sha256()
+    digest.update(json.dumps(sorted(app.moe_dict.items()), ensure_ascii=False).encode('utf-8'))
+    for function in (app.get_taiwanese_romanization, app.normalize_taiwanese_text,
+                     app.search_in_definitions, app.convert_kip_to_tailo):
+        digest.update(inspect.getsource(function).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def romanize_in_process(text):
+    """Same romanization and Han characters /api/romanize returns for Taiwanese input"""
+    app = load_pipeline()
+    try:
+        kip, han = app.get_taiwanese_romanization(text)
+        return {'han': han, 'romanization': app.convert_kip_to_tailo(kip), 'success': True}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+
+def _romanize_quietly(text):
+    # Worker processes: the pipeline prints a line per lookup
+    import contextlib
+    import io
+    with contextlib.redirect_stdout(io.StringIO()):
+        return text, romanize_in_process(text)
+
+
+def _init_worker():
+    import contextlib
+    import io
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_pipeline()
+
+
+class ResultCache:
+    """Romanization results of one dictionary version, persisted as JSON"""
+
+    def __init__(self, version, path=CACHE_FILE):
+        self.version = version
+        self.path = Path(path)
+        self.results = {}
+        self.hits = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == version:
+                self.results = data.get('results', {})
+        except (OSError, ValueError):
+            pass
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.version}\0{text}".encode('utf-8')).hexdigest()[:24]
+
+    def get(self, text):
+        result = self.results.get(self.key(text))
+        if result is not None:
+            self.hits += 1
+        return result
+
+    def put(self, text, result):
+        # API errors are not cached so they are retried next run
+        if result.get('success'):
+            self.results[self.key(text)] = result
+
+    def save(self):
+        os.makedirs(self.path.parent, exist_ok=True)
+        tmp_path = str(self.path) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'results': self.results}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def romanize_all(texts, workers=None, cache=True):
+    """
+    {text: result} for every text: cached results for this dictionary version first,
+    the rest romanized in parallel worker processes
+    """
+    import contextlib
+    import io
+    with contextlib.redirect_stdout(io.StringIO()):
+        version = dictionary_version()
+    result_cache = ResultCache(version) if cache else None
+
+    results = {}
+    todo = []
+    for text in dict.fromkeys(texts):
+        cached = result_cache.get(text) if result_cache else None
+        if cached is not None:
+            results[text] = cached
+        else:
+            todo.append(text)
+
+    workers = workers or os.cpu_count() or 1
+    if len(todo) < 2 * workers or workers == 1:
+        for text in todo:
+            results[text] = _romanize_quietly(text)[1]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            for text, result in executor.map(_romanize_quietly, todo, chunksize=8):
+                results[text] = result
+
+    if result_cache:
+        for text in todo:
+            result_cache.put(text, results[text])
+        result_cache.save()
+    print(f"Romanized {len(results)} items in-process: {len(todo)} checked, "
+          f"{len(results) - len(todo)} unchanged since the last run (dictionary {version})")
+    return results
@@ -0,0 +1,110 @@
+"""
+Size-bounded in-memory audio cache
+Evicts the least frequently used clips (decayed access frequency) once the byte budget is exceeded,
+in batches down to a low-water mark so the ranking is not redone on every insert.
+Clips larger than a fraction of the budget are not cached at all: one of them
+would flush most of the cache.
+"""
+
+import threading
+import time
+
+
+class AudioMemoryCache:
+    """
+    Dict-like cache of key -> audio bytes
+    frequency(key) returns the access score used for eviction (higher = keep);
+    ties are broken by least recent write/read. It is called without the lock held.
+    """
+
+    def __init__(self, max_bytes, frequency=None, low_water=0.9, max_entry_fraction=0.1):
+        self.max_bytes = max_bytes
+        self.frequency = frequency or (lambda key: 0.0)
+        # Eviction frees space down to this many bytes
+        self.low_water_bytes = int(max_bytes * low_water)
+        # Larger values are not cached
+        self.max_entry_bytes = int(max_bytes * max_entry_fraction)
+
+        self._lock = threading.Lock()
+        self._data = {}
+        self._touched = {}
+        self._bytes = 0
+        self._evictions = 0
+        self._rejected = 0
+        self._evicting = False
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __getitem__(self, key):
+        with self._lock:
+            value = self._data[key]
+            self._touched[key] = time.monotonic()
+            return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if key in self._data:
+                self._bytes -= len(self._data.pop(key))
+                del self._touched[key]
+            if len(value) > self.max_entry_bytes:
+                self._rejected += 1
+                return
+            self._data[key] = value
+            self._touched[key] = time.monotonic()
+            self._bytes += len(value)
+            if self._bytes <= self.max_bytes or self._evicting:
+                return
+            # One eviction at a time; inserts during it are covered by the low-water mark
+            self._evicting = True
+            candidates = [(other, touched) for other, touched in self._touched.items() if other != key]
+        try:
+            self._evict(candidates)
+        finally:
+            with self._lock:
+                self._evicting = False
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data.pop(key)
+            del self._touched[key]
+            self._bytes -= len(value)
+            return value
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def _evict(self, candidates):
+        # Rank a snapshot of (key, last touched) without the lock, since frequency()
+        # may be slow, then drop the coldest entries still cached until under the
+        # low-water mark, so the next few inserts fit without another ranking
+        ranked = sorted(candidates, key=lambda item: (self.frequency(item[0]), item[1]))
+        with self._lock:
+            for key, _ in ranked:
+                if self._bytes <= self.low_water_bytes:
+                    break
+                if key not in self._data:
+                    continue
+                self._bytes -= len(self._data.pop(key))
+                del self._touched[key]
+                self._evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self._evictions,
+                'rejected': self._rejected,
+            }
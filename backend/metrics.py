@@ -0,0 +1,293 @@
+"""
+Per-stage latency metrics in Prometheus text format (served on /metrics)
+- taigi_stage_duration_seconds{endpoint, stage}: histogram per pipeline stage and
+  upstream call (dictionary lookup, definition search, segmentation, tauphahji,
+  claude.<call>, supabase.*, hapsing.*), inclusive of nested stages (segmentation
+  contains the lookups and Claude calls it makes)
+- taigi_stage_self_seconds{endpoint, stage}: the same, excluding time spent in
+  nested timed stages on the same thread; compare stages with this one
+- taigi_stage_errors_total{endpoint, stage}: stages that raised
+- taigi_audio_tier_total{endpoint, tier}: which cache tier served an /api/audio
+  response (one count per response)
+- taigi_audio_load_total{endpoint, tier}: tier of internal audio loads (chunks,
+  variant originals, lesson bundles, prefetch, warmup)
+- taigi_http_request_duration_seconds{endpoint, method, status}: whole requests,
+  including streamed bodies
+- collectors registered with @collector (e.g. Hapsing hedging/circuit counters),
+  sampled at render time
+The endpoint label is the Flask route of the request being handled; work on
+other threads (prefetch, warmup, write-backs) is labelled 'background' unless
+submitted with bind(). Counts are per process: under gunicorn every worker
+reports its own series, told apart by the worker label.
+"""
+
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_endpoint = contextvars.ContextVar('metrics_endpoint', default='background')
+# Innermost running timer on this thread ([seconds spent in nested stages]), for self time
+_parent_timer = contextvars.ContextVar('metrics_parent_timer', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self, constant):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for values, count in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels + constant[0], values + constant[1])} {count}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # label values → [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[index] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self, constant):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        names = self.labels + constant[0]
+        with self._lock:
+            for values, series in sorted(self._series.items()):
+                values = values + constant[1]
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{_format_labels(names, values, [("le", f"{bound:g}")])} {count}')
+                lines.append(f'{self.name}_bucket{_format_labels(names, values, [("le", "+Inf")])} {series[-1]}')
+                lines.append(f'{self.name}_sum{_format_labels(names, values)} {series[-2]:.6f}')
+                lines.append(f'{self.name}_count{_format_labels(names, values)} {series[-1]}')
+        return lines
+
+
+stage_seconds = Histogram('taigi_stage_duration_seconds', 'Time spent in a pipeline stage or upstream call',
+                          ['endpoint', 'stage'])
+stage_self_seconds = Histogram('taigi_stage_self_seconds', 'Time spent in a stage excluding nested timed stages',
+                               ['endpoint', 'stage'])
+stage_errors = Counter('taigi_stage_errors_total', 'Pipeline stages or upstream calls that raised',
+                       ['endpoint', 'stage'])
+audio_tiers = Counter('taigi_audio_tier_total', 'Audio responses by the cache tier that served them',
+                      ['endpoint', 'tier'])
+audio_loads = Counter('taigi_audio_load_total', 'Internal audio loads by the cache tier that served them',
+                      ['endpoint', 'tier'])
+request_seconds = Histogram('taigi_http_request_duration_seconds', 'Request time including streamed bodies',
+                            ['endpoint', 'method', 'status'])
+REGISTRY = [request_seconds, stage_seconds, stage_self_seconds, stage_errors, audio_tiers, audio_loads]
+_collectors = []
+
+
+def current_endpoint():
+    return _endpoint.get()
+
+
+def set_endpoint(name):
+    _endpoint.set(name)
+
+
+def bind(fn):
+    """fn bound to the caller's endpoint label, for submitting to a thread pool"""
+    context = contextvars.copy_context()
+    # Concurrent work is not nested time of the submitting stage
+    context.run(_parent_timer.set, None)
+    return functools.partial(context.run, fn)
+
+
+class timed:
+    """
+    Time a stage: `with metrics.timed('segmentation'):` or as a decorator
+    (`@metrics.timed('definition_search')`)
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._started = []
+
+    def __enter__(self):
+        nested = [0.0]
+        self._started.append((time.perf_counter(), _parent_timer.get(), nested))
+        _parent_timer.set(nested)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        started, parent, nested = self._started.pop()
+        elapsed = time.perf_counter() - started
+        _parent_timer.set(parent)
+        if parent is not None:
+            parent[0] += elapsed
+        endpoint = _endpoint.get()
+        stage_seconds.observe(elapsed, endpoint, self.stage)
+        stage_self_seconds.observe(max(0.0, elapsed - nested[0]), endpoint, self.stage)
+        if exc_type is not None:
+            stage_errors.inc(endpoint, self.stage)
+        return False
+
+    def __call__(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            # A fresh timer per call: the decorated function may run on several threads at once
+            with timed(self.stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def instrument(stage, fn):
+    """fn wrapped so every call is timed as stage"""
+    return timed(stage)(fn)
+
+
+def audio_tier(tier):
+    """Count an /api/audio response served from tier (memory, supabase, hapsing, chunked, ...)"""
+    audio_tiers.inc(_endpoint.get(), tier)
+
+
+def audio_load(tier):
+    """Count an internal audio load (chunk, variant original, bundle, prefetch) served from tier"""
+    audio_loads.inc(_endpoint.get(), tier)
+
+
+def collector(fn):
+    """
+    Register fn() -> [(name, type, help, {label: value}, value)], sampled on every
+    render; for counters kept elsewhere (e.g. hapsing.stats())
+    """
+    _collectors.append(fn)
+    return fn
+
+
+def _render_collected(constant):
+    families = {}
+    for fn in _collectors:
+        try:
+            samples = fn()
+        except Exception as e:
+            print(f"⚠️  Metrics collector {fn.__name__} failed: {e}")
+            continue
+        for name, kind, help_text, labels, value in samples:
+            families.setdefault(name, (kind, help_text, []))[2].append((labels, value))
+
+    lines = []
+    for name, (kind, help_text, samples) in families.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for labels, value in samples:
+            names, values = tuple(labels) + constant[0], tuple(labels.values()) + constant[1]
+            lines.append(f'{name}{_format_labels(names, values)} {value}')
+    return lines
+
+
+class _TimedStream:
+    """Context manager around a Claude message stream, timed until the stream is closed"""
+
+    def __init__(self, stream, stage):
+        self._stream = stream
+        self._timer = timed(stage)
+
+    def __enter__(self):
+        self._timer.__enter__()
+        try:
+            return self._stream.__enter__()
+        except BaseException:
+            self._timer.__exit__(*sys.exc_info())
+            raise
+
+    def __exit__(self, *exc_info):
+        try:
+            return self._stream.__exit__(*exc_info)
+        finally:
+            self._timer.__exit__(*exc_info)
+
+
+class _TimedMessages:
+    def __init__(self, messages):
+        self._messages = messages
+
+    @staticmethod
+    def _stage():
+        # Named after the calling function (translate_taiwanese_to_english, generate_vocab, ...)
+        return f"claude.{sys._getframe(2).f_code.co_name}"
+
+    def create(self, *args, **kwargs):
+        with timed(self._stage()):
+            return self._messages.create(*args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        return _TimedStream(self._messages.stream(*args, **kwargs), self._stage() + '_stream')
+
+    def __getattr__(self, name):
+        return getattr(self._messages, name)
+
+
+class InstrumentedAnthropic:
+    """Anthropic client whose messages.create/stream calls are timed as claude.<calling function>"""
+
+    def __init__(self, client):
+        self._client = client
+        self.messages = _TimedMessages(client.messages)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def init_app(app):
+    """Label each request with its route and time it, including streamed response bodies"""
+    from flask import g, request
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        set_endpoint(request.url_rule.rule if request.url_rule is not None else 'unmatched')
+
+    @app.after_request
+    def observe_request(response):
+        started = g.get('metrics_started')
+        if started is not None:
+            labels = (current_endpoint(), request.method, str(response.status_code))
+            response.call_on_close(lambda: request_seconds.observe(time.perf_counter() - started, *labels))
+        return response
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    constant = (('worker',), (str(os.getpid()),))
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render(constant))
+    lines.extend(_render_collected(constant))
+    return '\n'.join(lines) + '\n'
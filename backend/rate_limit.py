@@ -0,0 +1,77 @@
+"""
+Token-bucket rate limiter and retry backoff shared by background audio work and
+the generation scripts
+"""
+
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Allows `rate` operations per second on average with bursts of up to `burst`
+    acquire() blocks until a token is available; it is safe to share across threads
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens without waiting; returns False if not enough are available"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """Wait until tokens are available; returns False if timeout expires first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate if self.rate > 0 else 1.0
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2^attempt))"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_with_backoff(call, retries=3, base=1.0, cap=30.0, retryable=None, on_retry=None):
+    """
+    Run call() and retry failures for which retryable(error) is true, sleeping
+    backoff_delay() between attempts (at least the error's retry_after, if any)
+    on_retry(error, attempt, delay) is called before each retry; the last error is raised
+    """
+    for attempt in range(retries + 1):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == retries or (retryable is not None and not retryable(e)):
+                raise
+            delay = max(backoff_delay(attempt, base, cap), getattr(e, 'retry_after', 0) or 0)
+            if on_retry:
+                on_retry(e, attempt + 1, delay)
+            time.sleep(delay)
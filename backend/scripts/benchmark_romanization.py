@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Romanization accuracy and throughput benchmark on the lesson plan golden set
+
+Runs get_taiwanese_romanization and romanize_sentence_with_word_lookup in-process
+over the curated LESSON_PLAN.md vocabulary (with the approved corrections of
+apply_fixes.py applied) and reports, per function:
+  - exact-match accuracy (NFC-normalized; any reading listed with '/' counts)
+  - items/sec and p50/p99 latency
+Compared against a saved baseline, exits 1 when accuracy drops or throughput
+falls by more than the tolerance, and lists the items whose output changed.
+
+Claude (heteronym disambiguation in sentence context) is switched off by default,
+so timings measure this repo's code and outputs are deterministic; --live-claude
+keeps the configured client (network latency, API cost per pass). The baseline
+records which mode it was taken in; throughput is only gated within one mode.
+
+Usage:
+  python benchmark_romanization.py --save-baseline     # before a change
+  python benchmark_romanization.py                     # after: fails on regression
+  python benchmark_romanization.py --repeat 5 --throughput-tolerance 0.1
+  python benchmark_romanization.py --live-claude --repeat 1
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lesson_plan_validation import load_golden_set, load_pipeline
+
+DEFAULT_BASELINE = Path(__file__).parent.parent / 'data' / 'romanization_benchmark.json'
+
+
+def nfc(text):
+    return unicodedata.normalize('NFC', text or '').strip()
+
+
+def loose(text):
+    """Case, spacing, hyphen and punctuation insensitive form (reported, not gated)"""
+    return re.sub(r"[\s\-?!.,，。？！]", '', nfc(text).casefold())
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def pipeline_functions(app):
+    """name → text → Tâi-lô, as the API endpoints produce them"""
+    def word(text):
+        kip, _ = app.get_taiwanese_romanization(text)
+        return app.convert_kip_to_tailo(kip)
+
+    return {
+        'get_taiwanese_romanization': word,
+        'romanize_sentence_with_word_lookup': app.romanize_sentence_with_word_lookup,
+    }
+
+
+def run_benchmark(function, cases, repeat):
+    """Outputs of the first pass, latencies of every pass"""
+    outputs = []
+    latencies = []
+    for run in range(repeat):
+        for case in cases:
+            started = time.perf_counter()
+            try:
+                output = function(case['text'])
+            except Exception as e:
+                output = f"<error: {e}>"
+            latencies.append(time.perf_counter() - started)
+            if run == 0:
+                outputs.append(nfc(output))
+    return outputs, latencies
+
+
+def summarize(cases, outputs, latencies):
+    exact = sum(1 for case, output in zip(cases, outputs) if output in case['expected'])
+    lenient = sum(1 for case, output in zip(cases, outputs)
+                  if loose(output) in {loose(expected) for expected in case['expected']})
+    total_seconds = sum(latencies)
+    return {
+        'items': len(cases),
+        'exact': exact,
+        'accuracy': round(exact / len(cases), 4) if cases else 0.0,
+        'loose_accuracy': round(lenient / len(cases), 4) if cases else 0.0,
+        'items_per_sec': round(len(latencies) / total_seconds, 2) if total_seconds else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def compare(name, stats, outputs, cases, baseline, args, check_throughput=True):
+    """Regression messages for one function against the baseline"""
+    failures = []
+    previous = baseline.get('functions', {}).get(name)
+    if not previous:
+        return failures
+
+    if stats['accuracy'] < previous['accuracy'] - args.accuracy_tolerance:
+        failures.append(f"{name}: accuracy {previous['accuracy']:.2%} → {stats['accuracy']:.2%}")
+    min_rate = previous['items_per_sec'] * (1 - args.throughput_tolerance)
+    if check_throughput and stats['items_per_sec'] < min_rate:
+        failures.append(f"{name}: throughput {previous['items_per_sec']:.1f} → {stats['items_per_sec']:.1f} items/s "
+                        f"(allowed down to {min_rate:.1f})")
+
+    before = previous.get('outputs', {})
+    changed = [(case, before[str(case['line'])], output) for case, output in zip(cases, outputs)
+               if str(case['line']) in before and before[str(case['line'])] != output]
+    if changed:
+        print(f"\n  {len(changed)} outputs changed since the baseline:")
+        for case, old, new in changed[:20]:
+            mark = '✅' if new in case['expected'] else ('❌' if old in case['expected'] else '~')
+            print(f"    {mark} line {case['line']} {case['text']}: {old} → {new}  (expected {' / '.join(case['expected'])})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Romanization accuracy/throughput benchmark on LESSON_PLAN.md')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed passes over the golden set (default: 3)')
+    parser.add_argument('--function', choices=['get_taiwanese_romanization', 'romanize_sentence_with_word_lookup'],
+                        action='append', help='Function to benchmark (repeatable; default: both)')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help=f'Baseline file (default: {DEFAULT_BASELINE})')
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run as the new baseline')
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.0,
+                        help='Allowed accuracy drop, as a fraction (default: 0)')
+    parser.add_argument('--throughput-tolerance', type=float, default=0.2,
+                        help='Allowed items/sec drop, as a fraction of the baseline (default: 0.2)')
+    parser.add_argument('--show-misses', type=int, default=0, help='Print up to N items that do not match')
+    parser.add_argument('--live-claude', action='store_true',
+                        help='Keep the configured Anthropic client for disambiguation (default: off)')
+    args = parser.parse_args()
+    claude = 'live' if args.live_claude else 'off'
+
+    cases = load_golden_set()
+    fixed = sum(1 for case in cases if case['fixed'])
+    print(f"Golden set: {len(cases)} items from LESSON_PLAN.md ({fixed} with approved fixes applied)")
+
+    # The pipeline prints per lookup; keep that out of both the report and the timings
+    with open(os.devnull, 'w') as devnull:
+        with redirect_stdout(devnull):
+            app = load_pipeline()
+        if not args.live_claude:
+            app.anthropic_client = None
+        elif app.anthropic_client is None:
+            print("⚠️  --live-claude given but no ANTHROPIC_API_KEY is configured: Claude stays off")
+            claude = 'off'
+        print(f"Claude disambiguation: {claude}")
+        functions = pipeline_functions(app)
+        names = args.function or list(functions)
+
+        results = {}
+        for name in names:
+            function = functions[name]
+            with redirect_stdout(devnull):
+                function(cases[0]['text'])  # warm-up
+                outputs, latencies = run_benchmark(function, cases, args.repeat)
+            results[name] = (summarize(cases, outputs, latencies), outputs)
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    # Baselines from before the mode was recorded were taken with whatever .env configured
+    baseline_claude = baseline.get('claude')
+    check_throughput = baseline_claude == claude
+    if baseline and not check_throughput:
+        print(f"\n⚠️  Baseline was recorded with Claude {baseline_claude or 'unknown'}, this run is {claude}: "
+              f"throughput is not compared (re-record with --save-baseline)")
+
+    failures = []
+    for name, (stats, outputs) in results.items():
+        previous = baseline.get('functions', {}).get(name, {})
+        print(f"\n{name}")
+        print(f"  Accuracy: {stats['exact']}/{stats['items']} exact ({stats['accuracy']:.2%})"
+              f", {stats['loose_accuracy']:.2%} ignoring case/spacing"
+              + (f"  [baseline {previous['accuracy']:.2%}]" if previous else ''))
+        print(f"  Throughput: {stats['items_per_sec']:.1f} items/s, p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms"
+              + (f"  [baseline {previous['items_per_sec']:.1f} items/s]" if previous else ''))
+        if args.show_misses:
+            misses = [(case, output) for case, output in zip(cases, outputs) if output not in case['expected']]
+            for case, output in misses[:args.show_misses]:
+                print(f"    line {case['line']} {case['text']}: {output}  (expected {' / '.join(case['expected'])})")
+        failures += compare(name, stats, outputs, cases, baseline, args, check_throughput)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'repeat': args.repeat,
+                'claude': claude,
+                'functions': {
+                    name: dict(stats, outputs={str(case['line']): output for case, output in zip(cases, outputs)})
+                    for name, (stats, outputs) in results.items()
+                },
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ Baseline saved to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    if failures:
+        print("\n❌ Regression:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\n✅ No regression against the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Incremental audio build across every source (see audio_manifest.py)
+
+1. Collects lessons, tone sandhi drills and ranked dictionary entries into one
+   deduplicated manifest (written to backend/data/audio_manifest.json)
+2. Diffs it against audio_cache and the recipe hashes of earlier builds
+   (backend/data/audio_build_state.json)
+3. Generates only new clips and clips whose recipe changed, on the concurrent
+   rate-limited pipeline of generate_audio_supabase.py (journaled, resumable)
+
+Usage:
+  python build_audio.py                          # everything that is missing or stale
+  python build_audio.py --source lessons --source tone-sandhi
+  python build_audio.py --priority-tier 1 --dry-run
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from audio_manifest import (SOURCES, MANIFEST_FILE, RECIPE_VERSION, collect_items, build_manifest,
+                            diff_manifest, load_build_state, save_build_state, save_json)
+from audio_metadata import fetch_cached_texts
+from generation_journal import GenerationJournal
+from generate_audio_supabase import DEFAULT_JOURNAL, SupabaseAudioGenerator
+
+# Load environment variables from .env file
+env_path = Path(__file__).parent.parent.parent / '.env'
+load_dotenv(env_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build all missing or stale audio clips')
+    parser.add_argument('--source', choices=SOURCES, action='append',
+                        help='Source to include (repeatable; default: all)')
+    parser.add_argument('--priority-tier', type=int, choices=[1, 2, 3],
+                        help='Only this tier of the ranked dictionary entries')
+    parser.add_argument('--dry-run', action='store_true', help='Write the manifest and print the plan only')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Clips generated concurrently (default: 4)')
+    parser.add_argument('--hapsing-rate', type=float, default=1.0,
+                        help='Max Hapsing requests per second (default: 1.0)')
+    parser.add_argument('--supabase-rate', type=float, default=10.0,
+                        help='Max Supabase requests per second (default: 10)')
+    parser.add_argument('--no-journal', action='store_true', help='Do not read or write the run journal')
+    args = parser.parse_args()
+
+    sources = args.source or list(SOURCES)
+    started = time.time()
+    entries = build_manifest(collect_items(sources, priority_tier_filter=args.priority_tier))
+    save_json(MANIFEST_FILE, {'recipe_version': RECIPE_VERSION, 'sources': sources, 'entries': entries})
+    print(f"Manifest: {len(entries)} clips from {', '.join(sources)} → {MANIFEST_FILE}")
+
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    if not supabase_url or not supabase_key:
+        print("❌ Missing Supabase credentials!")
+        print("\nPlease set environment variables:")
+        print("  export SUPABASE_URL='your-project-url'")
+        print("  export SUPABASE_KEY='your-service-role-key'")
+        return 1
+
+    supabase: Client = create_client(supabase_url, supabase_key)
+    built = load_build_state()
+    cached = fetch_cached_texts(supabase)
+    new, changed, up_to_date, adopted = diff_manifest(entries, cached, built)
+    print(f"Plan: {len(new)} new, {len(changed)} changed, {len(up_to_date) + len(adopted)} up to date "
+          f"({time.time() - started:.1f}s)")
+
+    # Clips cached before build state was kept are taken as built with the current recipe
+    for entry in adopted:
+        built[entry['key']] = entry['hash']
+    if adopted and not args.dry_run:
+        save_build_state(built)
+
+    todo = new + changed
+    if args.dry_run or not todo:
+        for entry in todo[:20]:
+            print(f"  {'+' if entry in new else '~'} {entry['romanization']} ({', '.join(entry['sources'])})")
+        if not todo:
+            print("✅ Nothing to build")
+        return 0
+
+    journal = None if args.no_journal else GenerationJournal(str(DEFAULT_JOURNAL))
+    generator = SupabaseAudioGenerator(supabase, entries=todo, rebuild={e['key'] for e in changed},
+                                       hapsing_rate=args.hapsing_rate, supabase_rate=args.supabase_rate,
+                                       journal=journal)
+    try:
+        generator.generate_all(workers=args.workers)
+    finally:
+        if journal:
+            journal.close()
+        hashes = {entry['key']: entry['hash'] for entry in todo}
+        for key in generator.completed_keys:
+            if key in hashes:
+                built[key] = hashes[key]
+        save_build_state(built)
+
+    failed = len(todo) - len(generator.completed_keys & {entry['key'] for entry in todo})
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Precompute lesson audio bundles (see lesson_audio.py)
+For every lesson in src/data/lessons (or the ids given), fetches the audio of all
+`audio: true` lines - from the Supabase cache when configured, otherwise from
+Hapsing - and writes the sprite and manifest to backend/data/audio_bundles/.
+The API serves these as is, so a lesson loads its audio in one request.
+
+Usage:
+  python build_lesson_audio_bundles.py            # all lessons
+  python build_lesson_audio_bundles.py unit-01    # specific lessons
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import hapsing
+import lesson_audio
+from http_pool import http_pool, HTTPStatusError
+from audio_keys import audio_storage_path
+
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).parent.parent.parent / '.env')
+
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_BUCKET = 'taiwanese-audio'
+
+
+def fetch_clip(text):
+    """Cached clip from Supabase Storage if present, otherwise synthesized by Hapsing"""
+    if SUPABASE_URL:
+        url = f"{SUPABASE_URL}/storage/v1/object/public/{SUPABASE_BUCKET}/{audio_storage_path(text)}"
+        try:
+            return http_pool.get(url, read_timeout=15), 'supabase'
+        except HTTPStatusError as e:
+            if e.status not in (400, 404):
+                raise
+    return hapsing.fetch_audio(text, timeout=60), 'hapsing'
+
+
+def load_clips(texts):
+    clips = {}
+    for i, text in enumerate(texts, 1):
+        try:
+            audio_data, source = fetch_clip(text)
+        except Exception as e:
+            print(f"  [{i}/{len(texts)}] ❌ {text}: {e}")
+            continue
+        if not hapsing.looks_like_mp3(audio_data):
+            print(f"  [{i}/{len(texts)}] ❌ {text}: not MP3 data")
+            continue
+        clips[text] = audio_data
+        print(f"  [{i}/{len(texts)}] ✓ {text} ({len(audio_data)} bytes, {source})")
+        if source == 'hapsing':
+            time.sleep(1)  # Be gentle with the synthesis API
+    return clips
+
+
+def build_lesson(lesson_id):
+    lesson_data = lesson_audio.load_lesson(lesson_id)
+    if lesson_data is None:
+        print(f"❌ Lesson file not found: {lesson_id}")
+        return False
+
+    phrases = lesson_audio.lesson_phrases(lesson_data)
+    if lesson_audio.load_saved_bundle(lesson_id, phrases):
+        print(f"✓ {lesson_id}: bundle up to date")
+        return True
+
+    print(f"\n📦 {lesson_id}: {len(phrases)} audio lines")
+    manifest, sprite = lesson_audio.build_bundle(lesson_id, phrases, load_clips)
+    lesson_audio.save_bundle(manifest, sprite)
+
+    print(f"✓ {lesson_id}: {manifest['hash']}.mp3 ({manifest['size'] / 1024:.0f} KB, {len(manifest['clips'])} clips)")
+    if manifest['missing']:
+        print(f"⚠️  {len(manifest['missing'])} missing, manifest not saved (rerun to retry): {manifest['missing']}")
+        return False
+    return True
+
+
+def main():
+    lesson_ids = sys.argv[1:] or sorted(path.stem for path in lesson_audio.LESSONS_DIR.glob('*.json'))
+    print(f"Building audio bundles for {len(lesson_ids)} lessons → {lesson_audio.BUNDLES_DIR}")
+
+    failed = [lesson_id for lesson_id in lesson_ids if not build_lesson(lesson_id)]
+
+    print(f"\n{'=' * 70}")
+    print(f"Bundles complete: {len(lesson_ids) - len(failed)}/{len(lesson_ids)}")
+    if failed:
+        print(f"Incomplete: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,18 +2,24 @@
 """
 Pre-generate and cache all audio for a lesson to Supabase
 This makes audio playback instant for all users
+Hapsing requests are paced to HAPSING_RATE per second (default 1)
+(build_audio.py builds every lesson together with the other audio sources)
 """
 
 import sys
 import os
 import json
-import urllib.request
-import urllib.parse
 from pathlib import Path
 
 # Add parent directory to path to import from backend
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import hapsing
+from http_pool import http_pool
+from audio_keys import audio_storage_path
+from audio_metadata import MetadataWriter, fetch_cached_subset, plan_work
+from rate_limit import TokenBucket
+
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -30,17 +36,19 @@ try:
     else:
         print("❌ SUPABASE_URL or SUPABASE_KEY not set")
         sys.exit(1)
+    metadata = MetadataWriter(supabase_client, batch_size=50)
 except ImportError:
     print("❌ Supabase library not installed. Run: pip install supabase")
     sys.exit(1)
 
+# Hapsing requests per second (paced from request start, like generate_audio_supabase.py)
+hapsing_limiter = TokenBucket(float(os.getenv('HAPSING_RATE', '1')))
+
 def cache_audio_to_supabase(romanization, audio_data):
     """Cache audio file to Supabase Storage"""
     try:
-        # Use romanization as filename (sanitized - remove ALL special characters)
-        import re
-        # Remove all non-alphanumeric characters except dash and underscore
-        filename = re.sub(r'[^a-zA-Z0-9_-]', '', romanization.replace(' ', '_').replace('-', '_')) + '.mp3'
+        # Canonical key (tone-preserving hash) shared with the app and other scripts
+        filename = audio_storage_path(romanization)
 
         # Upload to Supabase Storage
         supabase_client.storage.from_(SUPABASE_BUCKET).upload(
@@ -49,13 +57,8 @@ def cache_audio_to_supabase(romanization, audio_data):
             file_options={"content-type": "audio/mpeg", "upsert": "true"}
         )
 
-        # Store metadata in database
-        supabase_client.table('audio_cache').upsert({
-            'tailo_text': romanization,
-            'storage_path': filename,
-            'file_size': len(audio_data),
-            'tier': 1  # Default tier for lessons
-        }, on_conflict='tailo_text').execute()
+        # Metadata is written in batched upserts (flushed at the end of the run)
+        metadata.add(romanization, filename, len(audio_data), tier=1)  # Default tier for lessons
 
         return True
     except Exception as e:
@@ -68,11 +71,10 @@ def generate_and_cache_audio(romanization, retry_count=0, max_retries=3):
 
     try:
         # Generate audio from Hapsing
-        audio_url = f"https://hapsing.ithuan.tw/bangtsam?taibun={urllib.parse.quote(romanization)}"
         print(f"  Generating: {romanization}...", end=' ', flush=True)
 
-        response = urllib.request.urlopen(audio_url, timeout=60)
-        audio_data = response.read()
+        hapsing_limiter.acquire()
+        audio_data = hapsing.fetch_audio(romanization, timeout=60)
 
         print(f"✓ ({len(audio_data)} bytes)", end=' ', flush=True)
 
@@ -95,8 +97,8 @@ def generate_and_cache_audio(romanization, retry_count=0, max_retries=3):
             print(f"✗ Error: {e}")
             return False
 
-def cache_lesson_audio(lesson_id):
-    """Pre-generate and cache all audio for a specific lesson"""
+def cache_lesson_audio(lesson_id, force=False):
+    """Pre-generate and cache all audio for a specific lesson (only what is missing unless force)"""
     # Load lesson data
     lesson_path = Path(__file__).parent.parent.parent / 'src' / 'data' / 'lessons' / f'{lesson_id}.json'
 
@@ -133,10 +135,15 @@ def cache_lesson_audio(lesson_id):
                     'text': line['taiwanese']
                 })
 
-    print(f"Total phrases to cache: {len(phrases_to_cache)}\n")
+    print(f"Total phrases in lesson: {len(phrases_to_cache)}")
+
+    # Skip phrases whose canonical key is already cached (one round trip per 100 phrases)
+    # and phrases that are spelling variants of one already queued
+    cached = set() if force else fetch_cached_subset(supabase_client, [p['romanization'] for p in phrases_to_cache])
+    phrases_to_cache, _ = plan_work(phrases_to_cache, cached, text=lambda phrase: phrase['romanization'])
+    print(f"Phrases to generate: {len(phrases_to_cache)}\n")
 
     # Cache each phrase
-    import time
     success_count = 0
     failed = []
 
@@ -148,15 +155,17 @@ def cache_lesson_audio(lesson_id):
         else:
             failed.append(phrase)
 
-        # Add delay between requests to avoid overwhelming the API
-        if i < len(phrases_to_cache):
-            time.sleep(2)  # 2 second delay between requests
+    metadata.flush()
 
     # Summary
     print(f"\n{'=' * 80}")
     print(f"SUMMARY")
     print(f"{'=' * 80}")
     print(f"Successfully cached: {success_count}/{len(phrases_to_cache)} phrases")
+    print(f"Metadata rows: {metadata.stats['rows_written']} written in {metadata.stats['batches']} batches"
+          + (f", {metadata.stats['rows_failed']} failed" if metadata.stats['rows_failed'] else ""))
+    http_totals = http_pool.stats()['totals']
+    print(f"HTTP connections: {http_totals['connections_opened']} opened, {http_totals['connections_reused']} reused")
 
     if failed:
         print(f"\nFailed ({len(failed)}):")
@@ -167,10 +176,12 @@ def cache_lesson_audio(lesson_id):
     return 0
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Usage: python cache_lesson_audio.py <lesson_id>")
+    args = [arg for arg in sys.argv[1:] if arg != '--force']
+    if not args:
+        print("Usage: python cache_lesson_audio.py <lesson_id> [--force]")
         print("Example: python cache_lesson_audio.py unit-01")
+        print("  --force  regenerate phrases that are already cached")
         sys.exit(1)
 
-    lesson_id = sys.argv[1]
-    sys.exit(cache_lesson_audio(lesson_id))
+    lesson_id = args[0]
+    sys.exit(cache_lesson_audio(lesson_id, force='--force' in sys.argv[1:]))
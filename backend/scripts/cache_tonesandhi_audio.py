@@ -2,17 +2,24 @@
 """
 Pre-generate and cache all audio for Tone Sandhi Trainer exercises to Supabase
 This makes audio playback instant for all users
+Hapsing requests are paced to HAPSING_RATE per second (default 1)
+(build_audio.py builds these together with lessons and dictionary entries)
 """
 
 import sys
 import os
-import urllib.request
-import urllib.parse
 from pathlib import Path
 
 # Add parent directory to path to import from backend
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import hapsing
+from http_pool import http_pool
+from audio_keys import audio_storage_path
+from audio_metadata import MetadataWriter, fetch_cached_subset, plan_work
+from rate_limit import TokenBucket
+from audio_manifest import tone_sandhi_phrases
+
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -29,42 +36,19 @@ try:
     else:
         print("❌ SUPABASE_URL or SUPABASE_KEY not set")
         sys.exit(1)
+    metadata = MetadataWriter(supabase_client, batch_size=50)
 except ImportError:
     print("❌ Supabase library not installed. Run: pip install supabase")
     sys.exit(1)
 
-# Tone Sandhi Exercises - extracted from taiwanese-translator.jsx
-TONE_SANDHI_EXERCISES = {
-    'beginner': [
-        {'compound': 'kha-ta̍h-tshia', 'characters': ['kha', 'ta̍h', 'tshia']},  # 跤踏車
-        {'compound': 'kong-tshia', 'characters': ['kong', 'tshia']},  # 公車
-        {'compound': 'tsa-hng', 'characters': ['tsa', 'hng']},  # 昨昏
-        {'compound': 'bîn-á-tsài', 'characters': ['bîn', 'á', 'tsài']},  # 明仔載
-        {'compound': 'âng-sik', 'characters': ['âng', 'sik']},  # 紅色
-        {'compound': 'nâ-sik', 'characters': ['nâ', 'sik']},  # 藍色
-    ],
-    'intermediate': [
-        {'compound': 'kè-thîng-tshia', 'characters': ['kè', 'thîng', 'tshia']},  # 計程車
-        {'compound': 'tâi-uân-lâng', 'characters': ['tâi', 'uân', 'lâng']},  # 台灣人
-        {'compound': 'tiān-náu', 'characters': ['tiān', 'náu']},  # 電腦
-        {'compound': 'tiān-uē', 'characters': ['tiān', 'uē']},  # 電話
-        {'compound': 'ha̍k-sing', 'characters': ['ha̍k', 'sing']},  # 學生
-    ],
-    'advanced': [
-        {'compound': 'tsia̍h-pá-buē', 'characters': ['tsia̍h', 'pá', 'buē']},  # 食飽未
-        {'compound': 'lí-hó-bô', 'characters': ['lí', 'hó', 'bô']},  # 你好無
-        {'compound': 'tuì-put-tiū', 'characters': ['tuì', 'put', 'tiū']},  # 對不住
-        {'compound': 'bô-iàu-kín', 'characters': ['bô', 'iàu', 'kín']},  # 無要緊
-    ]
-}
+# Hapsing requests per second (paced from request start, like generate_audio_supabase.py)
+hapsing_limiter = TokenBucket(float(os.getenv('HAPSING_RATE', '1')))
 
 def cache_audio_to_supabase(romanization, audio_data):
     """Cache audio file to Supabase Storage"""
     try:
-        # Use romanization as filename (sanitized - remove ALL special characters)
-        import re
-        # Remove all non-alphanumeric characters except dash and underscore
-        filename = re.sub(r'[^a-zA-Z0-9_-]', '', romanization.replace(' ', '_').replace('-', '_')) + '.mp3'
+        # Canonical key (tone-preserving hash) shared with the app and other scripts
+        filename = audio_storage_path(romanization)
 
         # Upload to Supabase Storage
         supabase_client.storage.from_(SUPABASE_BUCKET).upload(
@@ -73,13 +57,8 @@ def cache_audio_to_supabase(romanization, audio_data):
             file_options={"content-type": "audio/mpeg", "upsert": "true"}
         )
 
-        # Store metadata in database
-        supabase_client.table('audio_cache').upsert({
-            'tailo_text': romanization,
-            'storage_path': filename,
-            'file_size': len(audio_data),
-            'tier': 2  # Tier 2 for tone sandhi exercises
-        }, on_conflict='tailo_text').execute()
+        # Metadata is written in batched upserts (flushed at the end of the run)
+        metadata.add(romanization, filename, len(audio_data), tier=2)  # Tier 2 for tone sandhi exercises
 
         return True
     except Exception as e:
@@ -92,11 +71,10 @@ def generate_and_cache_audio(romanization, retry_count=0, max_retries=3):
 
     try:
         # Generate audio from Hapsing
-        audio_url = f"https://hapsing.ithuan.tw/bangtsam?taibun={urllib.parse.quote(romanization)}"
         print(f"  Generating: {romanization}...", end=' ', flush=True)
 
-        response = urllib.request.urlopen(audio_url, timeout=60)
-        audio_data = response.read()
+        hapsing_limiter.acquire()
+        audio_data = hapsing.fetch_audio(romanization, timeout=60)
 
         print(f"✓ ({len(audio_data)} bytes)", end=' ', flush=True)
 
@@ -125,22 +103,18 @@ def cache_tonesandhi_audio():
     print(f"PRE-CACHING AUDIO FOR: Tone Sandhi Trainer")
     print(f"{'=' * 80}\n")
 
-    # Collect all unique romanizations
-    phrases_to_cache = set()
-
-    for level, exercises in TONE_SANDHI_EXERCISES.items():
-        for exercise in exercises:
-            # Add compound word
-            phrases_to_cache.add(exercise['compound'])
-            # Add individual characters
-            for char in exercise['characters']:
-                phrases_to_cache.add(char)
+    # Collect all unique romanizations (compounds and their syllables)
+    phrases_to_cache = {phrase['tailo'] for phrase in tone_sandhi_phrases()}
 
     phrases_list = sorted(list(phrases_to_cache))
-    print(f"Total unique phrases to cache: {len(phrases_list)}\n")
+    print(f"Total unique phrases: {len(phrases_list)}")
+
+    # Skip phrases already cached (one round trip per 100 phrases)
+    cached = fetch_cached_subset(supabase_client, phrases_list)
+    phrases_list, _ = plan_work(phrases_list, cached)
+    print(f"Phrases to generate: {len(phrases_list)}\n")
 
     # Cache each phrase
-    import time
     success_count = 0
     failed = []
 
@@ -152,15 +126,17 @@ def cache_tonesandhi_audio():
         else:
             failed.append(phrase)
 
-        # Add delay between requests to avoid overwhelming the API
-        if i < len(phrases_list):
-            time.sleep(2)  # 2 second delay between requests
+    metadata.flush()
 
     # Summary
     print(f"\n{'=' * 80}")
     print(f"SUMMARY")
     print(f"{'=' * 80}")
     print(f"Successfully cached: {success_count}/{len(phrases_list)} phrases")
+    print(f"Metadata rows: {metadata.stats['rows_written']} written in {metadata.stats['batches']} batches"
+          + (f", {metadata.stats['rows_failed']} failed" if metadata.stats['rows_failed'] else ""))
+    http_totals = http_pool.stats()['totals']
+    print(f"HTTP connections: {http_totals['connections_opened']} opened, {http_totals['connections_reused']} reused")
 
     if failed:
         print(f"\nFailed ({len(failed)}):")
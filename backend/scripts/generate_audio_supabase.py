@@ -2,243 +2,367 @@
 """
 Audio Generation Script for Supabase
 Pre-generates and caches audio in Supabase Storage + PostgreSQL
+
+Runs are journaled (backend/data/generation_journal.jsonl, see generation_journal.py):
+an interrupted run is resumed by simply running the script again. Clips uploaded
+before the interruption only get their metadata row written, permanent Hapsing
+rejects are not retried (unless --retry-failed). reconcile_audio_cache.py repairs
+storage objects without metadata rows and the reverse.
 """
 
+import http.client
 import json
 import os
 import sys
+import threading
 import time
-import urllib.request
-import urllib.error
-import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import hapsing
+from http_pool import HTTPPool, http_pool, HTTPStatusError
+from access_stats import fetch_usage_counts
+from audio_keys import canonical_tailo, audio_storage_path, priority_tier
+from rate_limit import TokenBucket, retry_with_backoff
+from audio_metadata import MetadataWriter, fetch_cached_texts, plan_work
+from circuit_breaker import CircuitOpenError, NegativeCacheHit
+from generation_journal import GenerationJournal, UPLOADED, FAILED
+
 # Load environment variables from .env file
 env_path = Path(__file__).parent.parent.parent / '.env'
 load_dotenv(env_path)
 
+DEFAULT_JOURNAL = Path(__file__).parent.parent / 'data' / 'generation_journal.jsonl'
+
+
+def is_transient(error):
+    """Errors worth retrying: connection problems, timeouts, 429/408/5xx, an open circuit"""
+    if isinstance(error, HTTPStatusError):
+        return not hapsing.is_rejection(error)
+    if isinstance(error, NegativeCacheHit):
+        return not error.rejected
+    return isinstance(error, (CircuitOpenError, OSError, http.client.HTTPException))
+
+
+def is_permanent(error):
+    """Hapsing rejected the input itself (400/404/422, see hapsing.is_rejection): retrying cannot help"""
+    if isinstance(error, HTTPStatusError):
+        return hapsing.is_rejection(error)
+    return isinstance(error, NegativeCacheHit) and error.rejected
+
+
+def is_transient_supabase(error):
+    """Supabase client errors are retried unless the row/object already exists"""
+    message = str(error).lower()
+    return not any(marker in message for marker in ('already exists', 'duplicate', 'unique'))
+
 
 class SupabaseAudioGenerator:
-    def __init__(self, supabase: Client, priority_file, tier=None):
+    def __init__(self, supabase: Client, priority_file=None, tier=None, usage_counts=None,
+                 hapsing_rate=1.0, supabase_rate=10.0, retries=3, backoff_base=1.0, metadata_batch_size=50,
+                 journal=None, retry_failed=False, entries=None, rebuild=None):
+        """
+        entries (word, romanization, score, optional tier) replace the priority file;
+        rebuild holds canonical keys to regenerate and overwrite even though they are cached
+        """
         self.supabase = supabase
+        self.journal = journal
+        self.retry_failed = retry_failed
+        self.rebuild = set(rebuild or ())
+        self.completed_keys = set()
         self.priority_file = priority_file
         self.tier_filter = tier
         self.bucket_name = 'taiwanese-audio'
 
+        # One token bucket per upstream, shared by all workers
+        self.hapsing_limiter = TokenBucket(hapsing_rate, burst=max(1, hapsing_rate))
+        self.supabase_limiter = TokenBucket(supabase_rate, burst=max(1, supabase_rate))
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.http_pool = http_pool
+
+        self.metadata = MetadataWriter(supabase, batch_size=metadata_batch_size,
+                                       write=self.write_metadata_batch, on_failure=self.metadata_failed)
+
+        self._lock = threading.Lock()
         self.stats = {
             'total': 0,
+            'processed': 0,
             'success': 0,
             'failed': 0,
             'skipped': 0,
+            'skipped_failed': 0,
+            'recovered': 0,
+            'retries': 0,
             'total_size': 0
         }
 
-        # Load priority list
-        print(f"Loading priority list from {priority_file}...")
-        with open(priority_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            self.entries = data['entries']
+        if entries is not None:
+            self.entries = list(entries)
+        else:
+            # Load priority list
+            print(f"Loading priority list from {priority_file}...")
+            with open(priority_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                self.entries = data['entries']
 
         # Filter by tier if specified
         if tier:
-            self.entries = [e for e in self.entries if self.get_tier(e['score']) == tier]
+            self.entries = [e for e in self.entries if self.entry_tier(e) == tier]
+
+        # Real usage first: clips learners actually request are generated before static-score ones
+        if usage_counts:
+            self.entries.sort(key=lambda e: (-usage_counts.get(canonical_tailo(e['romanization']), 0),
+                                             -(e.get('score') or 0)))
+            requested = sum(1 for e in self.entries if usage_counts.get(canonical_tailo(e['romanization'])))
+            print(f"Ordered by real usage ({requested} entries have recorded requests), then score")
 
         print(f"Loaded {len(self.entries)} entries to process")
 
-    def get_tier(self, score):
-        """Determine tier from score"""
-        if score >= 60:
-            return 1
-        elif score >= 40:
-            return 2
-        else:
-            return 3
+    def entry_tier(self, entry):
+        """Tier given by the entry itself, otherwise from its score"""
+        return entry.get('tier') or priority_tier(entry['score'])
 
-    def check_exists(self, tailo_text):
-        """Check if audio already exists in Supabase"""
-        try:
-            result = self.supabase.table('audio_cache').select('id').eq('tailo_text', tailo_text).execute()
-            return len(result.data) > 0
-        except Exception as e:
-            print(f"    Error checking cache: {e}")
-            return False
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
 
-    def fetch_audio(self, tailo_text):
-        """Fetch audio from Hapsing API"""
-        url = f"https://hapsing.ithuan.tw/bangtsam?taibun={urllib.parse.quote(tailo_text)}"
+    def _retry(self, call, label, retryable=None):
+        """Run call() with exponential backoff + jitter on transient errors"""
+        def log_retry(error, attempt, delay):
+            self._count('retries')
+            print(f"    ↻ {label}: {error} (retry {attempt} in {delay:.1f}s)")
+        return retry_with_backoff(call, retries=self.retries, base=self.backoff_base,
+                                  retryable=retryable or is_transient, on_retry=log_retry)
 
+    def fetch_audio(self, tailo_text):
+        """Fetch audio from Hapsing API (rate-limited, retried on transient errors)"""
+        def fetch():
+            self.hapsing_limiter.acquire()
+            return hapsing.fetch_audio(tailo_text, timeout=30, pool=self.http_pool)
         try:
-            with urllib.request.urlopen(url, timeout=30) as response:
-                audio_data = response.read()
-                return audio_data
-        except urllib.error.HTTPError as e:
-            print(f"    HTTP Error {e.code}: {e.reason}")
+            return self._retry(fetch, f'Hapsing {tailo_text}')
+        except HTTPStatusError as e:
+            print(f"    HTTP Error {e.status}: {e.reason} ({tailo_text})")
+            self._journal_failure(tailo_text, f"HTTP {e.status}: {e.reason}", is_permanent(e))
             return None
-        except urllib.error.URLError as e:
-            print(f"    URL Error: {e.reason}")
+        except OSError as e:
+            print(f"    Connection Error: {e} ({tailo_text})")
+            self._journal_failure(tailo_text, e)
             return None
         except Exception as e:
-            print(f"    Error: {str(e)}")
+            print(f"    Error: {str(e)} ({tailo_text})")
+            self._journal_failure(tailo_text, e, is_permanent(e))
             return None
 
+    def _journal_failure(self, tailo_text, reason, permanent=False):
+        if self.journal:
+            self.journal.failed(tailo_text, reason, permanent=permanent)
+
     def upload_to_storage(self, tailo_text, audio_data):
-        """Upload audio file to Supabase Storage"""
-        # Use hash of tailo_text as filename to avoid special character issues
-        # The original tailo_text is stored in the database metadata
-        file_hash = hashlib.md5(tailo_text.encode('utf-8')).hexdigest()
-        file_path = f"{file_hash}.mp3"
+        """Upload audio file to Supabase Storage (overwriting it if the clip is being rebuilt)"""
+        # Canonical key (tone-preserving hash) shared with the app and other scripts
+        file_path = audio_storage_path(tailo_text)
+        file_options = {
+            'content-type': 'audio/mpeg',
+            'cache-control': '3600'  # Cache for 1 hour
+        }
+        if canonical_tailo(tailo_text) in self.rebuild:
+            file_options['upsert'] = 'true'
 
-        try:
-            # Upload to storage
-            result = self.supabase.storage.from_(self.bucket_name).upload(
-                file_path,
-                audio_data,
-                file_options={
-                    'content-type': 'audio/mpeg',
-                    'cache-control': '3600'  # Cache for 1 hour
-                }
-            )
+        def upload():
+            self.supabase_limiter.acquire()
+            self.supabase.storage.from_(self.bucket_name).upload(file_path, audio_data, file_options=file_options)
 
+        try:
+            self._retry(upload, f'upload {tailo_text}', retryable=is_transient_supabase)
             return file_path
 
         except Exception as e:
             # Check if file already exists
             if 'already exists' in str(e).lower() or 'duplicate' in str(e).lower():
-                print(f"    File already exists in storage, using existing")
                 return file_path
-            print(f"    Storage upload error: {e}")
+            print(f"    Storage upload error: {e} ({tailo_text})")
+            self._journal_failure(tailo_text, f"upload: {e}")
             return None
 
-    def store_metadata(self, tailo_text, storage_path, file_size, tier, score):
-        """Store metadata in PostgreSQL"""
-        try:
-            data = {
-                'tailo_text': tailo_text,
-                'storage_path': storage_path,
-                'file_size': file_size,
-                'tier': tier,
-                'score': score
-            }
-
-            result = self.supabase.table('audio_cache').insert(data).execute()
-            return True
-
-        except Exception as e:
-            if 'duplicate' in str(e).lower() or 'unique' in str(e).lower():
-                # Already exists, update instead
-                try:
-                    result = self.supabase.table('audio_cache').update({
-                        'storage_path': storage_path,
-                        'file_size': file_size,
-                        'last_accessed': 'now()'
-                    }).eq('tailo_text', tailo_text).execute()
-                    return True
-                except:
-                    pass
-            print(f"    Database error: {e}")
-            return False
+    def write_metadata_batch(self, rows):
+        """One batched upsert into audio_cache (rate-limited, retried on transient errors)"""
+        def upsert():
+            self.supabase_limiter.acquire()
+            self.supabase.table('audio_cache').upsert(rows, on_conflict='tailo_text').execute()
+        self._retry(upsert, f'metadata batch ({len(rows)} rows)', retryable=is_transient_supabase)
+        with self._lock:
+            self.completed_keys.update(row['tailo_text'] for row in rows)
+        if self.journal:
+            for row in rows:
+                self.journal.completed(row['tailo_text'])
+
+    def metadata_failed(self, rows, error):
+        # The clips were uploaded but are not recorded; they stay 'uploaded' in the
+        # journal and the next run only writes their rows
+        with self._lock:
+            self.stats['success'] -= len(rows)
+            self.stats['failed'] += len(rows)
+            self.stats['total_size'] -= sum(row['file_size'] for row in rows)
+
+    def plan(self):
+        """
+        Planning phase: one paged scan of audio_cache, diffed against the work list,
+        then split by the journal into entries to generate, entries that were uploaded
+        but have no metadata row yet (recover) and permanent failures (skipped)
+        """
+        started = time.time()
+        cached = fetch_cached_texts(self.supabase) - self.rebuild
+        todo, skipped = plan_work(self.entries, cached, text=lambda e: e['romanization'])
+        print(f"Planning: {len(cached)} clips cached, {len(skipped)} entries already done, "
+              f"{len(self.entries) - len(todo) - len(skipped)} duplicates, {len(todo)} to generate "
+              f"({time.time() - started:.1f}s)")
+
+        recover, failed = [], []
+        if self.journal:
+            remaining = []
+            for entry in todo:
+                record = self.journal.status(entry['romanization'])
+                if record and record['event'] == UPLOADED:
+                    recover.append((entry, record))
+                elif record and record['event'] == FAILED and record.get('permanent') and not self.retry_failed:
+                    failed.append(entry)
+                else:
+                    remaining.append(entry)
+            todo = remaining
+            if recover or failed:
+                print(f"Journal: {len(recover)} uploaded clips only need metadata, "
+                      f"{len(failed)} permanently rejected entries skipped (--retry-failed to retry)")
+        return todo, skipped, recover, failed
+
+    def recover_uploaded(self, recover):
+        """Write metadata rows for clips a previous run uploaded but did not record"""
+        for entry, record in recover:
+            self.metadata.add(entry['romanization'], record['storage_path'], record['file_size'],
+                              tier=self.entry_tier(entry), score=entry.get('score'))
+            with self._lock:
+                self.stats['recovered'] += 1
+                self.stats['success'] += 1
+                self.stats['total_size'] += record['file_size']
 
     def process_entry(self, entry, index, total):
-        """Process a single entry"""
+        """Process a single entry: fetch → upload → queue metadata (one log line per outcome)"""
         word = entry['word']
         romanization = entry['romanization']
-        score = entry['score']
-        tier = self.get_tier(score)
+        score = entry.get('score')
+        tier = self.entry_tier(entry)
+        label = f"[{index}/{total}] {word} ({romanization}) T{tier}"
 
-        print(f"\n[{index}/{total}] {word} ({romanization}) - Tier {tier}, Score {score}")
-
-        # Check if already exists
-        if self.check_exists(romanization):
-            print(f"  ⏭️  Already cached, skipping")
-            self.stats['skipped'] += 1
-            return True
-
-        # Fetch audio
-        print(f"  🔊 Fetching audio from Hapsing API...")
+        if self.journal:
+            self.journal.started(romanization)
         audio_data = self.fetch_audio(romanization)
-
         if audio_data is None:
-            print(f"  ❌ Failed to fetch audio")
-            self.stats['failed'] += 1
+            print(f"{label} ❌ failed to fetch audio")
+            self._count('failed')
             return False
 
         file_size = len(audio_data)
-        print(f"  📦 Audio fetched ({file_size} bytes)")
-
-        # Upload to storage
-        print(f"  ☁️  Uploading to Supabase Storage...")
         storage_path = self.upload_to_storage(romanization, audio_data)
-
         if storage_path is None:
-            print(f"  ❌ Failed to upload to storage")
-            self.stats['failed'] += 1
+            print(f"{label} ❌ failed to upload to storage")
+            self._count('failed')
             return False
 
-        print(f"  💾 Stored at: {storage_path}")
+        if self.journal:
+            self.journal.uploaded(romanization, storage_path, file_size, tier=tier, score=score)
 
-        # Store metadata in database
-        print(f"  📝 Saving metadata to database...")
-        success = self.store_metadata(romanization, storage_path, file_size, tier, score)
+        # Metadata is written in batched upserts (see plan()/generate_all())
+        self.metadata.add(romanization, storage_path, file_size, tier=tier, score=score)
 
-        if success:
-            print(f"  ✅ Successfully cached")
+        print(f"{label} ✅ cached ({file_size} bytes)")
+        with self._lock:
             self.stats['success'] += 1
             self.stats['total_size'] += file_size
-            return True
-        else:
-            print(f"  ⚠️  Metadata save failed")
-            self.stats['failed'] += 1
-            return False
-
-    def generate_all(self, delay=1.0, batch_size=10):
-        """Generate audio for all entries with rate limiting"""
-        total = len(self.entries)
-        self.stats['total'] = total
+        return True
+
+    def generate_all(self, workers=4, progress_interval=10.0):
+        """
+        Generate audio for all entries on a pool of workers
+        Throughput is bounded by the per-upstream token buckets, not by the sum of latencies
+        """
+        self.stats['total'] = len(self.entries)
+        todo, skipped, recover, failed = self.plan()
+        self.stats['skipped'] = len(skipped)
+        self.stats['skipped_failed'] = len(failed)
+        if recover:
+            self.recover_uploaded(recover)
+        total = len(todo)
+        if not todo:
+            self.metadata.flush()
+            print("Nothing left to generate")
+            self.print_final_stats(0.0)
+            return
 
         print(f"\n{'='*70}")
         print(f"Starting audio generation for {total} entries")
-        print(f"Delay between requests: {delay}s")
-        print(f"Progress checkpoint every {batch_size} entries")
+        print(f"Workers: {workers} | Hapsing: {self.hapsing_limiter.rate:g} req/s | "
+              f"Supabase: {self.supabase_limiter.rate:g} req/s")
         print(f"{'='*70}\n")
 
-        start_time = time.time()
+        # A pool sized for the workers: one connection per worker to Hapsing
+        self.http_pool = HTTPPool(max_per_host=max(http_pool.max_per_host, workers),
+                                  connect_timeout=http_pool.connect_timeout, read_timeout=http_pool.read_timeout,
+                                  idle_timeout=http_pool.idle_timeout)
 
-        for i, entry in enumerate(self.entries, 1):
-            try:
-                self.process_entry(entry, i, total)
-
-                # Rate limiting delay (except for last item)
-                if i < total:
-                    time.sleep(delay)
-
-                # Checkpoint progress
-                if i % batch_size == 0:
-                    self.print_progress(i, total, time.time() - start_time)
+        start_time = time.time()
+        done = threading.Event()
+        reporter = threading.Thread(target=self._report_progress, args=(start_time, total, progress_interval, done),
+                                    daemon=True)
+        reporter.start()
 
-            except KeyboardInterrupt:
-                print("\n\n⚠️  Interrupted by user")
-                break
-            except Exception as e:
-                print(f"\n❌ Unexpected error: {str(e)}")
-                self.stats['failed'] += 1
-                continue
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='audio-gen')
+        futures = [executor.submit(self._process_safely, entry, i, total) for i, entry in enumerate(todo, 1)]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except KeyboardInterrupt:
+            print("\n\n⚠️  Interrupted by user, finishing in-flight entries...")
+            for future in futures:
+                future.cancel()
+        finally:
+            executor.shutdown(wait=True)
+            self.metadata.flush()
+            done.set()
 
         # Final stats
         elapsed = time.time() - start_time
         self.print_final_stats(elapsed)
 
+    def _process_safely(self, entry, index, total):
+        try:
+            self.process_entry(entry, index, total)
+        except Exception as e:
+            print(f"\n❌ Unexpected error for {entry.get('romanization')}: {str(e)}")
+            self._count('failed')
+        finally:
+            self._count('processed')
+
+    def _report_progress(self, start_time, total, interval, done):
+        while not done.wait(interval):
+            self.print_progress(self.stats['processed'], total, time.time() - start_time)
+
     def print_progress(self, current, total, elapsed):
         """Print progress checkpoint"""
-        percent = (current / total) * 100
+        percent = (current / total) * 100 if total else 100.0
         rate = current / elapsed if elapsed > 0 else 0
         eta = (total - current) / rate if rate > 0 else 0
 
         print(f"\n{'─'*70}")
         print(f"Progress: {current}/{total} ({percent:.1f}%)")
-        print(f"Elapsed: {elapsed/60:.1f} min | Rate: {rate:.1f} entries/sec | ETA: {eta/60:.1f} min")
-        print(f"Success: {self.stats['success']} | Failed: {self.stats['failed']} | Skipped: {self.stats['skipped']}")
+        print(f"Elapsed: {elapsed/60:.1f} min | Rate: {rate:.2f} entries/sec | ETA: {eta/60:.1f} min")
+        print(f"Success: {self.stats['success']} | Failed: {self.stats['failed']} | "
+              f"Skipped: {self.stats['skipped']} | Retries: {self.stats['retries']}")
         print(f"Total size: {self.stats['total_size']/(1024*1024):.2f} MB")
         print(f"{'─'*70}\n")
 
@@ -251,10 +375,18 @@ class SupabaseAudioGenerator:
         print(f"Successfully cached: {self.stats['success']}")
         print(f"Failed: {self.stats['failed']}")
         print(f"Skipped (already cached): {self.stats['skipped']}")
+        if self.stats['recovered']:
+            print(f"Recovered from journal (metadata only): {self.stats['recovered']}")
+        if self.stats['skipped_failed']:
+            print(f"Skipped (rejected in an earlier run): {self.stats['skipped_failed']}")
         print(f"Total audio size: {self.stats['total_size']/(1024*1024):.2f} MB")
+        print(f"Metadata: {self.metadata.stats['rows_written']} rows in {self.metadata.stats['batches']} batched upserts")
         print(f"Time elapsed: {elapsed/60:.1f} minutes")
-        if self.stats['success'] > 0:
+        if self.stats['success'] > 0 and elapsed > 0:
             print(f"Average rate: {self.stats['success']/elapsed:.2f} entries/second")
+        http_totals = self.http_pool.stats()['totals']
+        print(f"HTTP connections: {http_totals['connections_opened']} opened, "
+              f"{http_totals['connections_reused']} reused ({http_totals['reuse_ratio']*100:.0f}% reuse)")
         print(f"{'='*70}\n")
 
 
@@ -264,10 +396,30 @@ def main():
     parser = argparse.ArgumentParser(description='Generate and cache audio in Supabase')
     parser.add_argument('--tier', type=int, choices=[1, 2, 3],
                        help='Only generate for specific tier (1, 2, or 3)')
-    parser.add_argument('--delay', type=float, default=1.0,
-                       help='Delay between API requests in seconds (default: 1.0)')
-    parser.add_argument('--batch-size', type=int, default=10,
-                       help='Progress checkpoint frequency (default: 10)')
+    parser.add_argument('--plan',
+                       help='Generate the entries of a budget plan (plan_audio_budget.py) instead of the priority list')
+    parser.add_argument('--workers', type=int, default=4,
+                       help='Entries processed concurrently (default: 4)')
+    parser.add_argument('--hapsing-rate', type=float, default=1.0,
+                       help='Max Hapsing requests per second across all workers (default: 1.0)')
+    parser.add_argument('--supabase-rate', type=float, default=10.0,
+                       help='Max Supabase requests per second across all workers (default: 10)')
+    parser.add_argument('--delay', type=float,
+                       help='Deprecated: seconds between Hapsing requests (same as --hapsing-rate 1/DELAY)')
+    parser.add_argument('--retries', type=int, default=3,
+                       help='Retries per request on transient errors, with exponential backoff (default: 3)')
+    parser.add_argument('--metadata-batch-size', type=int, default=50,
+                       help='audio_cache rows per batched upsert (default: 50)')
+    parser.add_argument('--progress-interval', type=float, default=10.0,
+                       help='Seconds between progress/ETA reports (default: 10)')
+    parser.add_argument('--no-usage', action='store_true',
+                       help='Ignore recorded access counts and order by dictionary score only')
+    parser.add_argument('--journal', default=str(DEFAULT_JOURNAL),
+                       help=f'Run journal used to resume interrupted runs (default: {DEFAULT_JOURNAL})')
+    parser.add_argument('--no-journal', action='store_true',
+                       help='Do not read or write the run journal')
+    parser.add_argument('--retry-failed', action='store_true',
+                       help='Retry entries Hapsing rejected in earlier runs')
 
     args = parser.parse_args()
 
@@ -285,7 +437,15 @@ def main():
     # Paths
     priority_file = Path(__file__).parent.parent / 'data' / 'priority_entries.json'
 
-    if not priority_file.exists():
+    plan_entries = None
+    if args.plan:
+        with open(args.plan, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        plan_entries = plan['entries']
+        totals = plan['totals']
+        print(f"Plan {args.plan}: {len(plan_entries)} entries, ~{totals['est_bytes'] / 1024 / 1024:.1f} MB, "
+              f"expected hit rate {totals['coverage_before'] * 100:.1f}% → {totals['coverage_after'] * 100:.1f}%")
+    elif not priority_file.exists():
         print(f"❌ Priority list not found at {priority_file}")
         print("Run rank_dictionary_entries.py first to generate priority list")
         return 1
@@ -293,14 +453,38 @@ def main():
     # Create Supabase client
     supabase: Client = create_client(supabase_url, supabase_key)
 
+    # Load real access counts recorded by the app (usage_stats table); a plan is
+    # already ordered by expected hits per budget
+    usage_counts = None
+    if not args.no_usage and not args.plan:
+        try:
+            usage_counts = fetch_usage_counts(supabase, 'audio')
+        except Exception as e:
+            print(f"⚠️  Could not load usage stats, ordering by score only: {e}")
+
+    journal = None
+    if not args.no_journal:
+        journal = GenerationJournal(args.journal)
+        summary = journal.summary()
+        if summary['lines']:
+            print(f"Journal {args.journal}: {summary['completed']} completed, {summary['uploaded']} uploaded, "
+                  f"{summary['started']} in flight, {summary['failed']} failed "
+                  f"({summary['permanent_failures']} permanent)")
+
     # Create generator
-    generator = SupabaseAudioGenerator(supabase, priority_file, tier=args.tier)
+    hapsing_rate = 1.0 / args.delay if args.delay else args.hapsing_rate
+    generator = SupabaseAudioGenerator(supabase, priority_file, tier=args.tier, usage_counts=usage_counts,
+                                       entries=plan_entries,
+                                       hapsing_rate=hapsing_rate, supabase_rate=args.supabase_rate,
+                                       retries=args.retries, metadata_batch_size=args.metadata_batch_size,
+                                       journal=journal, retry_failed=args.retry_failed)
 
     # Confirm before starting
     tier_msg = f"Tier {args.tier} only" if args.tier else "All tiers"
     print(f"\nReady to generate audio for {len(generator.entries)} entries ({tier_msg})")
-    print(f"Delay: {args.delay}s between requests")
-    print(f"Estimated time: ~{len(generator.entries) * args.delay / 60:.1f} minutes")
+    print(f"Workers: {args.workers} | Hapsing rate limit: {hapsing_rate:g} req/s")
+    print(f"Estimated time: at most ~{len(generator.entries) / hapsing_rate / 60:.1f} minutes "
+          f"(less for entries already cached)")
 
     response = input("\nContinue? (y/n): ")
     if response.lower() != 'y':
@@ -308,7 +492,11 @@ def main():
         return 0
 
     # Generate audio
-    generator.generate_all(delay=args.delay, batch_size=args.batch_size)
+    try:
+        generator.generate_all(workers=args.workers, progress_interval=args.progress_interval)
+    finally:
+        if journal:
+            journal.close()
 
     return 0
 
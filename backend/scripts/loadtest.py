@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of backend.app under gunicorn against local upstream simulators
+
+Starts simulated Anthropic, Hapsing and Supabase servers (see upstream_simulators.py)
+with the given latency distributions and error rates, starts gunicorn with the app
+pointed at them, drives a weighted mix of requests from concurrent clients (closed
+loop, lesson plan vocabulary as inputs) and reports throughput, latency percentiles
+per endpoint and worker saturation (busy request slots, sampled from gunicorn hooks).
+
+Usage:
+  python loadtest.py --duration 60 --concurrency 32 --workers 2 --threads 8
+  python loadtest.py --mix romanize=1,audio=3 --hapsing-latency lognormal:2,0.8 --hapsing-errors 0.05
+  python loadtest.py --simulators-only        # print the env to point a dev server at the simulators
+
+Latency specs: fixed:0.2 | uniform:0.1,0.5 | lognormal:MEDIAN,SIGMA | exp:MEAN (seconds)
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from audio_keys import audio_storage_path, canonical_tailo
+from benchmark_romanization import percentile
+from lesson_plan_validation import load_golden_set
+from upstream_simulators import (SIMULATED_ANTHROPIC_KEY, SIMULATED_SUPABASE_KEY, AnthropicSimulator,
+                                 HapsingSimulator, LatencyModel, SupabaseSimulator)
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_MIX = 'romanize=4,romanize_stream=2,audio=4,audio_resolve=1,module_stream=0.2'
+THEMES = ['At the Market', 'Family', 'Weather', 'At the Doctor', 'Transportation']
+
+# Gunicorn hooks: each worker keeps in-flight requests and busy slot-seconds in a
+# small JSON file per pid, which the load test samples for saturation
+GUNICORN_HOOKS = '''
+import json, os, threading, time
+
+_lock = threading.Lock()
+_state = {'inflight': 0, 'busy_seconds': 0.0, 'requests': 0, 'updated': time.time()}
+_last_write = [0.0]
+
+
+def _advance(now):
+    _state['busy_seconds'] += _state['inflight'] * (now - _state['updated'])
+    _state['updated'] = now
+
+
+def _write(worker, now, force=False):
+    if not force and now - _last_write[0] < 0.2:
+        return
+    _last_write[0] = now
+    path = os.path.join(os.environ['LOADTEST_STATS_DIR'], str(worker.pid))
+    with open(path + '.tmp', 'w') as f:
+        json.dump(dict(_state, pid=worker.pid), f)
+    os.replace(path + '.tmp', path)
+
+
+def post_fork(server, worker):
+    _write(worker, time.time(), force=True)
+
+
+def pre_request(worker, req):
+    with _lock:
+        now = time.time()
+        _advance(now)
+        _state['inflight'] += 1
+        _write(worker, now, force=_state['inflight'] == 1)
+
+
+def post_request(worker, req, environ, resp):
+    with _lock:
+        now = time.time()
+        _advance(now)
+        _state['inflight'] -= 1
+        _state['requests'] += 1
+        _write(worker, now, force=_state['inflight'] == 0)
+'''
+
+
+def parse_mix(value):
+    """'romanize=4,audio=2' → {'romanize': 4.0, 'audio': 2.0}"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r} (choose from {', '.join(SCENARIOS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def latency_spec(value):
+    LatencyModel(value)  # validates
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Scenarios: (method, path, body) for one request, picked from the corpus
+# ---------------------------------------------------------------------------
+
+def romanize(rng, corpus):
+    case = rng.choice(corpus)
+    return 'POST', '/api/romanize', {'text': case['text'], 'sourceLanguage': rng.choice(['taiwanese', 'mandarin'])}
+
+
+def romanize_stream(rng, corpus):
+    case = rng.choice(corpus)
+    return 'POST', '/api/romanize/stream', {'text': case['text'],
+                                            'sourceLanguage': rng.choice(['taiwanese', 'mandarin', 'english'])}
+
+
+def audio(rng, corpus):
+    case = rng.choice(corpus)
+    return 'GET', '/api/audio?' + urllib.parse.urlencode({'taibun': case['expected'][0]}), None
+
+
+def audio_resolve(rng, corpus):
+    return 'POST', '/api/audio/resolve', {'texts': [case['expected'][0] for case in rng.sample(corpus, 20)]}
+
+
+def module_stream(rng, corpus):
+    return 'POST', '/api/generate-module-stream', {'theme': rng.choice(THEMES)}
+
+
+SCENARIOS = {
+    'romanize': romanize,
+    'romanize_stream': romanize_stream,
+    'audio': audio,
+    'audio_resolve': audio_resolve,
+    'module_stream': module_stream,
+}
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+class Client(threading.Thread):
+    """Closed-loop client: one keep-alive connection, next request as soon as the last one finished"""
+
+    def __init__(self, index, port, mix, corpus, stop_at, results, seed):
+        super().__init__(name=f'loadtest-client-{index}', daemon=True)
+        self.port = port
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.corpus = corpus
+        self.stop_at = stop_at
+        self.results = results
+        self.rng = random.Random(seed * 1000 + index)
+        self.connection = None
+
+    def request(self, method, path, body):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        first = response.read(1)
+        first_byte = time.perf_counter()
+        size = len(first) + len(response.read())
+        if response.getheader('Connection', '').lower() == 'close':
+            self.connection.close()
+            self.connection = None
+        return response.status, first_byte, size
+
+    def run(self):
+        while time.time() < self.stop_at:
+            name = self.rng.choices(self.names, self.weights)[0]
+            method, path, body = SCENARIOS[name](self.rng, self.corpus)
+            started = time.perf_counter()
+            try:
+                status, first_byte, size = self.request(method, path, body)
+            except (OSError, http.client.HTTPException) as e:
+                if self.connection is not None:
+                    self.connection.close()
+                self.connection = None
+                status, first_byte, size = type(e).__name__, time.perf_counter(), 0
+            finished = time.perf_counter()
+            self.results.append((name, status, finished - started, first_byte - started, size))
+
+
+class SaturationSampler(threading.Thread):
+    """Samples the per-worker stats files of the gunicorn hooks"""
+
+    def __init__(self, stats_dir, interval=0.25):
+        super().__init__(name='loadtest-saturation', daemon=True)
+        self.stats_dir = stats_dir
+        self.interval = interval
+        self.samples = []       # (time, in-flight across workers)
+        self.snapshots = {}     # pid → latest state
+        self.first = None
+        self._done = threading.Event()
+
+    def read(self):
+        states = {}
+        for name in os.listdir(self.stats_dir):
+            if name.endswith('.tmp'):
+                continue
+            try:
+                with open(os.path.join(self.stats_dir, name)) as f:
+                    states[name] = json.load(f)
+            except (OSError, ValueError):
+                continue
+        return states
+
+    @staticmethod
+    def busy_seconds(states, now):
+        # Extrapolate each worker's integral from its last update
+        return sum(s['busy_seconds'] + s['inflight'] * (now - s['updated']) for s in states.values())
+
+    def run(self):
+        self.first = (time.time(), self.busy_seconds(self.read(), time.time()))
+        while not self._done.wait(self.interval):
+            states = self.read()
+            self.snapshots.update(states)
+            self.samples.append((time.time(), sum(s['inflight'] for s in states.values())))
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        now = time.time()
+        return now, self.busy_seconds(self.read(), now)
+
+
+def start_gunicorn(args, env, work_dir, log_path):
+    hooks_path = os.path.join(work_dir, 'gunicorn_loadtest_hooks.py')
+    with open(hooks_path, 'w') as f:
+        f.write(GUNICORN_HOOKS)
+    command = [
+        sys.executable, '-m', 'gunicorn', 'backend.app:app',
+        '--bind', f'127.0.0.1:{args.port}',
+        '--workers', str(args.workers),
+        '--threads', str(args.threads),
+        '--timeout', str(args.worker_timeout),
+        '--config', hooks_path,
+    ]
+    log = open(log_path, 'w')
+    process = subprocess.Popen(command, cwd=str(REPO_ROOT), env=env, stdout=log, stderr=subprocess.STDOUT,
+                               start_new_session=True)
+    return process, log
+
+
+def wait_until_ready(port, process, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                return True
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def summarize(results, elapsed):
+    by_name = {}
+    for name, status, latency, ttfb, size in results:
+        by_name.setdefault(name, []).append((status, latency, ttfb, size))
+
+    def stats(items):
+        latencies = [latency for _, latency, _, _ in items]
+        errors = sum(1 for status, _, _, _ in items if not (isinstance(status, int) and status < 400))
+        return {
+            'requests': len(items),
+            'errors': errors,
+            'error_rate': round(errors / len(items), 4) if items else 0.0,
+            'rps': round(len(items) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p90_ms': round(percentile(latencies, 90) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'max_ms': round(max(latencies) * 1000, 1) if latencies else 0.0,
+            'ttfb_p50_ms': round(percentile([ttfb for _, _, ttfb, _ in items], 50) * 1000, 1),
+            'statuses': {str(k): sum(1 for s, _, _, _ in items if s == k) for k in {s for s, _, _, _ in items}},
+        }
+
+    return stats([item for items in by_name.values() for item in items]), \
+        {name: stats(items) for name, items in sorted(by_name.items())}
+
+
+def simulator_env(anthropic, hapsing, supabase):
+    return {
+        'ANTHROPIC_API_KEY': SIMULATED_ANTHROPIC_KEY,
+        'ANTHROPIC_BASE_URL': anthropic.url,
+        'HAPSING_URL': f'{hapsing.url}/bangtsam',
+        'SUPABASE_URL': supabase.url,
+        'SUPABASE_KEY': SIMULATED_SUPABASE_KEY,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test backend.app under gunicorn with simulated upstreams')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of load (default: 30)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients (default: 16)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'Scenario weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers (default: 2)')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per gunicorn worker (default: 4)')
+    parser.add_argument('--worker-timeout', type=int, default=120, help='Gunicorn worker timeout (default: 120)')
+    parser.add_argument('--port', type=int, default=5099, help='Port for gunicorn (default: 5099)')
+    parser.add_argument('--anthropic-latency', type=latency_spec, default='lognormal:0.8,0.5')
+    parser.add_argument('--anthropic-errors', type=float, default=0.01, help='Error rate (default: 0.01)')
+    parser.add_argument('--hapsing-latency', type=latency_spec, default='lognormal:1.5,0.6')
+    parser.add_argument('--hapsing-errors', type=float, default=0.02, help='Error rate (default: 0.02)')
+    parser.add_argument('--supabase-latency', type=latency_spec, default='lognormal:0.03,0.5')
+    parser.add_argument('--supabase-errors', type=float, default=0.0, help='Error rate (default: 0)')
+    parser.add_argument('--supabase-cached', type=float, default=0.5,
+                        help='Share of the vocabulary already in the simulated audio cache (default: 0.5)')
+    parser.add_argument('--warmup', action='store_true', help='Keep startup audio warmup on in the workers')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for traffic and simulators')
+    parser.add_argument('--output', help='Write the report as JSON')
+    parser.add_argument('--keep-logs', action='store_true', help='Keep the gunicorn log and stats directory')
+    parser.add_argument('--simulators-only', action='store_true',
+                        help='Only start the simulators and print the environment for a manually started server')
+    args = parser.parse_args()
+
+    corpus = load_golden_set()
+    anthropic = AnthropicSimulator(args.anthropic_latency, args.anthropic_errors, seed=args.seed).start()
+    hapsing = HapsingSimulator(args.hapsing_latency, args.hapsing_errors, seed=args.seed + 1).start()
+    supabase = SupabaseSimulator(args.supabase_latency, args.supabase_errors, seed=args.seed + 2).start()
+    texts = sorted({case['expected'][0] for case in corpus})
+    supabase.seed_audio(random.Random(args.seed).sample(texts, int(len(texts) * args.supabase_cached)),
+                        canonical_tailo, audio_storage_path)
+    upstream_env = simulator_env(anthropic, hapsing, supabase)
+
+    if args.simulators_only:
+        for name, value in upstream_env.items():
+            print(f"export {name}='{value}'")
+        print("\nSimulators running; Ctrl-C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            return 0
+
+    work_dir = tempfile.mkdtemp(prefix='taigi-loadtest-')
+    stats_dir = os.path.join(work_dir, 'workers')
+    os.makedirs(stats_dir)
+    log_path = os.path.join(work_dir, 'gunicorn.log')
+    env = dict(os.environ, **upstream_env,
+               LOADTEST_STATS_DIR=stats_dir,
+               AUDIO_WARMUP_ENABLED='true' if args.warmup else 'false',
+               USAGE_STATS_FLUSH_INTERVAL='5',
+               PYTHONUNBUFFERED='1')
+    env.pop('FLASK_ENV', None)
+
+    print(f"Simulators: anthropic {anthropic.url} ({args.anthropic_latency}, {args.anthropic_errors:.0%} errors), "
+          f"hapsing {hapsing.url} ({args.hapsing_latency}, {args.hapsing_errors:.0%} errors), "
+          f"supabase {supabase.url} ({args.supabase_latency}, {args.supabase_errors:.0%} errors)")
+    print(f"Starting gunicorn: {args.workers} workers × {args.threads} threads on :{args.port} (log: {log_path})")
+    process, log = start_gunicorn(args, env, work_dir, log_path)
+    try:
+        if not wait_until_ready(args.port, process, timeout=120):
+            print(f"❌ Server did not become ready; see {log_path}")
+            return 1
+
+        print(f"Driving {args.concurrency} clients for {args.duration:.0f}s: "
+              + ', '.join(f"{name}={weight:g}" for name, weight in args.mix.items()))
+        results = []
+        sampler = SaturationSampler(stats_dir)
+        sampler.start()
+        started = time.time()
+        clients = [Client(i, args.port, args.mix, corpus, started + args.duration, results, args.seed)
+                   for i in range(args.concurrency)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.time() - started
+        ended, busy_end = sampler.stop()
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+        log.close()
+
+    overall, per_scenario = summarize(results, elapsed)
+    capacity = args.workers * args.threads
+    in_flight = [count for _, count in sampler.samples]
+    first_time, busy_start = sampler.first
+    saturation = {
+        'slots': capacity,
+        'utilization': round((busy_end - busy_start) / (capacity * (ended - first_time)), 4),
+        'mean_in_flight': round(sum(in_flight) / len(in_flight), 2) if in_flight else 0.0,
+        'peak_in_flight': max(in_flight, default=0),
+        'time_saturated': round(sum(1 for count in in_flight if count >= capacity) / len(in_flight), 4)
+        if in_flight else 0.0,
+        'worker_processes_seen': len(sampler.snapshots),
+    }
+    upstreams = {sim.name: sim.stats() for sim in (anthropic, hapsing, supabase)}
+
+    print(f"\nThroughput: {overall['rps']:.1f} req/s ({overall['requests']} requests, "
+          f"{overall['errors']} errors) | p50 {overall['p50_ms']:.0f} ms, p90 {overall['p90_ms']:.0f} ms, "
+          f"p99 {overall['p99_ms']:.0f} ms")
+    print(f"\n  {'scenario':<16} {'req':>6} {'rps':>7} {'err%':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'ttfb50':>8}")
+    for name, stats in per_scenario.items():
+        print(f"  {name:<16} {stats['requests']:>6} {stats['rps']:>7.1f} {stats['error_rate'] * 100:>5.1f}% "
+              f"{stats['p50_ms']:>6.0f}ms {stats['p90_ms']:>6.0f}ms {stats['p99_ms']:>6.0f}ms "
+              f"{stats['max_ms']:>6.0f}ms {stats['ttfb_p50_ms']:>6.0f}ms")
+    print(f"\nWorker saturation: {saturation['utilization']:.0%} of {capacity} request slots busy on average, "
+          f"peak {saturation['peak_in_flight']}/{capacity} in flight, "
+          f"all slots busy {saturation['time_saturated']:.0%} of the time")
+    if saturation['worker_processes_seen'] > args.workers:
+        print(f"⚠️  {saturation['worker_processes_seen'] - args.workers} worker restarts (timeouts or crashes); "
+              f"see {log_path}")
+    print("Upstream calls: " + ', '.join(f"{name} {s['requests']} ({s['errors']} failed)"
+                                         for name, s in upstreams.items()))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'config': {key: value for key, value in vars(args).items() if key != 'output'},
+                'duration': round(elapsed, 2),
+                'overall': overall,
+                'scenarios': per_scenario,
+                'saturation': saturation,
+                'upstreams': upstreams,
+            }, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+
+    if args.keep_logs:
+        print(f"Logs kept in {work_dir}")
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    for simulator in (anthropic, hapsing, supabase):
+        simulator.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the romanization hot path, offline and reproducible
+
+Times normalize_taiwanese_text, search_in_definitions, the segmentation loop of
+romanize_sentence_with_word_lookup, get_taiwanese_romanization and the SSE
+generators of /api/romanize/stream and /api/generate-module-stream, in-process.
+The Anthropic client, tàuphahjī and Hapsing are replaced by deterministic
+stand-ins, so only this repo's code is measured and no network is used (the MOE
+dictionary is the local backend/moedict-twblg.json).
+
+Each benchmark is calibrated to run at least --min-time per round, then timed
+for --rounds rounds (pytest-benchmark style min/median/mean/stddev per call).
+Results go to backend/data/microbench/<commit>.json for comparison across commits:
+
+  python microbench_romanization.py                          # writes data/microbench/<commit>.json
+  python microbench_romanization.py --compare ../data/microbench/abc1234.json
+  python microbench_romanization.py -k sse --rounds 10
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lesson_plan_validation import load_pipeline
+from upstream_simulators import canned_reply
+
+RESULTS_DIR = Path(__file__).parent.parent / 'data' / 'microbench'
+
+FAKE_MP3 = b'ID3' + bytes(2048)
+FAKE_SYLLABLES = ['tsi', 'ka', 'lí', 'hó', 'guá', 'sī', 'bô', 'tsia̍h', 'khuànn']
+
+# Inputs: dictionary hits, a normalization hit, misses that scan every definition
+INPUTS = {
+    'normalize': '我今天吃了3碗飯，腳很痛，想要去醫院看醫生',
+    'definition_hit': '很',
+    'definition_miss': '嘰哩呱啦',
+    'word_hit': '食飯',
+    'word_normalized': '腳踏車',
+    'word_miss': '嘰哩呱啦',
+    'sentence': '我今仔日食飯了後欲去公園行行咧，你欲做伙去無？',
+}
+
+
+# ---------------------------------------------------------------------------
+# Deterministic stand-ins
+# ---------------------------------------------------------------------------
+
+def fake_tauphahji(text):
+    """tàuphahjī stand-in: one fixed syllable per character"""
+    kip = '-'.join(FAKE_SYLLABLES[ord(char) % len(FAKE_SYLLABLES)] for char in text if not char.isspace())
+    return {'KIP': kip, '漢字': text}
+
+
+class FakeStream:
+    def __init__(self, text):
+        self.text_stream = [text[i:i + 8] for i in range(0, len(text), 8)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeMessages:
+    """Anthropic messages stand-in: canned answers chosen by prompt"""
+
+    def reply(self, messages):
+        return canned_reply(messages[-1]['content'])
+
+    def create(self, model=None, max_tokens=None, messages=()):
+        return SimpleNamespace(content=[SimpleNamespace(text=self.reply(messages))])
+
+    def stream(self, model=None, max_tokens=None, messages=()):
+        return FakeStream(self.reply(messages))
+
+
+def install_stand_ins(app):
+    """Swap the network-bound dependencies of app.py for the stand-ins"""
+    import hapsing
+    from access_stats import AccessTracker
+
+    app.anthropic_client = SimpleNamespace(messages=FakeMessages())
+    app.tàuphahjī = fake_tauphahji
+    hapsing.fetch_audio = lambda taibun, timeout=None, **kwargs: FAKE_MP3
+    hapsing.fetch_audio_hedged = lambda taibun, timeout=None, deadline=None: FAKE_MP3
+    # No sinks: usage counts stay in memory instead of being flushed to Supabase or a file
+    app.access_tracker = AccessTracker([])
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+def sse_events(app, view, payload):
+    """Drain an SSE endpoint's generator inside a request context"""
+    with app.app.test_request_context(method='POST', json=payload):
+        return sum(1 for _ in view().response)
+
+
+def benchmarks(app):
+    return {
+        'normalize_taiwanese_text': lambda: app.normalize_taiwanese_text(INPUTS['normalize']),
+        'search_in_definitions[hit]': lambda: app.search_in_definitions(INPUTS['definition_hit']),
+        'search_in_definitions[miss]': lambda: app.search_in_definitions(INPUTS['definition_miss']),
+        'get_taiwanese_romanization[hit]': lambda: app.get_taiwanese_romanization(INPUTS['word_hit']),
+        'get_taiwanese_romanization[normalized]': lambda: app.get_taiwanese_romanization(INPUTS['word_normalized']),
+        'get_taiwanese_romanization[miss]': lambda: app.get_taiwanese_romanization(INPUTS['word_miss']),
+        'segmentation[sentence]': lambda: app.romanize_sentence_with_word_lookup(INPUTS['sentence']),
+        'sse_romanize[taiwanese]': lambda: sse_events(app, app.romanize_stream,
+                                                      {'text': INPUTS['sentence'], 'sourceLanguage': 'taiwanese'}),
+        'sse_romanize[mandarin]': lambda: sse_events(app, app.romanize_stream,
+                                                     {'text': INPUTS['normalize'], 'sourceLanguage': 'mandarin'}),
+        'sse_romanize[english]': lambda: sse_events(app, app.romanize_stream,
+                                                    {'text': 'Riding bikes is fun', 'sourceLanguage': 'english'}),
+        'sse_generate_module': lambda: sse_events(app, app.generate_module_stream, {'theme': 'At the Market'}),
+    }
+
+
+def measure(function, rounds, min_time):
+    """Per-call seconds of each round, with loops per round calibrated to min_time"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            function()
+        samples.append((time.perf_counter() - started) / loops)
+    return {
+        'loops': loops,
+        'rounds': rounds,
+        'min_us': round(min(samples) * 1e6, 3),
+        'median_us': round(statistics.median(samples) * 1e6, 3),
+        'mean_us': round(statistics.mean(samples) * 1e6, 3),
+        'stddev_us': round(statistics.stdev(samples) * 1e6, 3) if len(samples) > 1 else 0.0,
+        'ops_per_sec': round(1 / statistics.median(samples), 1),
+    }
+
+
+def git_revision():
+    """(short commit, dirty) of the working tree, or ('unknown', False) outside git"""
+    try:
+        repo = Path(__file__).parent
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+
+@contextmanager
+def quiet():
+    # The pipeline prints on every lookup; keep it out of the timings
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        yield
+
+
+def print_comparison(results, previous):
+    print(f"\nCompared with {previous.get('commit')}{' (dirty)' if previous.get('dirty') else ''}:")
+    print(f"  {'benchmark':<42} {'before':>12} {'after':>12} {'change':>8}")
+    for name, stats in results.items():
+        before = previous.get('benchmarks', {}).get(name)
+        if not before:
+            print(f"  {name:<42} {'-':>12} {stats['median_us']:>10.1f}us {'new':>8}")
+            continue
+        ratio = stats['median_us'] / before['median_us'] if before['median_us'] else 1.0
+        print(f"  {name:<42} {before['median_us']:>10.1f}us {stats['median_us']:>10.1f}us {ratio:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline microbenchmarks for the romanization hot path')
+    parser.add_argument('-k', '--filter', help='Only benchmarks whose name contains this text')
+    parser.add_argument('--rounds', type=int, default=5, help='Timed rounds per benchmark (default: 5)')
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help='Minimum seconds per round used to calibrate loops (default: 0.05)')
+    parser.add_argument('--output', help=f'Results file (default: {RESULTS_DIR}/<commit>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare medians against')
+    args = parser.parse_args()
+
+    with quiet():
+        app = load_pipeline()
+    install_stand_ins(app)
+    if not app.moe_dict:
+        print("⚠️  MOE dictionary not loaded (backend/moedict-twblg.json missing): dictionary paths are not exercised")
+
+    selected = {name: function for name, function in benchmarks(app).items()
+                if not args.filter or args.filter in name}
+    results = {}
+    for name, function in selected.items():
+        with quiet():
+            function()  # warm-up
+            stats = measure(function, args.rounds, args.min_time)
+        results[name] = stats
+        print(f"{name:<42} median {stats['median_us']:>10.1f}us  min {stats['min_us']:>10.1f}us  "
+              f"±{stats['stddev_us']:.1f}  ({stats['ops_per_sec']:.0f} ops/s)")
+
+    commit, dirty = git_revision()
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{commit}{'-dirty' if dirty else ''}.json"
+    os.makedirs(output.parent, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'dirty': dirty,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+            'dictionary_entries': len(app.moe_dict),
+            'benchmarks': results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print_comparison(results, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Re-key the Supabase audio cache to the canonical key scheme (audio_keys.py)
+
+Older producers stored the same clip under incompatible names:
+  - generate_audio_supabase.py: md5(tailo).mp3
+  - cache_lesson_audio.py / cache_tonesandhi_audio.py: ASCII-only names, which
+    dropped tone diacritics so e.g. ta̍h and tah overwrote the same object
+  - audio_cache.tailo_text held the raw, unnormalized string
+
+This tool:
+  1. Groups audio_cache rows by canonical_tailo(tailo_text)
+  2. Keeps one row per group (most accessed, then largest file) and deletes the rest
+  3. Copies the object to '<canonical key>.mp3' and updates the row
+  4. Rows whose object was shared by different texts (diacritic collisions) cannot
+     be trusted: they are re-fetched from Hapsing with --refetch-collisions,
+     otherwise deleted so the next generation run recreates them
+"""
+
+import os
+import sys
+from collections import defaultdict
+from pathlib import Path
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import hapsing
+from audio_keys import canonical_tailo, audio_storage_path
+
+# Load environment variables from .env file
+env_path = Path(__file__).parent.parent.parent / '.env'
+load_dotenv(env_path)
+
+BUCKET_NAME = 'taiwanese-audio'
+
+
+def fetch_all_rows(supabase, page_size=1000):
+    """Read every audio_cache row, paging through the table"""
+    rows = []
+    start = 0
+    while True:
+        result = supabase.table('audio_cache').select('*').order('id').range(start, start + page_size - 1).execute()
+        rows.extend(result.data)
+        if len(result.data) < page_size:
+            return rows
+        start += page_size
+
+
+def plan_migration(rows):
+    """Work out which rows to keep, delete, move and re-fetch"""
+    texts_by_path = defaultdict(set)
+    for row in rows:
+        texts_by_path[row['storage_path']].add(canonical_tailo(row['tailo_text']))
+
+    groups = defaultdict(list)
+    for row in rows:
+        groups[canonical_tailo(row['tailo_text'])].append(row)
+
+    plan = {'keep': [], 'delete': [], 'collisions': []}
+    for canonical, group in groups.items():
+        group.sort(key=lambda r: (-(r.get('access_count') or 0), -(r.get('file_size') or 0), r['id']))
+        winner, losers = group[0], group[1:]
+        plan['delete'].extend(losers)
+
+        if len(texts_by_path[winner['storage_path']]) > 1:
+            plan['collisions'].append((canonical, winner))
+        else:
+            plan['keep'].append((canonical, winner, losers))
+
+    return plan
+
+
+def copy_object(supabase, source, target):
+    """Copy a storage object; an existing target is fine (same canonical clip)"""
+    try:
+        supabase.storage.from_(BUCKET_NAME).copy(source, target)
+    except Exception as e:
+        if 'already exists' not in str(e).lower() and 'duplicate' not in str(e).lower():
+            raise
+
+
+def migrate(supabase, dry_run=False, refetch_collisions=False, delete_old=False):
+    rows = fetch_all_rows(supabase)
+    plan = plan_migration(rows)
+
+    moves = [(c, w, l) for c, w, l in plan['keep'] if w['storage_path'] != audio_storage_path(c) or w['tailo_text'] != c]
+    print(f"Rows in audio_cache: {len(rows)}")
+    print(f"Canonical clips: {len(plan['keep']) + len(plan['collisions'])}")
+    print(f"Duplicate rows to merge: {len(plan['delete'])}")
+    print(f"Rows to re-key: {len(moves)}")
+    print(f"Diacritic collisions (shared object, untrusted audio): {len(plan['collisions'])}")
+
+    if dry_run:
+        for canonical, winner, _ in moves[:20]:
+            print(f"  {winner['tailo_text']!r}: {winner['storage_path']} → {audio_storage_path(canonical)}")
+        for canonical, winner in plan['collisions'][:20]:
+            print(f"  ⚠️  {winner['tailo_text']!r} shares {winner['storage_path']}")
+        print("\nDry run - no changes made")
+        return 0
+
+    table = supabase.table('audio_cache')
+    old_paths = set()
+
+    # Delete duplicates first so the canonical tailo_text is free for the winner
+    if plan['delete']:
+        table.delete().in_('id', [r['id'] for r in plan['delete']]).execute()
+        old_paths.update(r['storage_path'] for r in plan['delete'])
+        print(f"✓ Merged {len(plan['delete'])} duplicate rows")
+
+    failed = 0
+    for canonical, winner, losers in moves:
+        target = audio_storage_path(canonical)
+        try:
+            if winner['storage_path'] != target:
+                copy_object(supabase, winner['storage_path'], target)
+                old_paths.add(winner['storage_path'])
+            table.update({
+                'tailo_text': canonical,
+                'storage_path': target,
+                'access_count': sum((r.get('access_count') or 0) for r in [winner] + losers),
+            }).eq('id', winner['id']).execute()
+        except Exception as e:
+            failed += 1
+            print(f"  ❌ {winner['tailo_text']!r}: {e}")
+    print(f"✓ Re-keyed {len(moves) - failed}/{len(moves)} rows")
+
+    for canonical, winner in plan['collisions']:
+        old_paths.add(winner['storage_path'])
+        if not refetch_collisions:
+            table.delete().eq('id', winner['id']).execute()
+            continue
+        try:
+            audio_data = hapsing.fetch_audio(winner['tailo_text'], timeout=60)
+            target = audio_storage_path(canonical)
+            supabase.storage.from_(BUCKET_NAME).upload(
+                target, audio_data, file_options={'content-type': 'audio/mpeg', 'upsert': 'true'}
+            )
+            table.update({
+                'tailo_text': canonical,
+                'storage_path': target,
+                'file_size': len(audio_data),
+            }).eq('id', winner['id']).execute()
+            print(f"  🔊 Re-fetched {winner['tailo_text']!r}")
+        except Exception as e:
+            failed += 1
+            print(f"  ❌ Re-fetch failed for {winner['tailo_text']!r}: {e}")
+    if plan['collisions']:
+        action = 're-fetched' if refetch_collisions else 'deleted (regenerate with the audio scripts)'
+        print(f"✓ Collisions {action}: {len(plan['collisions'])}")
+
+    # Objects still referenced by a row must survive
+    referenced = {r['storage_path'] for r in fetch_all_rows(supabase)}
+    stale = sorted(old_paths - referenced)
+    if delete_old and stale:
+        for start in range(0, len(stale), 100):
+            supabase.storage.from_(BUCKET_NAME).remove(stale[start:start + 100])
+        print(f"✓ Removed {len(stale)} old objects")
+    elif stale:
+        print(f"ℹ️  {len(stale)} old objects left in storage (rerun with --delete-old to remove)")
+
+    return 1 if failed else 0
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Re-key the Supabase audio cache to canonical keys')
+    parser.add_argument('--dry-run', action='store_true', help='Only print what would change')
+    parser.add_argument('--refetch-collisions', action='store_true',
+                        help='Re-fetch clips whose object was shared by different texts instead of deleting them')
+    parser.add_argument('--delete-old', action='store_true', help='Remove objects stored under old keys')
+    args = parser.parse_args()
+
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+
+    if not supabase_url or not supabase_key:
+        print("❌ Missing Supabase credentials!")
+        print("\nPlease set environment variables:")
+        print("  export SUPABASE_URL='your-project-url'")
+        print("  export SUPABASE_KEY='your-service-role-key'")
+        return 1
+
+    supabase: Client = create_client(supabase_url, supabase_key)
+    return migrate(supabase, dry_run=args.dry_run, refetch_collisions=args.refetch_collisions,
+                   delete_old=args.delete_old)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
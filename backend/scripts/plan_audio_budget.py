@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Plan a budgeted pre-generation run (see audio_budget.py)
+
+Picks the missing clips (from the build manifest: lessons, tone sandhi drills,
+ranked dictionary entries) that cover the most expected traffic within a storage
+and/or time budget, and writes the plan for generate_audio_supabase.py:
+
+  python plan_audio_budget.py --bytes 200MB --time 2h --hapsing-rate 1 --workers 4
+  python plan_audio_budget.py --storage-limit 1GB        # fill the free tier
+  python generate_audio_supabase.py --plan ../data/audio_plan.json
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from access_stats import fetch_usage_counts
+from audio_budget import ClipModel, hit_rate, parse_duration, parse_size, plan_budget
+from audio_manifest import SOURCES, build_manifest, collect_items, save_json
+from audio_metadata import fetch_cached_rows
+
+# Load environment variables from .env file
+env_path = Path(__file__).parent.parent.parent / '.env'
+load_dotenv(env_path)
+
+DEFAULT_PLAN = Path(__file__).parent.parent / 'data' / 'audio_plan.json'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Choose the clips to pre-generate within a byte and time budget')
+    parser.add_argument('--bytes', type=parse_size, help='Storage budget for new clips, e.g. 200MB')
+    parser.add_argument('--storage-limit', type=parse_size,
+                        help='Total bucket size to stay under (budget = limit - bytes already stored), e.g. 1GB')
+    parser.add_argument('--time', type=parse_duration, help='Generation time budget, e.g. 2h or 90m')
+    parser.add_argument('--hapsing-rate', type=float, default=1.0,
+                        help='Hapsing requests per second the run will use (default: 1.0)')
+    parser.add_argument('--workers', type=int, default=4, help='Workers the run will use (default: 4)')
+    parser.add_argument('--source', choices=SOURCES, action='append',
+                        help='Source to plan from (repeatable; default: all)')
+    parser.add_argument('--output', default=str(DEFAULT_PLAN), help=f'Plan file (default: {DEFAULT_PLAN})')
+    args = parser.parse_args()
+
+    if args.bytes is None and args.storage_limit is None and args.time is None:
+        parser.error('give at least one budget: --bytes, --storage-limit or --time')
+
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    if not supabase_url or not supabase_key:
+        print("❌ Missing Supabase credentials!")
+        print("\nPlease set environment variables:")
+        print("  export SUPABASE_URL='your-project-url'")
+        print("  export SUPABASE_KEY='your-service-role-key'")
+        return 1
+
+    supabase: Client = create_client(supabase_url, supabase_key)
+    entries = build_manifest(collect_items(args.source or SOURCES))
+    rows = fetch_cached_rows(supabase, 'tailo_text, file_size')
+    cached = {row['tailo_text'] for row in rows}
+    stored_bytes = sum(row.get('file_size') or 0 for row in rows)
+
+    try:
+        usage_counts = fetch_usage_counts(supabase, 'audio')
+    except Exception as e:
+        print(f"⚠️  Could not load usage stats, planning from scores only: {e}")
+        usage_counts = {}
+
+    byte_budget = args.bytes
+    if args.storage_limit is not None:
+        remaining = max(0, args.storage_limit - stored_bytes)
+        byte_budget = remaining if byte_budget is None else min(byte_budget, remaining)
+
+    model = ClipModel().fit_sizes(rows)
+    candidates = [entry for entry in entries if entry['key'] not in cached]
+    chosen, totals = plan_budget(candidates, model, usage_counts, byte_budget=byte_budget, time_budget=args.time,
+                                 hapsing_rate=args.hapsing_rate, workers=args.workers)
+
+    chosen_keys = {entry['key'] for entry in chosen}
+    coverage_now = hit_rate(entries, cached, usage_counts)
+    coverage_after = hit_rate(entries, cached | chosen_keys, usage_counts)
+
+    save_json(args.output, {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'budgets': {'bytes': byte_budget, 'seconds': args.time, 'hapsing_rate': args.hapsing_rate,
+                    'workers': args.workers},
+        'model': model.describe(),
+        'totals': dict(totals, coverage_before=round(coverage_now, 4), coverage_after=round(coverage_after, 4)),
+        'entries': chosen,
+    })
+
+    model_info = model.describe()
+    print(f"Manifest: {len(entries)} clips, {len(cached)} cached ({stored_bytes / 1024 / 1024:.1f} MB stored)")
+    print(f"Size model: {model_info['base_bytes']} + {model_info['bytes_per_syllable']} bytes/syllable "
+          f"({'fitted on ' + str(model.fitted_on) + ' clips' if model.fitted_on else 'defaults'})")
+    print(f"Budget: {'%.1f MB' % (byte_budget / 1024 / 1024) if byte_budget is not None else 'unlimited'} | "
+          f"{'%.1f h' % (args.time / 3600) if args.time else 'no time limit'}")
+    print(f"Plan: {totals['chosen']}/{totals['candidates']} missing clips, "
+          f"~{totals['est_bytes'] / 1024 / 1024:.1f} MB, ~{totals['est_seconds'] / 60:.0f} min")
+    print(f"Expected hit rate: {coverage_now * 100:.1f}% → {coverage_after * 100:.1f}%")
+    print(f"\n✓ Plan written to {args.output}")
+    print(f"  Run it with: python3 backend/scripts/generate_audio_supabase.py --plan {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
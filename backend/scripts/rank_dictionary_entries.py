@@ -2,14 +2,48 @@
 """
 Dictionary Entry Scoring Script
 Ranks MOE dictionary entries by importance/frequency for audio pre-generation
+
+With NumPy installed the features are extracted once into a columnar table and
+scored vectorized, so the whole dictionary re-scores in milliseconds and weights
+can be tuned with sweeps:
+  python rank_dictionary_entries.py --sweep essential_category_scores.numbers=15,20,25,30
+  python rank_dictionary_entries.py --weights my_weights.json
+Without NumPy entries are scored one by one (same results). NumPy is an optional
+dependency of this script only, so it is not in requirements.txt (the server does
+not need it); install it with `pip install numpy`.
+
+Observed traffic can be blended in: words seen in romanize and audio requests
+(usage_stats, see access_stats.py) add up to observed_frequency_max points,
+log-scaled and decayed by the age of their last request. A diff against the
+previous priority list is written next to it:
+  python rank_dictionary_entries.py --usage-supabase
+  python rank_dictionary_entries.py --usage-file ../data/usage_stats.json --usage-half-life 14
 """
 
+import argparse
+import copy
+import heapq
 import json
+import math
+import os
 import sys
+import time
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from access_stats import fetch_usage_records, load_usage_records
+from audio_assembly import segment_tailo
+from audio_keys import canonical_tailo, priority_tier
+
 # Essential word categories
 ESSENTIAL_CATEGORIES = {
     'numbers': [
@@ -123,12 +157,237 @@ SCORING_WEIGHTS = {
         '量': 5,   # Classifier
         '助': 10,  # Particle
         '數': 8    # Number
-    }
+    },
+    # Points for the most requested word when usage is ingested (log-scaled below it)
+    'observed_frequency_max': 30
 }
 
+DEFAULT_USAGE_HALF_LIFE_DAYS = 30
+# Longest dictionary word tried when segmenting romanize requests
+MAX_SEGMENT_LENGTH = 8
+
+
+# Essential words that should be in the top 100 (validate_results, sweeps)
+MUST_HAVE_WORDS = ['我', '你', '伊', '食', '是', '的', '好', '一', '二', '三']
+
+
+def merge_weights(base, overrides):
+    """SCORING_WEIGHTS with overrides applied (nested dicts merged; numeric JSON keys become ints)"""
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            for sub_key, sub_value in value.items():
+                if isinstance(sub_key, str) and sub_key.isdigit():
+                    sub_key = int(sub_key)
+                merged[key][sub_key] = sub_value
+        else:
+            merged[key] = value
+    return merged
+
+
+def decayed_count(count, last_accessed, now, half_life_days):
+    """Aggregated count weighted by the age of its last request (halving every half_life_days)"""
+    try:
+        last = datetime.fromisoformat(str(last_accessed).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return float(count)
+    age_days = max(0.0, (now - last) / 86400)
+    return count * 0.5 ** (age_days / half_life_days)
+
+
+def segment_han(text, titles, max_length=MAX_SEGMENT_LENGTH):
+    """Greedy longest-match segmentation of a Han sentence into dictionary words (unknown characters skipped)"""
+    words = []
+    i = 0
+    while i < len(text):
+        for length in range(min(max_length, len(text) - i), 0, -1):
+            if text[i:i + length] in titles:
+                words.append(text[i:i + length])
+                i += length
+                break
+        else:
+            i += 1
+    return words
+
+
+def observed_frequencies(usage, entries, half_life_days=DEFAULT_USAGE_HALF_LIFE_DAYS, now=None):
+    """
+    Decayed request counts per dictionary word
+    usage: {'romanize': {han sentence: (count, last_accessed)}, 'audio': {tailo: (count, last_accessed)}}
+    Romanize requests are segmented into dictionary words; audio requests are matched by
+    canonical Tâi-lô, whole text first, then word by word (homophones share the credit).
+    """
+    now = now or time.time()
+    titles = {entry['title'] for entry in entries}
+    by_tailo = defaultdict(set)
+    for entry in entries:
+        for heteronym in entry.get('heteronyms', []):
+            for reading in heteronym.get('trs', '').split('/'):
+                if reading.strip():
+                    by_tailo[canonical_tailo(reading)].add(entry['title'])
+
+    observed = defaultdict(float)
+    for text, (count, last_accessed) in usage.get('romanize', {}).items():
+        weight = decayed_count(count, last_accessed, now, half_life_days)
+        for word in segment_han(text, titles):
+            observed[word] += weight
+
+    for text, (count, last_accessed) in usage.get('audio', {}).items():
+        weight = decayed_count(count, last_accessed, now, half_life_days)
+        key = canonical_tailo(text)
+        groups = [by_tailo[key]] if key in by_tailo else \
+            [by_tailo[word] for word in segment_tailo(key) if word in by_tailo]
+        for words in groups:
+            for word in words:
+                observed[word] += weight / len(words)
+    return dict(observed)
+
+
+def observed_points(frequency, max_frequency, max_points):
+    """Log-scaled points: max_points for the most requested word"""
+    if frequency <= 0 or max_frequency <= 0:
+        return 0
+    return int(round(max_points * math.log1p(frequency) / math.log1p(max_frequency)))
+
+
+def plain_number(value):
+    """A score as the pure-Python path produces it: int when whole, float otherwise"""
+    value = round(float(value), 6)  # drops float64 summation noise, not fractional weights
+    return int(value) if value.is_integer() else value
+
+
+def diff_priority_lists(old_entries, new_entries, movers=20):
+    """What changed between two exported priority lists"""
+    old_rank = {entry['word']: i for i, entry in enumerate(old_entries, 1)}
+    new_rank = {entry['word']: i for i, entry in enumerate(new_entries, 1)}
+    old_by_word = {entry['word']: entry for entry in old_entries}
+
+    added = [entry for entry in new_entries if entry['word'] not in old_rank]
+    dropped = [entry for entry in old_entries if entry['word'] not in new_rank]
+    moved = []
+    tier_changes = 0
+    for entry in new_entries:
+        old = old_by_word.get(entry['word'])
+        if old is None:
+            continue
+        if priority_tier(old['score']) != priority_tier(entry['score']):
+            tier_changes += 1
+        change = old_rank[entry['word']] - new_rank[entry['word']]
+        if change:
+            moved.append({'word': entry['word'], 'romanization': entry['romanization'],
+                          'old_rank': old_rank[entry['word']], 'new_rank': new_rank[entry['word']],
+                          'old_score': old['score'], 'new_score': entry['score']})
+    moved.sort(key=lambda m: -abs(m['old_rank'] - m['new_rank']))
+
+    return {
+        'added': [{'word': e['word'], 'romanization': e['romanization'], 'rank': new_rank[e['word']],
+                   'score': e['score']} for e in added],
+        'dropped': [{'word': e['word'], 'romanization': e['romanization'], 'old_rank': old_rank[e['word']],
+                     'score': e['score']} for e in dropped],
+        'tier_changes': tier_changes,
+        'moved': len(moved),
+        'top_movers': moved[:movers],
+    }
+
+
+def parse_sweep(spec):
+    """'essential_category_scores.numbers=15,20,25' → (['essential_category_scores', 'numbers'], [15, 20, 25])"""
+    path, _, values = spec.partition('=')
+    if not path or not values:
+        raise argparse.ArgumentTypeError(f"expected PATH=V1,V2,... got {spec!r}")
+    keys = [int(part) if part.isdigit() else part for part in path.split('.')]
+    return keys, [float(v) if '.' in v else int(v) for v in values.split(',')]
+
+
+class FeatureTable:
+    """
+    Columnar scoring features, one row per distinct word: character length,
+    synonym count, definition count, and category / part-of-speech membership
+    as boolean matrices
+    """
+
+    def __init__(self, entries, synonym_index, category_map, category_names, pos_names):
+        self.words = [entry['title'] for entry in entries]
+        self.category_names = category_names
+        self.pos_names = pos_names
+        category_column = {name: i for i, name in enumerate(category_names)}
+        pos_column = {name: i for i, name in enumerate(pos_names)}
+
+        n = len(entries)
+        self.length = np.fromiter((len(word) for word in self.words), dtype=np.int64, count=n)
+        self.synonyms = np.fromiter((synonym_index.get(word, 0) for word in self.words), dtype=np.int64, count=n)
+        self.definitions = np.zeros(n, dtype=np.int64)
+        self.observed = np.zeros(n, dtype=np.float64)
+        self.categories = np.zeros((n, len(category_names)), dtype=bool)
+        self.pos = np.zeros((n, len(pos_names)), dtype=bool)
+
+        for row, entry in enumerate(entries):
+            for category in category_map.get(entry['title'], []):
+                self.categories[row, category_column[category]] = True
+            for heteronym in entry.get('heteronyms', []):
+                definitions = heteronym.get('definitions', [])
+                self.definitions[row] += len(definitions)
+                for definition in definitions:
+                    self.pos[row, pos_column[definition.get('type', '')]] = True
+
+    def __len__(self):
+        return len(self.words)
+
+    def set_observed(self, observed):
+        """Decayed request counts per word (observed_frequencies)"""
+        self.observed = np.fromiter((observed.get(word, 0.0) for word in self.words), dtype=np.float64,
+                                    count=len(self.words))
+
+    def score(self, weights):
+        """
+        Vectorized scores: (total, {factor: array}) with the same rules as calculate_total_score
+        Weights may be fractional (--weights, --sweep), so every factor is float64
+        """
+        length_weights = weights['word_length']
+        lookup = np.ones(max(int(self.length.max(initial=0)), max(length_weights, default=0)) + 1, dtype=np.float64)
+        for length, value in length_weights.items():
+            lookup[length] = value
+
+        category_weights = np.array([weights['essential_category_scores'].get(name, 0)
+                                     for name in self.category_names], dtype=np.float64)
+        if len(self.category_names):
+            best = np.where(self.categories, category_weights, -np.inf).max(axis=1)
+            category_scores = np.where(self.categories.any(axis=1), best, 0)
+        else:
+            category_scores = np.zeros(len(self), dtype=np.float64)
+
+        pos_weights = np.array([weights['pos_priority'].get(name, 0) for name in self.pos_names], dtype=np.float64)
+        pos_scores = np.where(self.pos, pos_weights, 0).max(axis=1, initial=0)
+
+        breakdown = {
+            'word_length': lookup[self.length],
+            'synonym_frequency': np.minimum(self.synonyms, weights['synonym_frequency_max']).astype(np.float64),
+            'definition_count': np.minimum(self.definitions * 2, weights['definition_count_max']).astype(np.float64),
+            'essential_category': category_scores,
+            'pos_priority': pos_scores,
+        }
+        max_frequency = self.observed.max(initial=0.0)
+        if max_frequency > 0:
+            # Same rounding as observed_points (round half to even)
+            points = weights.get('observed_frequency_max', 0) * np.log1p(self.observed) / math.log1p(max_frequency)
+            breakdown['observed_frequency'] = np.rint(points).astype(np.int64)
+        total = sum(breakdown.values())
+        return total, breakdown
+
+    def top_indices(self, total, n):
+        """Rows of the n highest totals, ties by word (partition, then sort only the candidates)"""
+        if n < len(total):
+            threshold = np.partition(total, len(total) - n)[len(total) - n]
+            candidates = np.flatnonzero(total >= threshold)
+        else:
+            candidates = np.arange(len(total))
+        totals = total[candidates].tolist()
+        order = sorted(range(len(candidates)), key=lambda i: (-totals[i], self.words[candidates[i]]))
+        return [int(candidates[i]) for i in order[:n]]
+
 
 class DictionaryScorer:
-    def __init__(self, dict_path):
+    def __init__(self, dict_path, weights=None):
         print(f"Loading dictionary from {dict_path}...")
         self.dictionary = self.load_dictionary(dict_path)
         print(f"Loaded {len(self.dictionary)} entries")
@@ -137,8 +396,13 @@ class DictionaryScorer:
         self.synonym_index = self.build_synonym_index()
         print(f"Found {len(self.synonym_index)} words appearing as synonyms")
 
+        self.weights = weights or SCORING_WEIGHTS
         self.scores = {}
         self.category_map = self.build_category_map()
+        self.table = None
+        self.total = None
+        self._ranking = None
+        self.observed = {}
 
     def load_dictionary(self, path):
         """Load MOE dictionary"""
@@ -179,13 +443,13 @@ class DictionaryScorer:
     def calculate_word_length_score(self, word):
         """Score based on character length (shorter = higher score)"""
         length = len(word)
-        return SCORING_WEIGHTS['word_length'].get(length, 1)
+        return self.weights['word_length'].get(length, 1)
 
     def calculate_synonym_score(self, word):
         """Score based on synonym frequency"""
         count = self.synonym_index.get(word, 0)
         # Linear score up to max
-        return min(count, SCORING_WEIGHTS['synonym_frequency_max'])
+        return min(count, self.weights['synonym_frequency_max'])
 
     def calculate_definition_score(self, entry):
         """Score based on number of definitions (indicates versatility)"""
@@ -198,7 +462,7 @@ class DictionaryScorer:
             total_defs += len(definitions)
 
         # 2 points per definition, capped
-        score = min(total_defs * 2, SCORING_WEIGHTS['definition_count_max'])
+        score = min(total_defs * 2, self.weights['definition_count_max'])
         return score
 
     def calculate_category_score(self, word):
@@ -207,7 +471,7 @@ class DictionaryScorer:
             return 0
 
         categories = self.category_map[word]
-        category_scores = SCORING_WEIGHTS['essential_category_scores']
+        category_scores = self.weights['essential_category_scores']
 
         # Take highest category score
         max_score = max(category_scores.get(cat, 0) for cat in categories)
@@ -219,7 +483,7 @@ class DictionaryScorer:
             return 0
 
         max_score = 0
-        pos_scores = SCORING_WEIGHTS['pos_priority']
+        pos_scores = self.weights['pos_priority']
 
         for heteronym in entry['heteronyms']:
             definitions = heteronym.get('definitions', [])
@@ -230,6 +494,19 @@ class DictionaryScorer:
 
         return max_score
 
+    def load_usage(self, usage, half_life_days=DEFAULT_USAGE_HALF_LIFE_DAYS):
+        """Ingest aggregated request counts (see observed_frequencies); call before score_all_entries"""
+        self.observed = observed_frequencies(usage, self.distinct_entries(), half_life_days)
+        self._max_observed = max(self.observed.values(), default=0.0)
+        requests = sum(len(records) for records in usage.values())
+        print(f"Ingested {requests} distinct requests → {len(self.observed)} dictionary words observed "
+              f"(half-life {half_life_days:g} days)")
+
+    def calculate_observed_score(self, word):
+        """Score based on how often learners requested the word (log-scaled, decayed)"""
+        return observed_points(self.observed.get(word, 0.0), self._max_observed,
+                               self.weights.get('observed_frequency_max', 0))
+
     def calculate_total_score(self, entry):
         """Combine all scoring factors"""
         word = entry['title']
@@ -241,14 +518,75 @@ class DictionaryScorer:
             'essential_category': self.calculate_category_score(word),
             'pos_priority': self.calculate_pos_score(entry)
         }
+        if self.observed:
+            scores['observed_frequency'] = self.calculate_observed_score(word)
 
         total = sum(scores.values())
 
         return total, scores
 
+    def distinct_entries(self):
+        """One entry per word (a repeated title keeps its last entry, in first-seen order)"""
+        entries = {}
+        for entry in self.dictionary:
+            entries[entry['title']] = entry
+        return list(entries.values())
+
+    def build_feature_table(self):
+        """Extract the columnar features once (needs NumPy)"""
+        entries = self.distinct_entries()
+        pos_names = sorted({definition.get('type', '')
+                            for entry in entries
+                            for heteronym in entry.get('heteronyms', [])
+                            for definition in heteronym.get('definitions', [])})
+        started = time.perf_counter()
+        self.table = FeatureTable(entries, self.synonym_index, self.category_map,
+                                  list(ESSENTIAL_CATEGORIES), pos_names)
+        self.table.entries = entries
+        if self.observed:
+            self.table.set_observed(self.observed)
+        print(f"Built feature table: {len(self.table)} words × "
+              f"{len(pos_names)} parts of speech, {len(ESSENTIAL_CATEGORIES)} categories "
+              f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+        return self.table
+
+    def rescore(self, weights):
+        """Total score of every word under other weights (vectorized when NumPy is available)"""
+        if self.table is not None:
+            return self.table.score(weights)[0]
+        current, self.weights = self.weights, weights
+        try:
+            return [self.calculate_total_score(entry)[0] for entry in self.distinct_entries()]
+        finally:
+            self.weights = current
+
     def score_all_entries(self):
         """Score all dictionary entries"""
         print("\nScoring all entries...")
+        self._ranking = None
+
+        if np is not None:
+            self.build_feature_table()
+            started = time.perf_counter()
+            self.total, breakdown = self.table.score(self.weights)
+            print(f"Scored {len(self.table)} entries ({(time.perf_counter() - started) * 1000:.1f} ms, vectorized)")
+            columns = {factor: [plain_number(value) for value in values.tolist()]
+                       for factor, values in breakdown.items()}
+            totals = [plain_number(value) for value in self.total.tolist()]
+            for row, entry in enumerate(self.table.entries):
+                word = entry['title']
+                romanization = ''
+                if 'heteronyms' in entry and entry['heteronyms']:
+                    romanization = entry['heteronyms'][0].get('trs', '')
+                self.scores[word] = {
+                    'word': word,
+                    'romanization': romanization,
+                    'score': totals[row],
+                    'breakdown': {factor: values[row] for factor, values in columns.items()},
+                    'categories': self.category_map.get(word, []),
+                    'entry': entry
+                }
+            return
 
         for i, entry in enumerate(self.dictionary):
             if i % 1000 == 0 and i > 0:
@@ -274,12 +612,50 @@ class DictionaryScorer:
         print(f"Scored {len(self.scores)} entries")
 
     def get_top_n(self, n=3000):
-        """Get top N entries by score"""
-        sorted_entries = sorted(
-            self.scores.values(),
-            key=lambda x: (-x['score'], x['word'])  # Descending score, then alphabetical
-        )
-        return sorted_entries[:n]
+        """Get top N entries by score (descending score, then alphabetical); cached between calls"""
+        if self._ranking is None or (len(self._ranking) < n and len(self._ranking) < len(self.scores)):
+            if self.table is not None:
+                words = self.table.words
+                self._ranking = [self.scores[words[row]] for row in self.table.top_indices(self.total, n)]
+            else:
+                self._ranking = heapq.nsmallest(n, self.scores.values(), key=lambda x: (-x['score'], x['word']))
+        return self._ranking[:n]
+
+    def sweep(self, path, values, top=3000):
+        """
+        Re-score the dictionary with one weight set to each value and report how the
+        ranking moves: must-have words in the top 100, tier sizes and overlap of the
+        top list with the current weights
+        """
+        baseline = {entry['word'] for entry in self.get_top_n(top)}
+        words = self.table.words if self.table is not None else [e['title'] for e in self.distinct_entries()]
+
+        print(f"\n{'=' * 80}")
+        print(f"SWEEP {'.'.join(str(key) for key in path)} (top {top})")
+        print(f"{'=' * 80}")
+        print(f"{'Value':<8} {'Must-have':<10} {'Tier 1':<8} {'Tier 2':<8} {'Tier 3':<8} {'Overlap':<9} {'ms'}")
+        for value in values:
+            weights = copy.deepcopy(self.weights)
+            target = weights
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = value
+
+            started = time.perf_counter()
+            total = self.rescore(weights)
+            if self.table is not None:
+                rows = self.table.top_indices(total, top)
+            else:
+                rows = heapq.nsmallest(top, range(len(words)), key=lambda i: (-total[i], words[i]))
+            elapsed = (time.perf_counter() - started) * 1000
+
+            top_words = [words[row] for row in rows]
+            top_scores = [total[row] for row in rows]
+            must_have = sum(1 for word in MUST_HAVE_WORDS if word in set(top_words[:100]))
+            tiers = [sum(1 for score in top_scores if priority_tier(score) == tier) for tier in (1, 2, 3)]
+            overlap = len(baseline & set(top_words)) / max(1, len(top_words))
+            print(f"{value:<8} {must_have}/{len(MUST_HAVE_WORDS):<8} {tiers[0]:<8} {tiers[1]:<8} {tiers[2]:<8} "
+                  f"{overlap * 100:>6.1f}%   {elapsed:.1f}")
 
     def assign_tiers(self, entries):
         """Assign tier levels based on score distribution"""
@@ -290,14 +666,7 @@ class DictionaryScorer:
         }
 
         for entry in entries:
-            score = entry['score']
-
-            if score >= 60:
-                tiers['tier_1'].append(entry)
-            elif score >= 40:
-                tiers['tier_2'].append(entry)
-            else:
-                tiers['tier_3'].append(entry)
+            tiers[f"tier_{priority_tier(entry['score'])}"].append(entry)
 
         return tiers
 
@@ -335,7 +704,7 @@ class DictionaryScorer:
                 'scored_entries': len(self.scores),
                 'top_n': n,
                 'generated_at': datetime.now().isoformat(),
-                'scoring_criteria': SCORING_WEIGHTS
+                'scoring_criteria': self.weights
             },
             'tiers': tier_summaries,
             'entries': export_entries
@@ -379,11 +748,8 @@ class DictionaryScorer:
         top_100 = self.get_top_n(100)
         top_100_words = [e['word'] for e in top_100]
 
-        # Essential words that should be in top 100
-        must_have = ['我', '你', '伊', '食', '是', '的', '好', '一', '二', '三']
-
         print("\nChecking essential words in top 100:")
-        for word in must_have:
+        for word in MUST_HAVE_WORDS:
             if word in top_100_words:
                 rank = top_100_words.index(word) + 1
                 score = self.scores[word]['score']
@@ -408,28 +774,88 @@ class DictionaryScorer:
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Rank dictionary entries for audio pre-generation')
+    parser.add_argument('--dict', help='MOE dictionary JSON (default: backend/moedict-twblg.json)')
+    parser.add_argument('--weights', help='JSON file with SCORING_WEIGHTS overrides')
+    parser.add_argument('--sweep', type=parse_sweep, action='append', metavar='PATH=V1,V2,...',
+                        help='Re-score with a weight set to each value and compare rankings (repeatable), '
+                             'e.g. essential_category_scores.numbers=15,20,25 or word_length.2=10,15')
+    parser.add_argument('--top', type=int, default=3000, help='Entries to export (default: 3000)')
+    parser.add_argument('--output', help='Priority list to write (default: backend/data/priority_entries.json)')
+    parser.add_argument('--usage-file', help='Blend in request counts from a usage_stats.json file')
+    parser.add_argument('--usage-supabase', action='store_true',
+                        help='Blend in request counts from the Supabase usage_stats table')
+    parser.add_argument('--usage-half-life', type=float, default=DEFAULT_USAGE_HALF_LIFE_DAYS,
+                        help=f'Days after which a request counts half (default: {DEFAULT_USAGE_HALF_LIFE_DAYS})')
+    args = parser.parse_args()
+
     # Paths
-    dict_path = Path(__file__).parent.parent / 'moedict-twblg.json'
-    output_path = Path(__file__).parent.parent / 'data' / 'priority_entries.json'
+    dict_path = Path(args.dict) if args.dict else Path(__file__).parent.parent / 'moedict-twblg.json'
+    output_path = Path(args.output) if args.output else Path(__file__).parent.parent / 'data' / 'priority_entries.json'
+    diff_path = output_path.with_name(output_path.stem + '.diff.json')
 
     if not dict_path.exists():
         print(f"Error: Dictionary not found at {dict_path}")
         sys.exit(1)
 
+    weights = SCORING_WEIGHTS
+    if args.weights:
+        with open(args.weights, 'r', encoding='utf-8') as f:
+            weights = merge_weights(SCORING_WEIGHTS, json.load(f))
+
     # Create scorer
-    scorer = DictionaryScorer(dict_path)
+    scorer = DictionaryScorer(dict_path, weights=weights)
+
+    # Observed traffic
+    usage = {}
+    if args.usage_file:
+        usage = {kind: load_usage_records(args.usage_file, kind) for kind in ('romanize', 'audio')}
+    elif args.usage_supabase:
+        from dotenv import load_dotenv
+        from supabase import create_client
+        load_dotenv(Path(__file__).parent.parent.parent / '.env')
+        if not os.getenv('SUPABASE_URL') or not os.getenv('SUPABASE_KEY'):
+            print("❌ SUPABASE_URL or SUPABASE_KEY not set")
+            sys.exit(1)
+        supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY'))
+        usage = {kind: fetch_usage_records(supabase, kind) for kind in ('romanize', 'audio')}
+    if usage:
+        scorer.load_usage(usage, half_life_days=args.usage_half_life)
 
     # Score all entries
     scorer.score_all_entries()
 
+    if args.sweep:
+        if np is None:
+            print("⚠️  NumPy not installed, sweeps re-score entry by entry (pip install numpy)")
+        for path, values in args.sweep:
+            scorer.sweep(path, values, top=args.top)
+        return
+
     # Validate results
     scorer.validate_results()
 
     # Print top entries
     scorer.print_top_entries(50)
 
+    # Previous list, for the diff report
+    old_entries = None
+    if output_path.exists():
+        with open(output_path, 'r', encoding='utf-8') as f:
+            old_entries = json.load(f).get('entries')
+
     # Export priority list
-    scorer.export_priority_list(output_path, n=3000)
+    scorer.export_priority_list(output_path, n=args.top)
+
+    if old_entries is not None:
+        diff = diff_priority_lists(old_entries, scorer.get_top_n(args.top))
+        with open(diff_path, 'w', encoding='utf-8') as f:
+            json.dump(diff, f, ensure_ascii=False, indent=2)
+        print(f"\nChanges vs previous list: {len(diff['added'])} added, {len(diff['dropped'])} dropped, "
+              f"{diff['moved']} moved, {diff['tier_changes']} changed tier → {diff_path}")
+        for mover in diff['top_movers'][:10]:
+            print(f"  {mover['word']:<8} {mover['romanization']:<20} #{mover['old_rank']} → #{mover['new_rank']} "
+                  f"({mover['old_score']} → {mover['new_score']})")
 
     print("\n" + "="*80)
     print("COMPLETE!")
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Reconcile Supabase Storage with the audio_cache table
+
+A crash between the storage upload and the metadata write leaves objects nobody
+can find (orphans); objects deleted by hand leave rows pointing at nothing
+(dangling rows). This tool lists both:
+  - orphans the generation journal knows (an 'uploaded' record with the same
+    storage path) get their audio_cache row written with --fix
+  - other orphans (the key is a one-way hash, the text is unknown) are deleted
+    with --delete-orphans, as are variants whose original has no row and
+    variants transcoded from an older recipe version of the original
+  - dangling rows are deleted with --fix so the next generation run recreates them
+Run it while no generation run is active: an in-flight upload looks like an orphan.
+
+Usage:
+  python reconcile_audio_cache.py                       # report only
+  python reconcile_audio_cache.py --fix --delete-orphans
+"""
+
+import argparse
+import os
+import re
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from audio_keys import KEY_LENGTH, RECIPE_VERSION
+from audio_metadata import MetadataWriter, fetch_cached_rows, list_storage_objects
+from generation_journal import GenerationJournal, UPLOADED
+
+# Load environment variables from .env file
+env_path = Path(__file__).parent.parent.parent / '.env'
+load_dotenv(env_path)
+
+BUCKET_NAME = 'taiwanese-audio'
+DEFAULT_JOURNAL = Path(__file__).parent.parent / 'data' / 'generation_journal.jsonl'
+
+# '<key>.mp3' originals and '<key>.r<recipe version>.<variant>.<ext>' variants
+# (audio_variants.py; variants made before recipe versions have no '.r<n>')
+OBJECT_NAME = re.compile(rf'^([0-9a-f]{{{KEY_LENGTH}}})(?:\.r(\d+))?(?:\.([a-z0-9-]+))?\.(mp3|webm)$')
+
+
+def reconcile(rows, objects, journal=None):
+    """
+    Diff rows against object names
+    Returns {'recoverable': [(text, record)], 'orphans': [names], 'orphan_variants': [names],
+             'stale_variants': [names], 'dangling': [rows]}
+    """
+    row_paths = {row['storage_path'] for row in rows}
+    row_keys = {path.split('.', 1)[0] for path in row_paths}
+
+    uploaded = {}
+    if journal:
+        for text, record in journal.state.items():
+            if record['event'] == UPLOADED:
+                uploaded[record['storage_path']] = (text, record)
+
+    report = {'recoverable': [], 'orphans': [], 'orphan_variants': [], 'stale_variants': [], 'dangling': []}
+    for name in sorted(objects):
+        match = OBJECT_NAME.match(name)
+        if not match or name in row_paths:
+            continue
+        key, version, variant = match.group(1), match.group(2), match.group(3)
+        if variant:
+            if key not in row_keys:
+                report['orphan_variants'].append(name)
+            elif version != str(RECIPE_VERSION):
+                report['stale_variants'].append(name)
+        elif name in uploaded:
+            report['recoverable'].append(uploaded[name])
+        else:
+            report['orphans'].append(name)
+
+    report['dangling'] = [row for row in rows if row['storage_path'] not in objects]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find storage objects without audio_cache rows and the reverse')
+    parser.add_argument('--fix', action='store_true',
+                        help='Write rows for orphans known to the journal and delete dangling rows')
+    parser.add_argument('--delete-orphans', action='store_true',
+                        help='Delete orphaned objects the journal does not know (and orphaned or stale variants)')
+    parser.add_argument('--journal', default=str(DEFAULT_JOURNAL),
+                        help=f'Generation journal (default: {DEFAULT_JOURNAL})')
+    args = parser.parse_args()
+
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    if not supabase_url or not supabase_key:
+        print("❌ Missing Supabase credentials!")
+        print("\nPlease set environment variables:")
+        print("  export SUPABASE_URL='your-project-url'")
+        print("  export SUPABASE_KEY='your-service-role-key'")
+        return 1
+
+    supabase: Client = create_client(supabase_url, supabase_key)
+    journal = GenerationJournal(args.journal) if os.path.exists(args.journal) else None
+    if journal is None:
+        print(f"⚠️  No journal at {args.journal}: orphans cannot be matched to their text")
+
+    rows = fetch_cached_rows(supabase)
+    objects = list_storage_objects(supabase, BUCKET_NAME)
+    report = reconcile(rows, objects, journal)
+
+    print(f"Rows: {len(rows)} | Objects: {len(objects)}")
+    print(f"Orphans recoverable from journal: {len(report['recoverable'])}")
+    print(f"Orphans of unknown text: {len(report['orphans'])}")
+    print(f"Variants without an original row: {len(report['orphan_variants'])}")
+    print(f"Variants of an older recipe version: {len(report['stale_variants'])}")
+    print(f"Rows without an object: {len(report['dangling'])}")
+    for row in report['dangling'][:20]:
+        print(f"  - {row['tailo_text']} → {row['storage_path']}")
+
+    if args.fix:
+        if report['recoverable']:
+            def write(batch):
+                supabase.table('audio_cache').upsert(batch, on_conflict='tailo_text').execute()
+                for row in batch:
+                    journal.completed(row['tailo_text'])
+
+            metadata = MetadataWriter(supabase, write=write)
+            for text, record in report['recoverable']:
+                fields = {field: record[field] for field in ('tier', 'score') if record.get(field) is not None}
+                metadata.add(text, record['storage_path'], record['file_size'], **fields)
+            metadata.flush()
+            print(f"✓ Wrote {metadata.stats['rows_written']} rows ({metadata.stats['rows_failed']} failed)")
+
+        dangling = [row['storage_path'] for row in report['dangling']]
+        for start in range(0, len(dangling), 100):
+            supabase.table('audio_cache').delete().in_('storage_path', dangling[start:start + 100]).execute()
+        if dangling:
+            print(f"✓ Deleted {len(dangling)} dangling rows (the next generation run recreates them)")
+
+    if args.delete_orphans:
+        stale = report['orphans'] + report['orphan_variants'] + report['stale_variants']
+        for start in range(0, len(stale), 100):
+            supabase.storage.from_(BUCKET_NAME).remove(stale[start:start + 100])
+        if stale:
+            print(f"✓ Deleted {len(stale)} orphaned objects")
+
+    if journal:
+        journal.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
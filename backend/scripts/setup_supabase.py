@@ -28,9 +28,13 @@ def setup_audio_table(supabase: Client):
         tier INTEGER,
         score INTEGER,
         created_at TIMESTAMPTZ DEFAULT NOW(),
-        last_accessed TIMESTAMPTZ DEFAULT NOW()
+        last_accessed TIMESTAMPTZ DEFAULT NOW(),
+        access_count BIGINT DEFAULT 0
     );
 
+    -- Existing installs: add the access counter
+    ALTER TABLE audio_cache ADD COLUMN IF NOT EXISTS access_count BIGINT DEFAULT 0;
+
     -- Create indexes for fast lookups
     CREATE INDEX IF NOT EXISTS idx_audio_cache_tailo_text ON audio_cache(tailo_text);
     CREATE INDEX IF NOT EXISTS idx_audio_cache_tier ON audio_cache(tier);
@@ -49,6 +53,41 @@ def setup_audio_table(supabase: Client):
     CREATE POLICY "Allow service role all access" ON audio_cache
         USING (true)
         WITH CHECK (true);
+
+    -- Aggregated access counts for audio and romanization requests
+    CREATE TABLE IF NOT EXISTS usage_stats (
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL,
+        access_count BIGINT NOT NULL DEFAULT 0,
+        last_accessed TIMESTAMPTZ DEFAULT NOW(),
+        PRIMARY KEY (kind, key)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_usage_stats_count ON usage_stats(kind, access_count DESC);
+
+    ALTER TABLE usage_stats ENABLE ROW LEVEL SECURITY;
+
+    DROP POLICY IF EXISTS "Allow service role all access" ON usage_stats;
+    CREATE POLICY "Allow service role all access" ON usage_stats
+        USING (true)
+        WITH CHECK (true);
+
+    -- Batched flush from the app: [{kind, key, count, last_accessed}, ...]
+    -- Increments usage_stats and bumps audio_cache.access_count / last_accessed
+    CREATE OR REPLACE FUNCTION record_access(events JSONB) RETURNS VOID AS $$
+        INSERT INTO usage_stats (kind, key, access_count, last_accessed)
+        SELECT e->>'kind', e->>'key', (e->>'count')::BIGINT, (e->>'last_accessed')::TIMESTAMPTZ
+        FROM jsonb_array_elements(events) AS e
+        ON CONFLICT (kind, key) DO UPDATE
+            SET access_count = usage_stats.access_count + EXCLUDED.access_count,
+                last_accessed = GREATEST(usage_stats.last_accessed, EXCLUDED.last_accessed);
+
+        UPDATE audio_cache AS a
+        SET access_count = a.access_count + (e->>'count')::BIGINT,
+            last_accessed = GREATEST(a.last_accessed, (e->>'last_accessed')::TIMESTAMPTZ)
+        FROM jsonb_array_elements(events) AS e
+        WHERE e->>'kind' = 'audio' AND a.tailo_text = e->>'key';
+    $$ LANGUAGE sql;
     """
 
     print("Creating audio_cache table...")
@@ -88,6 +127,16 @@ def setup_storage_bucket(supabase: Client):
 
         if bucket_exists:
             print(f"✓ Bucket '{bucket_name}' already exists")
+            # Compact variants (audio_variants.py) are stored as WebM next to the MP3s
+            supabase.storage.update_bucket(
+                bucket_name,
+                options={
+                    'public': True,
+                    'file_size_limit': 1024 * 1024,
+                    'allowed_mime_types': ['audio/mpeg', 'audio/mp3', 'audio/webm']
+                }
+            )
+            print(f"✓ Bucket '{bucket_name}' allows audio/mpeg and audio/webm")
         else:
             # Create bucket
             supabase.storage.create_bucket(
@@ -95,7 +144,7 @@ def setup_storage_bucket(supabase: Client):
                 options={
                     'public': True,  # Public read access
                     'file_size_limit': 1024 * 1024,  # 1MB per file
-                    'allowed_mime_types': ['audio/mpeg', 'audio/mp3']
+                    'allowed_mime_types': ['audio/mpeg', 'audio/mp3', 'audio/webm']
                 }
             )
             print(f"✓ Created bucket '{bucket_name}'")
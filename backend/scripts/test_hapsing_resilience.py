@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Exercise the Hapsing circuit breaker and negative cache against a local stand-in
+Starts a small HTTP server that plays Hapsing (healthy, down or rejecting
+input), points the client at it via HAPSING_URL and checks that:
+  - failures open the circuit and later calls fail fast
+  - a half-open probe closes the circuit again once the upstream recovers
+  - failing inputs are answered from the negative cache
+No network access or credentials needed.
+"""
+
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# A silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz) stands in for synthesized audio
+FAKE_MP3 = b'\xff\xfb\x90\x00' + b'\x00' * 413
+
+
+class StandInHapsing(BaseHTTPRequestHandler):
+    """Answers /bangtsam?taibun=... according to the server's current mode"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        taibun = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query).get('taibun', [''])[0]
+
+        if server.mode == 'down':
+            self._reply(503, b'Service Unavailable', 'text/plain')
+        elif server.mode == 'throttled':
+            self._reply(429, b'Too Many Requests', 'text/plain', {'Retry-After': '1'})
+        elif taibun in server.rejected_inputs:
+            self._reply(400, b'Bad taibun', 'text/plain')
+        else:
+            self._reply(200, FAKE_MP3, 'audio/mpeg')
+
+    def _reply(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHapsing)
+    server.mode = 'ok'
+    server.requests = 0
+    server.rejected_inputs = {'bad-input'}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+failures = 0
+
+
+def check(description, condition):
+    global failures
+    if condition:
+        print(f"  ✓ {description}")
+    else:
+        failures += 1
+        print(f"  ❌ {description}")
+
+
+def expect_error(call, error_type):
+    try:
+        call()
+    except error_type as e:
+        return e
+    except Exception as e:
+        print(f"     (got {type(e).__name__}: {e})")
+        return None
+    return None
+
+
+def main():
+    server = start_stand_in()
+    os.environ['HAPSING_URL'] = f"http://127.0.0.1:{server.server_port}/bangtsam"
+
+    import hapsing
+    from http_pool import HTTPPool, HTTPStatusError, PoolTimeoutError
+    from circuit_breaker import CircuitBreaker, NegativeCache, CircuitOpenError, NegativeCacheHit
+
+    hapsing.HAPSING_URL = os.environ['HAPSING_URL']
+    hapsing.breaker = CircuitBreaker('hapsing', failure_threshold=3, reset_timeout=1.0)
+    hapsing.negative_cache = NegativeCache()
+    hapsing.NEGATIVE_TTL_TRANSIENT = 0.5
+
+    print("Testing Hapsing resilience against a local stand-in\n" + "=" * 70)
+
+    print("\n1. Healthy upstream")
+    check("audio is returned", hapsing.fetch_audio('tsa-bóo') == FAKE_MP3)
+    check("circuit is closed", hapsing.breaker.state == 'closed')
+
+    print("\n2. Rejected input is negatively cached (not counted as an outage)")
+    check("first request raises HTTP 400", expect_error(lambda: hapsing.fetch_audio('bad-input'), HTTPStatusError))
+    before = server.requests
+    hit = expect_error(lambda: hapsing.fetch_audio('bad-input'), NegativeCacheHit)
+    check("second request is answered from the negative cache", hit is not None and hit.rejected)
+    check("no request reached the upstream", server.requests == before)
+    check("circuit is still closed", hapsing.breaker.state == 'closed')
+
+    print("\n3. Throttling (429) is transient, not a rejected input")
+    server.mode = 'throttled'
+    check("request raises HTTP 429", expect_error(lambda: hapsing.fetch_audio('tsa-bóo 429'), HTTPStatusError))
+    hit = expect_error(lambda: hapsing.fetch_audio('tsa-bóo 429'), NegativeCacheHit)
+    check("retry is answered from the negative cache as transient", hit is not None and not hit.rejected)
+    check("counted as an upstream failure", hapsing.breaker.stats()['failures'] == 1)
+    server.mode = 'ok'
+    time.sleep(0.6)
+    check("after the transient TTL it is fetched again", hapsing.fetch_audio('tsa-bóo 429') == FAKE_MP3)
+
+    print("\n4. Upstream down: circuit opens and fails fast")
+    server.mode = 'down'
+    for index in range(3):
+        expect_error(lambda: hapsing.fetch_audio(f'tsa-bóo {index}'), HTTPStatusError)
+    check("circuit is open after 3 failures", hapsing.breaker.state == 'open')
+    before = server.requests
+    started = time.monotonic()
+    error = expect_error(lambda: hapsing.fetch_audio('lí hó'), CircuitOpenError)
+    check("open circuit raises CircuitOpenError", error is not None)
+    check("with a Retry-After hint", error is not None and error.retry_after >= 1)
+    check("fails fast (< 50 ms)", time.monotonic() - started < 0.05)
+    check("no request reached the upstream", server.requests == before)
+
+    print("\n5. Half-open probe while still down re-opens the circuit")
+    time.sleep(1.1)
+    check("circuit is half-open after reset_timeout", hapsing.breaker.state == 'half_open')
+    expect_error(lambda: hapsing.fetch_audio('lí hó'), HTTPStatusError)
+    check("failed probe re-opens the circuit", hapsing.breaker.state == 'open')
+
+    print("\n6. Recovery: half-open probe closes the circuit")
+    server.mode = 'ok'
+    time.sleep(1.1)
+    check("probe succeeds", hapsing.fetch_audio('lí hó') == FAKE_MP3)
+    check("circuit is closed again", hapsing.breaker.state == 'closed')
+
+    print("\n7. Transient failures expire from the negative cache")
+    server.mode = 'down'
+    expect_error(lambda: hapsing.fetch_audio('tsa-bóo 0'), HTTPStatusError)
+    server.mode = 'ok'
+    hit = expect_error(lambda: hapsing.fetch_audio('tsa-bóo 0'), NegativeCacheHit)
+    check("recently failed input is answered from the negative cache", hit is not None and not hit.rejected)
+    time.sleep(0.6)
+    check("after the TTL it is fetched again", hapsing.fetch_audio('tsa-bóo 0') == FAKE_MP3)
+
+    print("\n8. No free local connection slot is not an upstream failure")
+    pool = HTTPPool(max_per_host=1, connect_timeout=0.2)
+    held = pool.open(hapsing.hapsing_audio_url('tsa-bóo'))  # occupies the only slot
+    failures_before = hapsing.breaker.stats()['failures']
+    check("request raises PoolTimeoutError",
+          expect_error(lambda: hapsing.fetch_audio('tsa-bóo', pool=pool), PoolTimeoutError))
+    check("not counted against the circuit", hapsing.breaker.stats()['failures'] == failures_before)
+    held.read()
+    check("the input is not negatively cached", hapsing.fetch_audio('tsa-bóo', pool=pool) == FAKE_MP3)
+
+    server.mode = 'down'
+    for index in range(3):
+        expect_error(lambda: hapsing.fetch_audio(f'tsa-bóo {index}'), HTTPStatusError)
+    server.mode = 'ok'
+    time.sleep(1.1)
+    held = pool.open(hapsing.hapsing_audio_url('tsa-bóo'))
+    expect_error(lambda: hapsing.fetch_audio('lí hó', pool=pool), PoolTimeoutError)
+    held.read()
+    check("a half-open probe that never ran is given back",
+          hapsing.fetch_audio('lí hó', pool=pool) == FAKE_MP3 and hapsing.breaker.state == 'closed')
+
+    print("\n9. A non-MP3 200 body is a transient failure, not a rejection")
+    failures_before = hapsing.breaker.stats()['failures']
+    hapsing.record_bad_response('tsa-bóo html', 'non-MP3 response')
+    hit = expect_error(lambda: hapsing.fetch_audio('tsa-bóo html'), NegativeCacheHit)
+    check("counted against the circuit", hapsing.breaker.stats()['failures'] == failures_before + 1)
+    check("cached with the transient TTL", hit is not None and not hit.rejected)
+
+    print("\n" + "=" * 70)
+    print(f"Stats: {hapsing.stats()}")
+    server.shutdown()
+    if failures:
+        print(f"\n❌ {failures} check(s) failed")
+        return 1
+    print("\n✓ All checks passed")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Offline transcoding of cached clips into compact variants (see audio_variants.py)
+For every clip in the Supabase audio cache, downloads the original MP3, transcodes
+it with ffmpeg into each variant and uploads '<key>.r<version>.<variant>.<ext>' next to it.
+Reports byte savings and transcode time per variant.
+
+Usage:
+  python transcode_audio_variants.py                  # all variants, skip existing
+  python transcode_audio_variants.py --variant opus   # one variant
+  python transcode_audio_variants.py --limit 100 --force
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from http_pool import http_pool
+from audio_variants import VARIANTS, ffmpeg_available, transcode, variant_storage_path
+from audio_metadata import fetch_cached_rows, list_storage_objects
+
+# Load environment variables from .env file
+env_path = Path(__file__).parent.parent.parent / '.env'
+load_dotenv(env_path)
+
+BUCKET_NAME = 'taiwanese-audio'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Transcode cached clips into compact audio variants')
+    parser.add_argument('--variant', choices=sorted(VARIANTS), action='append',
+                        help='Variant to build (repeatable; default: all)')
+    parser.add_argument('--limit', type=int, help='Process at most this many clips')
+    parser.add_argument('--force', action='store_true', help='Re-transcode variants that already exist')
+    args = parser.parse_args()
+
+    if not ffmpeg_available():
+        print("❌ ffmpeg not found on PATH (install it, e.g. apt install ffmpeg / brew install ffmpeg)")
+        return 1
+
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    if not supabase_url or not supabase_key:
+        print("❌ Missing Supabase credentials!")
+        print("\nPlease set environment variables:")
+        print("  export SUPABASE_URL='your-project-url'")
+        print("  export SUPABASE_KEY='your-service-role-key'")
+        return 1
+
+    supabase: Client = create_client(supabase_url, supabase_key)
+    variants = args.variant or sorted(VARIANTS)
+
+    rows = fetch_cached_rows(supabase)
+    existing = set() if args.force else list_storage_objects(supabase, BUCKET_NAME)
+    if args.limit:
+        rows = rows[:args.limit]
+    print(f"Clips: {len(rows)}, variants: {', '.join(variants)}")
+
+    totals = {variant: {'clips': 0, 'original_bytes': 0, 'variant_bytes': 0, 'transcode_s': 0.0}
+              for variant in variants}
+    failed = 0
+
+    for i, row in enumerate(rows, 1):
+        text = row['tailo_text']
+        todo = [v for v in variants if variant_storage_path(text, v) not in existing]
+        if not todo:
+            continue
+
+        try:
+            original = http_pool.get(
+                f"{supabase_url}/storage/v1/object/public/{BUCKET_NAME}/{row['storage_path']}", read_timeout=15
+            )
+        except Exception as e:
+            failed += 1
+            print(f"[{i}/{len(rows)}] ❌ {text}: download failed: {e}")
+            continue
+
+        sizes = []
+        for variant in todo:
+            try:
+                started = time.monotonic()
+                audio_data = transcode(original, variant)
+                elapsed = time.monotonic() - started
+                supabase.storage.from_(BUCKET_NAME).upload(
+                    variant_storage_path(text, variant),
+                    audio_data,
+                    file_options={'content-type': VARIANTS[variant]['mimetype'], 'upsert': 'true'}
+                )
+            except Exception as e:
+                failed += 1
+                print(f"[{i}/{len(rows)}] ❌ {text} ({variant}): {e}")
+                continue
+
+            stats = totals[variant]
+            stats['clips'] += 1
+            stats['original_bytes'] += len(original)
+            stats['variant_bytes'] += len(audio_data)
+            stats['transcode_s'] += elapsed
+            sizes.append(f"{variant} {len(audio_data)}")
+
+        if sizes:
+            print(f"[{i}/{len(rows)}] ✓ {text}: {len(original)} → {', '.join(sizes)} bytes")
+
+    print(f"\n{'=' * 70}")
+    print("SAVINGS PER VARIANT")
+    print(f"{'=' * 70}")
+    for variant, stats in totals.items():
+        if not stats['clips']:
+            print(f"{variant:10s} nothing transcoded")
+            continue
+        saved = stats['original_bytes'] - stats['variant_bytes']
+        print(f"{variant:10s} {stats['clips']} clips: {stats['original_bytes'] / 1024:.0f} KB → "
+              f"{stats['variant_bytes'] / 1024:.0f} KB "
+              f"(-{saved / stats['original_bytes'] * 100:.0f}%, {saved / stats['clips'] / 1024:.1f} KB/clip saved), "
+              f"avg transcode {stats['transcode_s'] / stats['clips'] * 1000:.0f} ms")
+    if failed:
+        print(f"\n⚠️  {failed} failures")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
 """
 Validate and Fix Lesson Plan Vocabulary with Unicode Normalization
+
+Usage:
+  python validate_and_fix_lesson_plan.py                # against the dev server (python backend/app.py)
+  python validate_and_fix_lesson_plan.py --in-process   # no server; only lines changed since the last run are re-checked
 """
 
-import re
+import argparse
 import requests
+import sys
 import time
 import unicodedata
 from pathlib import Path
 
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lesson_plan_validation import parse_vocab_line, romanize_all
+
 # Backend API endpoint
 API_URL = "http://127.0.0.1:5001/api/romanize"
 
@@ -39,26 +49,17 @@ def call_api(taiwanese_text):
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
-def parse_vocab_line(line):
-    """
-    Parse vocabulary line: - Taiwanese (romanization) → Mandarin (pinyin) - English
-    """
-    # Match pattern: - WORD (ROMANIZATION) → WORD (PINYIN) - ENGLISH
-    pattern = r'^-\s+([^\(]+)\s+\(([^\)]+)\)\s+→\s+([^\(]+)\s+\(([^\)]+)\)\s+-\s+(.+)$'
-    match = re.match(pattern, line.strip())
-
-    if match:
-        return {
-            'taiwanese': match.group(1).strip(),
-            'romanization': match.group(2).strip(),
-            'mandarin': match.group(3).strip(),
-            'pinyin': match.group(4).strip(),
-            'english': match.group(5).strip(),
-            'original_line': line
-        }
-    return None
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--in-process', action='store_true',
+                        help='Romanize with the backend pipeline directly instead of the dev server on :5001')
+    parser.add_argument('--workers', type=int, help='Worker processes for --in-process (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='With --in-process, re-check every line instead of reusing results of earlier runs')
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     lesson_plan_path = Path(__file__).parent.parent.parent / 'LESSON_PLAN.md'
     mismatches_file = Path(__file__).parent / 'mismatches.txt'
 
@@ -82,6 +83,13 @@ def main():
     mismatch_log.write("="*80 + "\n\n")
     mismatch_log.flush()
 
+    # In-process: romanize every item up front, in parallel and through the result cache
+    results = None
+    if args.in_process:
+        vocab_items = [parse_vocab_line(line) for line in lines]
+        results = romanize_all([vocab['taiwanese'] for vocab in vocab_items if vocab],
+                               workers=args.workers, cache=not args.no_cache)
+
     issues = []
     checked = 0
     current_unit = ""
@@ -110,7 +118,7 @@ def main():
         print(f"[{checked}] {taiwanese} - {english}")
 
         # Call API
-        result = call_api(taiwanese)
+        result = results[taiwanese] if results is not None else call_api(taiwanese)
 
         if not result['success']:
             print(f"  ⚠️  API Error: {result.get('error', 'Unknown')}")
@@ -162,7 +170,8 @@ def main():
                 })
 
         # Rate limiting
-        time.sleep(0.3)
+        if results is None:
+            time.sleep(0.3)
 
     # Print summary
     print("\n" + "="*80)
@@ -235,5 +244,4 @@ def main():
     return 0
 
 if __name__ == '__main__':
-    import sys
     sys.exit(main())
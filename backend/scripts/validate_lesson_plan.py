@@ -2,13 +2,23 @@
 """
 Validate and Fix Lesson Plan Vocabulary
 Checks all Taiwanese translations in LESSON_PLAN.md against the backend translator
+
+Usage:
+  python validate_lesson_plan.py                # against the dev server (python backend/app.py)
+  python validate_lesson_plan.py --in-process   # no server; only lines changed since the last run are re-checked
 """
 
-import re
+import argparse
 import requests
+import sys
 import time
 from pathlib import Path
 
+# Add parent directory to path to import from backend
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lesson_plan_validation import parse_vocab_line, romanize_all
+
 # Backend API endpoint
 API_URL = "http://127.0.0.1:5001/api/romanize"
 
@@ -37,29 +47,17 @@ def call_translator(mandarin_text):
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
-def parse_vocab_line(line):
-    """
-    Parse a vocabulary line in format:
-    - Taiwanese (romanization) → Mandarin (pinyin) - English
-
-    Returns: (taiwanese, romanization, mandarin, pinyin, english) or None
-    """
-    # Match pattern: - WORD (ROMANIZATION) → WORD (PINYIN) - ENGLISH
-    pattern = r'^-\s+([^\(]+)\s+\(([^\)]+)\)\s+→\s+([^\(]+)\s+\(([^\)]+)\)\s+-\s+(.+)$'
-    match = re.match(pattern, line.strip())
-
-    if match:
-        return {
-            'taiwanese': match.group(1).strip(),
-            'romanization': match.group(2).strip(),
-            'mandarin': match.group(3).strip(),
-            'pinyin': match.group(4).strip(),
-            'english': match.group(5).strip(),
-            'original_line': line
-        }
-    return None
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--in-process', action='store_true',
+                        help='Romanize with the backend pipeline directly instead of the dev server on :5001')
+    parser.add_argument('--workers', type=int, help='Worker processes for --in-process (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='With --in-process, re-check every line instead of reusing results of earlier runs')
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     lesson_plan_path = Path(__file__).parent.parent.parent / 'LESSON_PLAN.md'
 
     if not lesson_plan_path.exists():
@@ -74,6 +72,15 @@ def main():
     with open(lesson_plan_path, 'r', encoding='utf-8') as f:
         lines = f.readlines()
 
+    # In-process: romanize every item up front, in parallel and through the result cache.
+    # Same pipeline the server runs for this request (it reads 'sourceLanguage', so the
+    # Mandarin text is romanized as Taiwanese)
+    results = None
+    if args.in_process:
+        vocab_items = [parse_vocab_line(line) for line in lines]
+        results = romanize_all([vocab['mandarin'] for vocab in vocab_items if vocab],
+                               workers=args.workers, cache=not args.no_cache)
+
     issues = []
     checked = 0
     line_num = 0
@@ -97,7 +104,7 @@ def main():
         print(f"  Current: {current_taiwanese} ({current_romanization})")
 
         # Call API
-        result = call_translator(mandarin)
+        result = results[mandarin] if results is not None else call_translator(mandarin)
 
         if not result['success']:
             print(f"  ⚠️  API Error: {result.get('error', 'Unknown')}")
@@ -134,7 +141,8 @@ def main():
         print()
 
         # Rate limiting
-        time.sleep(0.5)
+        if results is None:
+            time.sleep(0.5)
 
     # Print summary
     print("\n" + "=" * 80)
@@ -197,5 +205,4 @@ def main():
     return 0
 
 if __name__ == '__main__':
-    import sys
     sys.exit(main())
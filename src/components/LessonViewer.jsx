@@ -31,28 +31,57 @@ const LessonViewer = ({ lessonId }) => {
   }, [lessonId]);
 
   useEffect(() => {
-    // Pre-cache all audio for this lesson when it loads
+    // Load all audio for this lesson in one request: an MP3 sprite plus an index of
+    // byte ranges, each of which is a playable clip on its own
     if (!lessonData) return;
 
-    const cacheAudio = async () => {
+    let cancelled = false;
+    const clipUrls = {};
+
+    const loadAudioBundle = async () => {
       setCachingAudio(true);
       try {
-        const response = await fetch(`/api/lessons/${lessonId}/cache-audio`, {
-          method: 'POST'
-        });
-        const result = await response.json();
-        console.log(`Audio pre-caching complete: ${result.cached}/${result.total_phrases} phrases cached`);
-        if (result.failed > 0) {
-          console.warn(`Failed to cache ${result.failed} phrases:`, result.failures);
+        const manifestResponse = await fetch(`/api/lessons/${lessonId}/audio-bundle`);
+        if (!manifestResponse.ok) throw new Error('Audio bundle manifest fetch failed');
+        const manifest = await manifestResponse.json();
+
+        const spriteResponse = await fetch(manifest.sprite_url);
+        if (!spriteResponse.ok) throw new Error('Audio bundle fetch failed');
+        const sprite = await spriteResponse.blob();
+        if (cancelled) return;
+
+        for (const clip of manifest.clips) {
+          clipUrls[clip.romanization] = URL.createObjectURL(
+            sprite.slice(clip.start_byte, clip.start_byte + clip.length, 'audio/mpeg')
+          );
+        }
+        setAudioCache(prev => ({ ...prev, ...clipUrls }));
+
+        console.log(`Audio bundle loaded: ${manifest.clips.length} clips in one request`);
+        if (manifest.missing.length > 0) {
+          console.warn(`${manifest.missing.length} phrases not in the bundle (fetched on play):`, manifest.missing);
         }
       } catch (error) {
-        console.error('Error pre-caching audio:', error);
+        console.error('Error loading audio bundle:', error);
       } finally {
-        setCachingAudio(false);
+        if (!cancelled) setCachingAudio(false);
       }
     };
 
-    cacheAudio();
+    loadAudioBundle();
+
+    return () => {
+      cancelled = true;
+      // Revoked URLs must not stay in the cache, or replaying a phrase would fail
+      Object.values(clipUrls).forEach(url => URL.revokeObjectURL(url));
+      setAudioCache(prev => {
+        const next = { ...prev };
+        for (const [romanization, url] of Object.entries(clipUrls)) {
+          if (next[romanization] === url) delete next[romanization];
+        }
+        return next;
+      });
+    };
   }, [lessonData, lessonId]);
 
   const toggleAnswer = (exerciseIdx, itemIdx) => {
@@ -855,7 +884,7 @@ const LessonViewer = ({ lessonId }) => {
           <div className="max-w-6xl mx-auto px-4 py-2">
             <div className="flex items-center gap-2 text-sm text-blue-800">
               <Volume2 className="w-4 h-4 animate-pulse" />
-              <span>Pre-caching audio for instant playback...</span>
+              <span>Loading lesson audio...</span>
             </div>
           </div>
         </div>
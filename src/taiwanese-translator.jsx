@@ -2,6 +2,8 @@ import React, { useState, useEffect, useRef } from 'react';
 import { ArrowLeftRight, Volume2, BookOpen, Loader2, Languages, Library, Home, CreditCard, GraduationCap, BookMarked, MessageSquare, ChevronDown, MoreHorizontal, Trophy, CheckCircle, XCircle, RotateCcw, BarChart3, TrendingUp, Flame, Calendar, Award, Target, Timer, Clock, Play, Pause, Square } from 'lucide-react';
 import LessonViewer from './components/LessonViewer';
 import SentenceBuilder from './components/SentenceBuilder';
+// Tone Sandhi Training Exercises (also read by backend/audio_manifest.py)
+import toneSandhiExercises from './data/toneSandhiExercises.json';
 
 export default function TaiwaneseTranslator() {
   const [inputText, setInputText] = useState('');
@@ -730,174 +732,6 @@ export default function TaiwaneseTranslator() {
     ],
   };
 
-  // Tone Sandhi Training Exercises
-  const toneSandhiExercises = {
-    beginner: [
-      {
-        id: 'ts-001',
-        compound: { han: '跤踏車', tailo: 'kha-ta̍h-tshia', english: 'bicycle', mandarin: '腳踏車' },
-        characters: [
-          { han: '跤', tailo: 'kha', english: 'foot/leg' },
-          { han: '踏', tailo: 'ta̍h', english: 'step on' },
-          { han: '車', tailo: 'tshia', english: 'vehicle' }
-        ],
-        rule: 'In compound words, tones of non-final syllables typically change following tone sandhi rules',
-        category: 'Transportation'
-      },
-      {
-        id: 'ts-002',
-        compound: { han: '公車', tailo: 'kong-tshia', english: 'bus', mandarin: '公車' },
-        characters: [
-          { han: '公', tailo: 'kong', english: 'public' },
-          { han: '車', tailo: 'tshia', english: 'vehicle' }
-        ],
-        rule: 'Tone 1 (high level) before another syllable often remains unchanged',
-        category: 'Transportation'
-      },
-      {
-        id: 'ts-003',
-        compound: { han: '昨昏', tailo: 'tsa-hng', english: 'yesterday', mandarin: '昨天' },
-        characters: [
-          { han: '昨', tailo: 'tsa', english: 'previous' },
-          { han: '昏', tailo: 'hng', english: 'dusk/evening' }
-        ],
-        rule: 'The first syllable undergoes tone change when followed by another syllable',
-        category: 'Time'
-      },
-      {
-        id: 'ts-004',
-        compound: { han: '明仔載', tailo: 'bîn-á-tsài', english: 'tomorrow', mandarin: '明天' },
-        characters: [
-          { han: '明', tailo: 'bîn', english: 'bright' },
-          { han: '仔', tailo: 'á', english: 'diminutive particle' },
-          { han: '載', tailo: 'tsài', english: 'day' }
-        ],
-        rule: 'Multi-syllable compound showing tone sandhi in first syllable',
-        category: 'Time'
-      },
-      {
-        id: 'ts-005',
-        compound: { han: '紅色', tailo: 'âng-sik', english: 'red (color)', mandarin: '紅色' },
-        characters: [
-          { han: '紅', tailo: 'âng', english: 'red' },
-          { han: '色', tailo: 'sik', english: 'color' }
-        ],
-        rule: 'Tone 5 (low rising) changes in compound words',
-        category: 'Colors'
-      },
-      {
-        id: 'ts-006',
-        compound: { han: '藍色', tailo: 'nâ-sik', english: 'blue (color)', mandarin: '藍色' },
-        characters: [
-          { han: '藍', tailo: 'nâ', english: 'blue' },
-          { han: '色', tailo: 'sik', english: 'color' }
-        ],
-        rule: 'Tone 5 (low rising) in first position undergoes tone sandhi',
-        category: 'Colors'
-      }
-    ],
-    intermediate: [
-      {
-        id: 'ts-101',
-        compound: { han: '計程車', tailo: 'kè-thîng-tshia', english: 'taxi', mandarin: '計程車' },
-        characters: [
-          { han: '計', tailo: 'kè', english: 'calculate' },
-          { han: '程', tailo: 'thîng', english: 'distance' },
-          { han: '車', tailo: 'tshia', english: 'vehicle' }
-        ],
-        rule: 'Three-syllable compound: both first and second syllables undergo tone change',
-        category: 'Transportation'
-      },
-      {
-        id: 'ts-102',
-        compound: { han: '台灣人', tailo: 'tâi-uân-lâng', english: 'Taiwanese person', mandarin: '台灣人' },
-        characters: [
-          { han: '台', tailo: 'tâi', english: 'Taiwan' },
-          { han: '灣', tailo: 'uân', english: 'bay' },
-          { han: '人', tailo: 'lâng', english: 'person' }
-        ],
-        rule: 'Proper noun compound with tone sandhi in first two syllables',
-        category: 'People'
-      },
-      {
-        id: 'ts-103',
-        compound: { han: '電腦', tailo: 'tiān-náu', english: 'computer', mandarin: '電腦' },
-        characters: [
-          { han: '電', tailo: 'tiān', english: 'electricity' },
-          { han: '腦', tailo: 'náu', english: 'brain' }
-        ],
-        rule: 'Tone 7 (mid level) changes when followed by another syllable',
-        category: 'Technology'
-      },
-      {
-        id: 'ts-104',
-        compound: { han: '電話', tailo: 'tiān-uē', english: 'telephone', mandarin: '電話' },
-        characters: [
-          { han: '電', tailo: 'tiān', english: 'electricity' },
-          { han: '話', tailo: 'uē', english: 'speech' }
-        ],
-        rule: 'First syllable tone changes in two-syllable compound',
-        category: 'Technology'
-      },
-      {
-        id: 'ts-105',
-        compound: { han: '學生', tailo: 'ha̍k-sing', english: 'student', mandarin: '學生' },
-        characters: [
-          { han: '學', tailo: 'ha̍k', english: 'study' },
-          { han: '生', tailo: 'sing', english: 'person/life' }
-        ],
-        rule: 'Tone 8 (high checked) undergoes tone sandhi before another syllable',
-        category: 'Education'
-      }
-    ],
-    advanced: [
-      {
-        id: 'ts-201',
-        compound: { han: '食飽未', tailo: 'tsia̍h-pá-buē', english: 'Have you eaten?', mandarin: '吃飽了嗎' },
-        characters: [
-          { han: '食', tailo: 'tsia̍h', english: 'eat' },
-          { han: '飽', tailo: 'pá', english: 'full' },
-          { han: '未', tailo: 'buē', english: 'not yet (question particle)' }
-        ],
-        rule: 'Common greeting phrase with tone changes in first two syllables',
-        category: 'Greetings'
-      },
-      {
-        id: 'ts-202',
-        compound: { han: '你好無', tailo: 'lí-hó-bô', english: 'How are you?', mandarin: '你好嗎' },
-        characters: [
-          { han: '你', tailo: 'lí', english: 'you' },
-          { han: '好', tailo: 'hó', english: 'good' },
-          { han: '無', tailo: 'bô', english: 'not (question particle)' }
-        ],
-        rule: 'Question phrase showing tone sandhi across three syllables',
-        category: 'Greetings'
-      },
-      {
-        id: 'ts-203',
-        compound: { han: '對不住', tailo: 'tuì-put-tiū', english: 'sorry/excuse me', mandarin: '對不起' },
-        characters: [
-          { han: '對', tailo: 'tuì', english: 'correct/towards' },
-          { han: '不', tailo: 'put', english: 'not' },
-          { han: '住', tailo: 'tiū', english: 'reside' }
-        ],
-        rule: 'Polite expression with complex tone sandhi pattern',
-        category: 'Politeness'
-      },
-      {
-        id: 'ts-204',
-        compound: { han: '無要緊', tailo: 'bô-iàu-kín', english: "it's okay/no problem", mandarin: '沒關係' },
-        characters: [
-          { han: '無', tailo: 'bô', english: 'not have' },
-          { han: '要', tailo: 'iàu', english: 'need' },
-          { han: '緊', tailo: 'kín', english: 'tight/important' }
-        ],
-        rule: 'Three-syllable phrase commonly used in conversation',
-        category: 'Politeness'
-      }
-    ]
-  };
-
   const playPhraseAudio = async (phrase) => {
     setAudioError('');
     setIsSpeaking(true);